@@ -0,0 +1,3 @@
+"""
+Módulos de cálculo e exportação usados pelas páginas Streamlit.
+"""
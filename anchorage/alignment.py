@@ -0,0 +1,121 @@
+"""
+Parede ao longo do alinhamento: topo da parede e fundo da escavação
+variam com o PK (chainage) e as ancoragens repetem-se com espaçamento
+afast.
+
+Cada painel tem largura afast e está centrado numa coluna de
+ancoragens. Os níveis de ancoragem da secção tipo são definidos pela
+profundidade abaixo do topo da parede (y_wall - y1); num painel só
+existem os níveis que ficam acima do fundo da escavação. Para todos os
+painéis de uma vez (painéis x níveis):
+
+    H = y_wall(PK) - y_excav(PK)     (média no painel)
+    carga_parede = H * esp * 25
+    V_total = Σ P * sin(|θ|)         (níveis existentes)
+    C_bolbo = (V_total / afast + carga_parede) * A_inf
+"""
+import numpy as np
+import pandas as pd
+
+PROFILE_COLUMNS = ["chainage", "y_wall", "y_excav"]
+
+
+def profile_from_table(df):
+    """Perfil (chainage, y_wall, y_excav) ordenado por PK, sem linhas vazias."""
+    if df is None or len(df) == 0:
+        return pd.DataFrame(columns=PROFILE_COLUMNS, dtype=float)
+    df = pd.DataFrame(df)[PROFILE_COLUMNS].apply(pd.to_numeric, errors="coerce")
+    df = df.dropna().sort_values("chainage", kind="stable")
+    return df.drop_duplicates("chainage", keep="last").reset_index(drop=True)
+
+
+def panels(profile, afast, start=None, end=None):
+    """
+    Centros e limites dos painéis ao longo do perfil.
+    Devolve (centros, inícios, fins) com um painel por coluna de ancoragens.
+    """
+    ch = profile["chainage"].to_numpy(dtype=float)
+    start = ch[0] if start is None else start
+    end = ch[-1] if end is None else end
+    if end <= start or afast <= 0:
+        return np.empty(0), np.empty(0), np.empty(0)
+    n = max(1, int(np.floor((end - start) / afast + 1e-9)))
+    centers = start + afast * (np.arange(n) + 0.5)
+    return centers, centers - afast / 2, centers + afast / 2
+
+
+def evaluate(profile, prestress, angle, y1, y_wall_ref, esp, afast, A_inf,
+             start=None, end=None, samples=5):
+    """
+    Carga na parede e no bolbo para todos os painéis do alinhamento.
+
+    profile    -> DataFrame com chainage, y_wall, y_excav (ver profile_from_table)
+    prestress, angle, y1 -> ancoragens da secção tipo (uma por nível)
+    y_wall_ref -> topo da parede da secção tipo (define a profundidade dos níveis)
+    samples    -> pontos por painel para a média de H
+
+    Devolve DataFrame com uma linha por painel.
+    """
+    profile = profile_from_table(profile)
+    if len(profile) == 0:
+        return pd.DataFrame()
+    centers, lo, hi = panels(profile, afast, start, end)
+
+    ch = profile["chainage"].to_numpy(dtype=float)
+    # painéis x pontos de amostragem
+    t = (np.arange(samples) + 0.5) / samples
+    s = lo[:, None] + (hi - lo)[:, None] * t[None, :]
+    top = np.interp(s, ch, profile["y_wall"].to_numpy(dtype=float)).mean(axis=1)
+    bottom = np.interp(s, ch, profile["y_excav"].to_numpy(dtype=float)).mean(axis=1)
+    H = top - bottom
+
+    prestress = np.asarray(prestress, dtype=float)
+    V = prestress * np.sin(np.radians(np.abs(np.asarray(angle, dtype=float))))
+    depth = y_wall_ref - np.asarray(y1, dtype=float)
+    present = depth[None, :] < H[:, None]  # painéis x níveis
+
+    carga_parede = H * esp * 25
+    V_total = present.astype(float) @ V
+    V_metro = V_total / afast
+    C_bolbo = V_metro * A_inf + carga_parede * A_inf
+
+    return pd.DataFrame({
+        "Panel": np.arange(1, len(centers) + 1),
+        "Chainage": np.round(centers, 3),
+        "From": np.round(lo, 3),
+        "To": np.round(hi, 3),
+        "Wall top": np.round(top, 3),
+        "Excavation": np.round(bottom, 3),
+        "H": np.round(H, 3),
+        "Rows": present.sum(axis=1),
+        "carga_parede": np.round(carga_parede, 2),
+        "V_total": np.round(V_total, 2),
+        "V_metro": np.round(V_metro, 2),
+        "C_bolbo": np.round(C_bolbo, 2),
+    })
+
+
+def profile_figure(df_panels, profile=None):
+    """Perfil do alinhamento (topo/fundo) e carga no bolbo por PK (matplotlib)."""
+    import matplotlib.pyplot as plt
+
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 6), sharex=True,
+                                   gridspec_kw={"height_ratios": [1, 1.3]})
+    if profile is not None and len(profile):
+        ax1.plot(profile["chainage"], profile["y_wall"], "k-", label="Wall top")
+        ax1.plot(profile["chainage"], profile["y_excav"], "b-", label="Excavation")
+    else:
+        ax1.plot(df_panels["Chainage"], df_panels["Wall top"], "k-", label="Wall top")
+        ax1.plot(df_panels["Chainage"], df_panels["Excavation"], "b-", label="Excavation")
+    ax1.set_ylabel("Level (m)")
+    ax1.legend(loc="best", fontsize=8)
+    ax1.grid(True)
+
+    ax2.step(df_panels["Chainage"], df_panels["C_bolbo"], where="mid",
+             color="tab:orange", label="C_bolbo")
+    ax2.set_xlabel("Chainage (m)")
+    ax2.set_ylabel("Bulb load (kN)")
+    ax2.legend(loc="best", fontsize=8)
+    ax2.grid(True)
+    fig.tight_layout()
+    return fig
@@ -0,0 +1,130 @@
+"""
+Cálculo vectorizado das ancoragens (geometria, perdas, verificações).
+
+Mesmas fórmulas da página pages/anc_v2.py, avaliadas para todas as
+ancoragens de uma vez com numpy.
+"""
+import numpy as np
+import pandas as pd
+
+E = 210000  # MPa
+F_STEEL = 1440  # MPa, tensão admissível no aço
+
+# chaves de cada ancoragem em `data` (iguais às colunas do CSV importado)
+ANCHOR_KEYS = [
+    "x1", "y1", "angle", "free", "bond", "prestress",
+    "strands", "drill_mm", "alpha", "shear_stress", "FS",
+]
+
+ANCHOR_DEFAULTS = {
+    "x1": 0.0, "y1": 8.0, "angle": -25.0, "free": 10.0, "bond": 10.0,
+    "prestress": 100.0, "strands": 3, "drill_mm": 150, "alpha": 1.4,
+    "shear_stress": 150, "FS": 1.8,
+}
+
+
+def anchor_arrays(data):
+    """
+    Converte a lista `data` (dicts por ancoragem) ou um DataFrame com as
+    mesmas colunas num dict de arrays float.
+    """
+    if isinstance(data, pd.DataFrame):
+        cols = {c.lower(): c for c in data.columns}
+        return {
+            k: (data[cols[k.lower()]].to_numpy(dtype=float) if k.lower() in cols
+                else np.full(len(data), float(ANCHOR_DEFAULTS[k])))
+            for k in ANCHOR_KEYS
+        }
+    return {
+        k: np.array([float(d.get(k, ANCHOR_DEFAULTS[k])) for d in data], dtype=float)
+        for k in ANCHOR_KEYS
+    }
+
+
+def compute_coords(x1, y1, ang, L1, L2):
+    """Igual a compute_coords da página, aceita arrays."""
+    rad = np.radians(ang)
+    c, s = np.cos(rad), np.sin(rad)
+    x2 = x1 + L1 * c
+    y2 = y1 + L1 * s
+    x3 = x2 + L2 * c
+    y3 = y2 + L2 * s
+    return x2, y2, x3, y3
+
+
+def slip_loss(A, L_free, delta_L, E=E):
+    """ΔP_slip (kN) = (E * A / L_free_mm) * δ / 1000."""
+    return (E * A / (L_free * 1000)) * delta_L / 1000
+
+
+def bond_resistance(L_bond, drill_mm, alpha, tau, FS):
+    """R_bond (kN) = L_bond * π * d * α * τ / FS."""
+    return L_bond * np.pi * (drill_mm * 1e-3) * alpha * tau / FS
+
+
+def compute_anchors(data, A_strand, delta_L, E=E, f_steel=F_STEEL):
+    """
+    Resultados por ancoragem, com as colunas de df_res da página.
+
+    data     -> lista de dicts por ancoragem (ou DataFrame equivalente)
+    A_strand -> área por cordão (mm²)
+    delta_L  -> escorregamento das cunhas (mm)
+    """
+    a = anchor_arrays(data)
+    x2, y2, x3, y3 = compute_coords(a["x1"], a["y1"], a["angle"], a["free"], a["bond"])
+
+    A = a["strands"] * A_strand
+    loss = slip_loss(A, a["free"], delta_L, E)
+    P_block = a["prestress"] + loss
+    Pmax = A * f_steel / 1000
+    R_bond = bond_resistance(a["bond"], a["drill_mm"], a["alpha"],
+                             a["shear_stress"], a["FS"])
+
+    return pd.DataFrame({
+        "Anchor": np.arange(1, len(A) + 1),
+        "X1": a["x1"],
+        "Y1": a["y1"],
+        "X2": x2,
+        "Y2": y2,
+        "X3": x3,
+        "Y3": y3,
+        "L_free (m)": a["free"],
+        "L_bond (m)": a["bond"],
+        "Strands": a["strands"].astype(int),
+        "Steel Area (mm2)": A,
+        "Prestress (kN)": a["prestress"],
+        "Slip Loss (kN)": np.round(loss, 2),
+        "P_block (kN)": np.round(P_block, 2),
+        "Pmax (kN)": np.round(Pmax, 2),
+        "Block Check": np.where(P_block < Pmax, "OK", "FAIL"),
+        "Bond Resistance (kN)": np.round(R_bond, 2),
+        "Bond Check": np.where(R_bond > P_block, "OK", "FAIL"),
+        "drill_mm": a["drill_mm"],
+        "alpha": a["alpha"],
+        "shear_stress": a["shear_stress"],
+        "FS": a["FS"],
+    })
+
+
+def bulb_load(prestress, angle, H, esp, afast, A_inf):
+    """
+    Carga no bolbo (separador Bulb Load).
+
+    Devolve (df_bh, carga_parede, V_total, V_metro, C_bolbo).
+    """
+    prestress = np.asarray(prestress, dtype=float)
+    angle = np.asarray(angle, dtype=float)
+    V = prestress * np.sin(np.radians(np.abs(angle)))
+
+    df_bh = pd.DataFrame({
+        "Anchor": np.arange(1, len(V) + 1),
+        "Prestress": prestress,
+        "Angle": angle,
+        "V": V,
+    })
+
+    carga_parede = H * esp * 25
+    V_total = float(V.sum())
+    V_metro = V_total / afast
+    C_bolbo = V_metro * A_inf + carga_parede * A_inf
+    return df_bh, carga_parede, V_total, V_metro, C_bolbo
@@ -0,0 +1,186 @@
+"""
+Várias sondagens por secção e associação de cada selagem à sondagem
+mais próxima.
+
+Cada sondagem é um dict {"id", "x", "stratigraphy": [{"name", "y", ...}]}
+em que `y` é a cota do topo da camada `name`. As sondagens são ordenadas
+por x uma única vez (índice espacial 1D); a procura da(s) mais próxima(s)
+para todas as ancoragens é feita com np.searchsorted, em O(log n) por
+ancoragem.
+"""
+import numpy as np
+import pandas as pd
+
+
+def boreholes_from_geo(g, borehole_id="S1", borehole_x=1.0, stratigraphy=()):
+    """
+    Lista de sondagens a partir do geo_json importado / valores da página.
+    A sondagem principal (borehole_id/borehole_x/stratigraphy) vem primeiro,
+    seguida das de g["boreholes"].
+    """
+    out = [{"id": borehole_id, "x": float(borehole_x),
+            "stratigraphy": list(stratigraphy)}]
+    for b in (g or {}).get("boreholes", []) or []:
+        out.append({
+            "id": str(b.get("id", f"S{len(out) + 1}")),
+            "x": float(b.get("x", 0.0)),
+            "stratigraphy": list(b.get("stratigraphy", [])),
+        })
+    return out
+
+
+def _table(df):
+    """Tabela das sondagens com borehole_x / y convertidos (texto inválido -> NaN)."""
+    df = df.dropna(subset=["borehole_id"]).copy()
+    for c in ("borehole_x", "y"):
+        df[c] = pd.to_numeric(df[c], errors="coerce")
+    return df
+
+
+def invalid_rows(df):
+    """Linhas da tabela sem borehole_x numérico (ignoradas por boreholes_from_table)."""
+    if df is None or len(df) == 0:
+        return df
+    df = _table(df)
+    return df[df["borehole_x"].isna()]
+
+
+def boreholes_from_table(df):
+    """
+    Sondagens adicionais a partir de uma tabela longa com colunas
+    borehole_id, borehole_x, name, y (uma linha por camada). As linhas sem
+    borehole_x numérico são ignoradas (ver invalid_rows).
+    """
+    out = []
+    if df is None or len(df) == 0:
+        return out
+    df = _table(df).dropna(subset=["borehole_x"])
+    for bid, g in df.groupby("borehole_id", sort=False):
+        layers = [
+            {"name": str(r["name"]), "y": float(r["y"])}
+            for _, r in g.iterrows()
+            if not pd.isna(r.get("name")) and not pd.isna(r.get("y"))
+        ]
+        out.append({"id": str(bid), "x": float(g["borehole_x"].iloc[0]),
+                    "stratigraphy": layers})
+    return out
+
+
+def boreholes_to_table(boreholes):
+    """Inverso de boreholes_from_table."""
+    rows = []
+    for b in boreholes:
+        for lay in b["stratigraphy"] or [{"name": None, "y": None}]:
+            rows.append({"borehole_id": b["id"], "borehole_x": b["x"],
+                         "name": lay["name"], "y": lay["y"]})
+    return pd.DataFrame(rows, columns=["borehole_id", "borehole_x", "name", "y"])
+
+
+class BoreholeIndex:
+    """Índice das sondagens ordenadas por x."""
+
+    def __init__(self, boreholes):
+        order = np.argsort([b["x"] for b in boreholes], kind="stable")
+        self.boreholes = [boreholes[i] for i in order]
+        self.x = np.array([b["x"] for b in self.boreholes], dtype=float)
+        self.ids = np.array([b["id"] for b in self.boreholes], dtype=object)
+
+        # matriz sondagens x camadas (NaN onde a camada não existe)
+        names = []
+        for b in self.boreholes:
+            for lay in b["stratigraphy"]:
+                if lay["name"] not in names:
+                    names.append(lay["name"])
+        self.layer_names = names
+        self.tops = np.full((len(self.x), len(names)), np.nan)
+        for i, b in enumerate(self.boreholes):
+            for lay in b["stratigraphy"]:
+                self.tops[i, names.index(lay["name"])] = lay["y"]
+
+    def __len__(self):
+        return len(self.x)
+
+    def nearest(self, xq, k=1):
+        """
+        As k sondagens mais próximas de cada ponto xq.
+        Devolve (índices, distâncias), ambos com forma (len(xq), k).
+        """
+        xq = np.asarray(xq, dtype=float)
+        n = len(self.x)
+        k = min(k, n)
+        pos = np.searchsorted(self.x, xq)
+
+        # candidatas: k de cada lado da posição de inserção
+        cand = pos[:, None] + np.arange(-k, k)[None, :]
+        valid = (cand >= 0) & (cand < n)
+        cand = np.clip(cand, 0, n - 1)
+        dist = np.where(valid, np.abs(self.x[cand] - xq[:, None]), np.inf)
+
+        sel = np.argsort(dist, axis=1, kind="stable")[:, :k]
+        rows = np.arange(len(xq))[:, None]
+        return cand[rows, sel], dist[rows, sel]
+
+    def layer_tops(self, xq, interpolate=False):
+        """
+        Cotas dos topos das camadas em cada ponto xq (len(xq) x n_camadas).
+        Sem interpolação usa a sondagem mais próxima; com interpolação faz
+        interpolação linear entre as sondagens vizinhas à esquerda e à
+        direita (fora do intervalo, ou se faltar a camada, usa a mais próxima).
+        """
+        xq = np.asarray(xq, dtype=float)
+        near, _ = self.nearest(xq, 1)
+        tops = self.tops[near[:, 0]]
+        if not interpolate or len(self.x) < 2:
+            return tops
+
+        right = np.clip(np.searchsorted(self.x, xq), 1, len(self.x) - 1)
+        left = right - 1
+        span = self.x[right] - self.x[left]
+        w = np.where(span > 0, (xq - self.x[left]) / np.where(span > 0, span, 1), 0.0)
+        inside = (w >= 0) & (w <= 1)
+        interp = (1 - w)[:, None] * self.tops[left] + w[:, None] * self.tops[right]
+        use = inside[:, None] & ~np.isnan(interp)
+        return np.where(use, interp, tops)
+
+
+def layer_at(tops, names, y):
+    """
+    Camada que contém a cota y: a de topo mais baixo que ainda fica acima
+    (ou ao nível) de y. "-" se y está acima de todas as camadas.
+    """
+    y = np.asarray(y, dtype=float)
+    if not names:
+        return np.full(len(y), "-", dtype=object)
+    above = np.where(tops >= y[:, None], tops, np.inf)
+    idx = above.argmin(axis=1)
+    found = np.isfinite(above[np.arange(len(y)), idx])
+    return np.where(found, np.asarray(names, dtype=object)[idx], "-")
+
+
+def assign(df_res, boreholes, k=1, interpolate=False):
+    """
+    Associa o ponto médio da selagem de cada ancoragem à(s) sondagem(ns)
+    mais próxima(s) e indica a camada em que fica.
+
+    df_res -> resultados (colunas X2, Y2, X3, Y3)
+    k      -> número de sondagens vizinhas a listar
+    """
+    index = BoreholeIndex(boreholes)
+    xm = ((df_res["X2"] + df_res["X3"]) / 2).to_numpy(dtype=float)
+    ym = ((df_res["Y2"] + df_res["Y3"]) / 2).to_numpy(dtype=float)
+
+    near, dist = index.nearest(xm, k)
+    tops = index.layer_tops(xm, interpolate)
+
+    out = pd.DataFrame({
+        "Anchor": df_res["Anchor"].to_numpy(),
+        "X bond mid": np.round(xm, 2),
+        "Y bond mid": np.round(ym, 2),
+        "Borehole": index.ids[near[:, 0]],
+        "Distance (m)": np.round(dist[:, 0], 2),
+    })
+    for j in range(1, near.shape[1]):
+        out[f"Borehole {j + 1}"] = index.ids[near[:, j]]
+        out[f"Distance {j + 1} (m)"] = np.round(dist[:, j], 2)
+    out["Bond layer"] = layer_at(tops, index.layer_names, ym)
+    return out
@@ -0,0 +1,132 @@
+"""
+Combinações de cálculo / coeficientes parciais para as ancoragens.
+
+Cada combinação aplica coeficientes à carga (pré-esforço e perda por
+escorregamento) e às resistências (aço e selagem). As verificações de
+bloco e de selagem são avaliadas como uma matriz ancoragens x combinações
+numa única passagem vectorizada.
+"""
+import numpy as np
+import pandas as pd
+
+from anchorage.anchors import E, F_STEEL, anchor_arrays, bond_resistance, slip_loss
+
+# coluna -> valor por omissão; gamma_bond = None usa o FS de cada ancoragem
+COMBINATION_FIELDS = {
+    "name": "",
+    "gamma_P": 1.0,      # coeficiente sobre o pré-esforço
+    "gamma_slip": 1.0,   # coeficiente sobre a perda por escorregamento
+    "f_steel": F_STEEL,  # tensão de referência do aço (MPa)
+    "gamma_s": 1.0,      # coeficiente parcial do aço
+    "gamma_bond": None,  # coeficiente parcial da selagem (None -> FS)
+}
+
+# valores indicativos; ajustar ao regulamento/anexo nacional do projecto.
+# Para ancoragens a DA2 (A1 + R2, gamma_a = 1.1) coincide com a DA1-C1.
+DEFAULT_COMBINATIONS = [
+    {"name": "SLS (FS per anchor)"},
+    {"name": "ULS DA1-C1 / DA2", "gamma_P": 1.35, "gamma_slip": 1.35,
+     "gamma_s": 1.15, "gamma_bond": 1.1},
+    {"name": "ULS DA1-C2", "gamma_P": 1.0, "gamma_slip": 1.0,
+     "gamma_s": 1.15, "gamma_bond": 1.1},
+]
+
+
+def combination_table(combinations=None, f_steel=F_STEEL):
+    """
+    DataFrame com uma linha por combinação e todas as colunas preenchidas
+    (f_steel em falta -> f_steel da secção).
+    """
+    combos = DEFAULT_COMBINATIONS if combinations is None else combinations
+    if isinstance(combos, pd.DataFrame):
+        combos = combos.to_dict("records")
+    defaults = {**COMBINATION_FIELDS, "f_steel": f_steel}
+
+    rows = []
+    for i, c in enumerate(combos):
+        row = {}
+        for k, default in defaults.items():
+            v = c.get(k, default)
+            if k != "name" and v is not None and pd.isna(v):
+                v = default
+            row[k] = v
+        row["name"] = row["name"] or f"C{i + 1}"
+        rows.append(row)
+    return pd.DataFrame(rows, columns=list(COMBINATION_FIELDS))
+
+
+def evaluate(data, A_strand, delta_L, combinations=None, E=E, eta=None,
+             f_steel=F_STEEL):
+    """
+    Avalia todas as ancoragens para todas as combinações.
+
+    data         -> lista de dicts por ancoragem (ou DataFrame)
+    combinations -> lista de dicts / DataFrame (ver COMBINATION_FIELDS)
+    f_steel      -> tensão do aço das combinações sem f_steel
+    eta          -> factor de grupo por ancoragem sobre R_d (None = 1)
+    Devolve dict de matrizes (n_anchors x n_combos): "P_d", "Pmax_d",
+    "R_d", "U_block", "U_bond", e "names" com os nomes das combinações.
+    """
+    a = anchor_arrays(data)
+    combos = combination_table(combinations, f_steel)
+
+    gP = combos["gamma_P"].to_numpy(dtype=float)[None, :]
+    gSlip = combos["gamma_slip"].to_numpy(dtype=float)[None, :]
+    fs = combos["f_steel"].to_numpy(dtype=float)[None, :]
+    gS = combos["gamma_s"].to_numpy(dtype=float)[None, :]
+    # NaN onde a combinação usa o FS da ancoragem
+    gB = combos["gamma_bond"].to_numpy(dtype=float, na_value=np.nan)[None, :]
+
+    A = (a["strands"] * A_strand)[:, None]
+    loss = slip_loss(A, a["free"][:, None], delta_L, E)
+    P_d = gP * a["prestress"][:, None] + gSlip * loss
+    Pmax_d = A * fs / gS / 1000
+
+    factor = np.where(np.isnan(gB), a["FS"][:, None], gB)
+    R_d = bond_resistance(a["bond"][:, None], a["drill_mm"][:, None],
+                          a["alpha"][:, None], a["shear_stress"][:, None], factor)
+    if eta is not None:
+        R_d = R_d * np.asarray(eta, dtype=float)[:, None]
+
+    return {
+        "names": combos["name"].tolist(),
+        "P_d": P_d,
+        "Pmax_d": Pmax_d,
+        "R_d": R_d,
+        "U_block": P_d / Pmax_d,
+        "U_bond": P_d / R_d,
+    }
+
+
+def governing(data, A_strand, delta_L, combinations=None, E=E, eta=None,
+              f_steel=F_STEEL):
+    """
+    Combinação condicionante por ancoragem.
+
+    Devolve um DataFrame com a utilização máxima de bloco e de selagem,
+    a combinação em que ocorre e a verificação global (OK se U < 1, como
+    em compute_anchors: P_block < Pmax e R_bond > P_block).
+    """
+    res = evaluate(data, A_strand, delta_L, combinations, E, eta, f_steel)
+    names = np.asarray(res["names"], dtype=object)
+    Ub, Ur = res["U_block"], res["U_bond"]
+    n = Ub.shape[0]
+    rows = np.arange(n)
+
+    ib = Ub.argmax(axis=1)
+    ir = Ur.argmax(axis=1)
+    ub = Ub[rows, ib]
+    ur = Ur[rows, ir]
+    worst = np.maximum(ub, ur)
+
+    return pd.DataFrame({
+        "Anchor": rows + 1,
+        "U_block": np.round(ub, 3),
+        "Block Combination": names[ib] if n else [],
+        "U_bond": np.round(ur, 3),
+        "Bond Combination": names[ir] if n else [],
+        "Governing": np.where(ub >= ur, "Block", "Bond"),
+        "Governing Combination": np.where(ub >= ur, names[ib], names[ir]) if n else [],
+        "U_max": np.round(worst, 3),
+        "Check": np.where(worst < 1.0, "OK", "FAIL"),
+    })
@@ -0,0 +1,325 @@
+"""
+Cache de resultados em disco, partilhada entre sessões e reinícios.
+
+As entradas são endereçadas pelo conteúdo: a chave é o hash SHA-256 de
+CACHE_VERSION e dos dados normalizados (ancoragens, estratigrafia,
+parâmetros globais), e cada tipo de resultado (df_res, df_bh, png, pdf,
+dxf) fica num ficheiro próprio. O tamanho total é limitado; quando é
+excedido são removidas as entradas usadas há mais tempo (LRU pela data de
+modificação, actualizada em cada leitura).
+
+O directório é privado (0700, na cache do utilizador e não no tmp
+partilhado) e os objectos são guardados como .npz sem pickle: arrays
+numpy + uma descrição JSON da estrutura (dicts, listas, DataFrames).
+"""
+import hashlib
+import io
+import json
+import math
+import os
+import stat
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+# incrementar sempre que mude o cálculo ou o formato de um resultado guardado
+CACHE_VERSION = 2
+
+
+def app_dir(name, data=False):
+    """
+    Directório da aplicação no perfil do utilizador (não o tmp partilhado):
+    cache (~/.cache) ou, com data=True, dados persistentes (~/.local/share).
+    """
+    if data:
+        base = (
+            os.environ.get("XDG_DATA_HOME")
+            or os.environ.get("APPDATA")
+            or os.path.join(os.path.expanduser("~"), ".local", "share")
+        )
+    else:
+        base = (
+            os.environ.get("XDG_CACHE_HOME")
+            or os.environ.get("LOCALAPPDATA")
+            or os.path.join(os.path.expanduser("~"), ".cache")
+        )
+    return os.path.join(base, "anchorage", name)
+
+
+def private_dir(path):
+    """
+    Cria `path` (e os pais em falta) com permissões 0700. Um directório já
+    existente tem de pertencer ao utilizador; se outros lhe tiverem acesso
+    as permissões são reduzidas a 0700.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if os.name != "posix":
+        return path
+    st = os.stat(path)
+    if st.st_uid != os.getuid():
+        raise PermissionError(f"{path} belongs to another user")
+    if stat.S_IMODE(st.st_mode) & 0o077:
+        os.chmod(path, 0o700)
+    return path
+
+
+DEFAULT_DIR = os.environ.get("ANCHORAGE_CACHE_DIR") or app_dir("cache")
+DEFAULT_MAX_BYTES = int(float(os.environ.get("ANCHORAGE_CACHE_MB", "512")) * 1e6)
+
+
+def _normalize(v):
+    """Converte recursivamente para tipos JSON estáveis (floats arredondados)."""
+    if isinstance(v, dict):
+        return {str(k): _normalize(x) for k, x in sorted(v.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(v, (list, tuple)):
+        return [_normalize(x) for x in v]
+    if hasattr(v, "tolist"):  # numpy / pandas
+        return _normalize(v.tolist())
+    if isinstance(v, bool) or v is None or isinstance(v, str):
+        return v
+    if isinstance(v, (int, float)):
+        f = float(v)
+        if math.isnan(f) or math.isinf(f):
+            return str(f)
+        # 1 e 1.0 (ou 0.1+0.2 e 0.3) dão a mesma chave
+        return float(f"{f:.10g}")
+    return str(v)
+
+
+def content_key(*parts):
+    """Chave de conteúdo (hex) para qualquer combinação de entradas (e CACHE_VERSION)."""
+    raw = json.dumps(_normalize((CACHE_VERSION,) + parts), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# =============================================================
+# OBJECTOS -> NPZ (SEM PICKLE)
+# =============================================================
+def _array(a, arrays):
+    """Guarda um array em `arrays` e devolve a referência; texto -> unicode."""
+    a = np.asarray(a)
+    text = a.dtype == object
+    if text:
+        if not all(isinstance(v, str) for v in a.ravel()):
+            raise TypeError("object arrays must hold strings")
+        a = a.astype(str)
+    name = f"a{len(arrays)}"
+    arrays[name] = a
+    return {"__array__": name, "text": bool(text)}
+
+
+def _names(keys):
+    keys = list(keys)
+    if not all(isinstance(k, str) for k in keys):
+        raise TypeError("keys and column names must be strings")
+    return keys
+
+
+def _pack(obj, arrays):
+    """Estrutura JSON de obj; os arrays numpy ficam em `arrays`."""
+    if isinstance(obj, pd.DataFrame):
+        idx = obj.index
+        plain = isinstance(idx, pd.RangeIndex) and idx.start == 0 and idx.step == 1
+        return {
+            "__frame__": [[c, _array(obj[c].to_numpy(), arrays)] for c in _names(obj.columns)],
+            "index": None if plain else _array(idx.to_numpy(), arrays),
+        }
+    if isinstance(obj, np.ndarray):
+        return _array(obj, arrays)
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, dict):
+        return {"__dict__": [[k, _pack(obj[k], arrays)] for k in _names(obj)]}
+    if isinstance(obj, tuple):
+        return {"__tuple__": [_pack(v, arrays) for v in obj]}
+    if isinstance(obj, list):
+        return [_pack(v, arrays) for v in obj]
+    if obj is None or isinstance(obj, (bool, int, float, str)):
+        return obj
+    raise TypeError(f"cannot store {type(obj).__name__}")
+
+
+def _unpack(v, arrays):
+    if isinstance(v, list):
+        return [_unpack(x, arrays) for x in v]
+    if not isinstance(v, dict):
+        return v
+    if "__array__" in v:
+        a = arrays[v["__array__"]]
+        return a.astype(object) if v["text"] else a
+    if "__frame__" in v:
+        cols = {c: _unpack(a, arrays) for c, a in v["__frame__"]}
+        index = None if v["index"] is None else _unpack(v["index"], arrays)
+        if not cols:
+            return pd.DataFrame(index=index)
+        return pd.DataFrame(cols, index=index)
+    if "__dict__" in v:
+        return {k: _unpack(x, arrays) for k, x in v["__dict__"]}
+    return tuple(_unpack(x, arrays) for x in v["__tuple__"])
+
+
+def dumps(obj):
+    """Bytes .npz de obj (DataFrames, arrays, dicts, listas, tuplos, escalares)."""
+    arrays = {}
+    tree = _pack(obj, arrays)
+    buf = io.BytesIO()
+    np.savez(buf, __tree__=np.array(json.dumps(tree)), **arrays)
+    return buf.getvalue()
+
+
+def loads(data):
+    """Inverso de dumps; nunca executa código (allow_pickle=False)."""
+    with np.load(io.BytesIO(data), allow_pickle=False) as z:
+        arrays = {k: z[k] for k in z.files}
+    return _unpack(json.loads(str(arrays.pop("__tree__"))), arrays)
+
+
+class DiskCache:
+    """
+    root      -> directório da cache (criado se não existir)
+    max_bytes -> tamanho máximo; acima disso remove as entradas mais antigas
+    """
+
+    def __init__(self, root=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        private_dir(root)
+        # contadores mantidos em set/evict: stats() não lê o disco
+        entries = [size for _, size, _ in self._entries()]
+        self._size = sum(entries)
+        self._count = len(entries)
+
+    # ---------------------------------------------------------
+    # FICHEIROS
+    # ---------------------------------------------------------
+    def _path(self, key, kind):
+        return os.path.join(self.root, key[:2], f"{key}.{kind}")
+
+    def _entries(self):
+        for sub in os.scandir(self.root):
+            if not sub.is_dir():
+                continue
+            for f in os.scandir(sub.path):
+                if f.name.endswith(".tmp"):
+                    continue
+                try:
+                    st = f.stat()
+                except FileNotFoundError:
+                    continue
+                yield f.path, st.st_size, st.st_mtime
+
+    # ---------------------------------------------------------
+    # BYTES
+    # ---------------------------------------------------------
+    def get(self, key, kind):
+        """Bytes guardados ou None."""
+        path = self._path(key, kind)
+        try:
+            with open(path, "rb") as fh:
+                data = fh.read()
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            os.utime(path)  # marca como usado recentemente
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def set(self, key, kind, data):
+        path = self._path(key, kind)
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+
+        # escrita atómica: outras sessões/processos nunca vêem ficheiros parciais
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        try:
+            old, is_new = os.path.getsize(path), 0
+        except FileNotFoundError:
+            old, is_new = 0, 1
+        os.replace(tmp, path)
+
+        with self._lock:
+            self._size += len(data) - old
+            self._count += is_new
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def get_or_set(self, key, kind, compute):
+        data = self.get(key, kind)
+        if data is None:
+            data = compute()
+            self.set(key, kind, data)
+        return data
+
+    # ---------------------------------------------------------
+    # OBJECTOS PYTHON (DataFrames, ...)
+    # ---------------------------------------------------------
+    def get_object(self, key, kind, compute):
+        """Como get_or_set, mas para objectos guardados com dumps (.npz)."""
+        data = self.get(key, kind)
+        if data is not None:
+            try:
+                return loads(data)
+            except Exception:
+                pass  # entrada corrompida/incompatível: recalcula
+        obj = compute()
+        try:
+            data = dumps(obj)
+        except TypeError:
+            return obj  # tipo não suportado: fica sem cache
+        self.set(key, kind, data)
+        return obj
+
+    # ---------------------------------------------------------
+    # LRU
+    # ---------------------------------------------------------
+    def evict(self, target=None):
+        """Remove as entradas mais antigas até ficar abaixo de target (90% do limite)."""
+        target = int(self.max_bytes * 0.9) if target is None else target
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        with self._lock:
+            self._size = total
+            self._count = len(entries) - removed
+            self.evictions += removed
+
+    def clear(self):
+        self.evict(target=0)
+
+    def stats(self):
+        """
+        Contadores desta instância (sem ler o disco). Entradas escritas por
+        outros processos só entram na contagem no próximo evict.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": self._count,
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
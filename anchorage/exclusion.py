@@ -0,0 +1,294 @@
+"""
+Zonas de exclusão (caves, túneis, limites de propriedade) e verificação
+de interferência dos troços livre e selado de cada ancoragem.
+
+Cada zona é um dict {"name", "layer", "points": [[x, y], ...], "closed",
+"clearance"}; uma zona fechada é um polígono (o interior também conta
+como interferência), uma aberta é uma linha (ex.: limite de propriedade).
+clearance = None usa o afastamento mínimo geral.
+
+Os lados das zonas são guardados numa grelha uniforme (ZoneIndex, sobre
+spatial.BoxGrid): cada troço de ancoragem só é comparado com os lados
+das células que o seu rectângulo envolvente (alargado do afastamento)
+cobre, e as distâncias segmento-segmento são calculadas de uma vez para
+todos os pares candidatos.
+
+    zones = exclusion.parse_file(raw, "zones.dxf")["zones"]
+    res = exclusion.check(df_res, zones, clearance=1.0)
+"""
+import io
+
+import numpy as np
+import pandas as pd
+
+from anchorage import imports
+from anchorage.spatial import BoxGrid, segment_distance, segments_cross
+
+ZONE_COLUMNS = ["zone", "x", "y", "clearance"]
+CIRCLE_SEGMENTS = 36
+VIOLATION_COLUMNS = ["Anchor", "Part", "Zone", "Distance (m)", "Clearance (m)", "Status"]
+TOUCH_TOL = 1e-9  # m; distâncias até este valor contam como contacto
+
+
+# =============================================================
+# LEITURA (DXF / FICHEIRO DE COORDENADAS)
+# =============================================================
+def zones_from_table(df):
+    """
+    Zonas a partir de uma tabela longa zone, x, y [, clearance] [, closed]
+    (um vértice por linha, pela ordem do contorno). Por omissão as zonas
+    com 3 ou mais vértices são fechadas.
+    """
+    df = imports.normalize_columns(df).dropna(subset=["zone", "x", "y"])
+    out = []
+    for name, g in df.groupby("zone", sort=False):
+        pts = g[["x", "y"]].to_numpy(dtype=float).tolist()
+        if len(pts) < 2:
+            continue
+        closed = len(pts) >= 3
+        if "closed" in g.columns and not pd.isna(g["closed"].iloc[0]):
+            closed = str(g["closed"].iloc[0]).strip().lower() in ("1", "true", "yes", "y")
+        c = None
+        if "clearance" in g.columns and not pd.isna(g["clearance"].iloc[0]):
+            c = float(g["clearance"].iloc[0])
+        out.append({"name": str(name), "layer": "", "points": pts,
+                    "closed": closed, "clearance": c})
+    return out
+
+
+def zones_from_dxf(raw):
+    """Polilinhas, linhas e círculos de todas as layers de um DXF (bytes)."""
+    from ezdxf import recover
+
+    doc, _ = recover.read(io.BytesIO(raw))
+    out = []
+    count = {}
+    for e in doc.modelspace():
+        kind = e.dxftype()
+        layer = e.dxf.layer
+        if kind == "LWPOLYLINE":
+            pts = [list(p) for p in e.get_points("xy")]
+            closed = bool(e.closed)
+        elif kind == "POLYLINE":
+            pts = [[v.x, v.y] for v in e.points()]
+            closed = bool(e.is_closed)
+        elif kind == "LINE":
+            pts = [[e.dxf.start.x, e.dxf.start.y], [e.dxf.end.x, e.dxf.end.y]]
+            closed = False
+        elif kind == "CIRCLE":
+            t = np.linspace(0, 2 * np.pi, CIRCLE_SEGMENTS, endpoint=False)
+            cx, cy, r = e.dxf.center.x, e.dxf.center.y, e.dxf.radius
+            pts = np.column_stack([cx + r * np.cos(t), cy + r * np.sin(t)]).tolist()
+            closed = True
+        else:
+            continue
+        if len(pts) < 2:
+            continue
+        count[layer] = count.get(layer, 0) + 1
+        out.append({"name": f"{layer} #{count[layer]}", "layer": layer,
+                    "points": pts, "closed": closed and len(pts) >= 3,
+                    "clearance": None})
+    return out
+
+
+def parse_file(raw, filename):
+    """
+    raw      -> bytes do ficheiro carregado
+    filename -> nome (a extensão .dxf escolhe o leitor DXF; o resto é CSV)
+    Devolve {"zones": [...], "layers": [layers com zonas]}.
+    """
+    if filename.lower().endswith(".dxf"):
+        zones = zones_from_dxf(raw)
+    else:
+        try:
+            text = raw.decode("utf-8")
+        except UnicodeDecodeError:
+            text = raw.decode("latin-1")
+        zones = zones_from_table(pd.read_csv(io.StringIO(text), sep=None, engine="python"))
+    layers = sorted({z["layer"] for z in zones if z["layer"]})
+    return {"zones": zones, "layers": layers}
+
+
+def select(zones, layers=None):
+    """Zonas das layers escolhidas (None = todas; zonas sem layer ficam sempre)."""
+    if layers is None:
+        return list(zones)
+    layers = set(layers)
+    return [z for z in zones if not z["layer"] or z["layer"] in layers]
+
+
+# =============================================================
+# ÍNDICE DAS ZONAS
+# =============================================================
+class ZoneIndex:
+    """Lados de todas as zonas numa grelha, mais os rectângulos das zonas fechadas."""
+
+    def __init__(self, zones, cell=None):
+        self.names = np.array([z["name"] for z in zones], dtype=object)
+        self.closed = np.array([bool(z["closed"]) for z in zones])
+        ax, ay, bx, by, zid = [], [], [], [], []
+        for k, z in enumerate(zones):
+            p = np.asarray(z["points"], dtype=float)
+            q = np.roll(p, -1, axis=0) if z["closed"] else p[1:]
+            p = p if z["closed"] else p[:-1]
+            ax.append(p[:, 0])
+            ay.append(p[:, 1])
+            bx.append(q[:, 0])
+            by.append(q[:, 1])
+            zid.append(np.full(len(p), k))
+        self.ax, self.ay = np.concatenate(ax), np.concatenate(ay)
+        self.bx, self.by = np.concatenate(bx), np.concatenate(by)
+        self.zone = np.concatenate(zid)
+
+        if cell is None:
+            cell = np.median(np.hypot(self.bx - self.ax, self.by - self.ay))
+        self.cell = max(float(cell), 1e-3)
+        self.edges = BoxGrid(
+            np.column_stack([np.minimum(self.ax, self.bx), np.minimum(self.ay, self.by)]),
+            np.column_stack([np.maximum(self.ax, self.bx), np.maximum(self.ay, self.by)]),
+            self.cell,
+        )
+
+        # lados de cada zona são contíguos: início e número por zona
+        self.start = np.searchsorted(self.zone, np.arange(len(zones)))
+        self.count = np.bincount(self.zone, minlength=len(zones))
+        zx0 = np.minimum.reduceat(np.minimum(self.ax, self.bx), self.start)
+        zy0 = np.minimum.reduceat(np.minimum(self.ay, self.by), self.start)
+        zx1 = np.maximum.reduceat(np.maximum(self.ax, self.bx), self.start)
+        zy1 = np.maximum.reduceat(np.maximum(self.ay, self.by), self.start)
+        self.boxes = BoxGrid(np.column_stack([zx0, zy0]), np.column_stack([zx1, zy1]),
+                             self.cell)
+
+    def near(self, x0, y0, x1, y1, pad):
+        """Pares (segmento, lado) com rectângulos a menos de `pad`."""
+        lo_x, hi_x = np.minimum(x0, x1) - pad, np.maximum(x0, x1) + pad
+        lo_y, hi_y = np.minimum(y0, y1) - pad, np.maximum(y0, y1) + pad
+        return self.edges.query(np.column_stack([lo_x, lo_y]), np.column_stack([hi_x, hi_y]))
+
+    def inside(self, px, py):
+        """Pares (ponto, zona) com o ponto no interior de uma zona fechada (par-ímpar)."""
+        p = np.column_stack([px, py])
+        pi, zi = self.boxes.query(p, p)
+        keep = self.closed[zi]
+        pi, zi = pi[keep], zi[keep]
+
+        # cada par contra todos os lados da sua zona
+        cnt = self.count[zi]
+        owner = np.repeat(np.arange(len(pi)), cnt)
+        e = np.repeat(self.start[zi], cnt) + np.arange(cnt.sum()) \
+            - np.repeat(np.cumsum(cnt) - cnt, cnt)
+        x, y = px[pi[owner]], py[pi[owner]]
+        ay, by = self.ay[e], self.by[e]
+        crosses = (ay > y) != (by > y)
+        dy = np.where(by != ay, by - ay, 1.0)
+        xc = self.ax[e] + (y - ay) * (self.bx[e] - self.ax[e]) / dy
+        hits = np.bincount(owner[crosses & (xc > x)], minlength=len(pi))
+        odd = hits % 2 == 1
+        return pi[odd], zi[odd]
+
+
+# =============================================================
+# DISTÂNCIAS E VERIFICAÇÃO
+# =============================================================
+def check(df_res, zones, clearance=1.0, index=None):
+    """
+    Interferência dos troços livre (X1-X2) e selado (X2-X3) com as zonas.
+
+    clearance -> afastamento mínimo (m) das zonas sem valor próprio
+    index     -> ZoneIndex já construído (None = construído aqui, com
+                 células à escala dos troços)
+
+    Devolve dict com "violations" (uma linha por troço x zona com
+    distância < afastamento; distância <= TOUCH_TOL = intersecção ou
+    contacto, violação mesmo com afastamento 0) e "per_anchor"
+    (Anchor, Violations, Min distance (m), Zone Check).
+    """
+    n = len(df_res)
+    anchors = df_res["Anchor"].to_numpy() if n else np.array([], dtype=int)
+    empty = {
+        "violations": pd.DataFrame(columns=VIOLATION_COLUMNS),
+        "per_anchor": pd.DataFrame({"Anchor": anchors, "Violations": 0,
+                                    "Min distance (m)": np.nan, "Zone Check": "OK"}),
+    }
+    if not zones or not n:
+        return empty
+
+    c_zone = np.array([clearance if z.get("clearance") is None else z["clearance"]
+                       for z in zones], dtype=float)
+
+    col = lambda c: df_res[c].to_numpy(float)  # noqa: E731
+    px = np.concatenate([col("X1"), col("X2")])
+    py = np.concatenate([col("Y1"), col("Y2")])
+    qx = np.concatenate([col("X2"), col("X3")])
+    qy = np.concatenate([col("Y2"), col("Y3")])
+
+    ux, uy = qx - px, qy - py
+    L = np.hypot(ux, uy)
+    if index is None:
+        # células da ordem de grandeza dos troços (poucas por consulta)
+        index = ZoneIndex(zones, cell=max(float(np.median(L)) / 4, float(c_zone.max())))
+
+    pad = float(c_zone.max())
+    si, ei = index.near(px, py, qx, qy, pad)
+
+    # descarta os lados cujo ponto médio fica longe da recta do troço
+    mx = (index.ax[ei] + index.bx[ei]) / 2
+    my = (index.ay[ei] + index.by[ei]) / 2
+    half = np.hypot(index.bx[ei] - index.ax[ei], index.by[ei] - index.ay[ei]) / 2
+    Ls = L[si]
+    off = np.abs(ux[si] * (my - py[si]) - uy[si] * (mx - px[si])) / np.where(Ls > 0, Ls, 1.0)
+    keep = (Ls == 0) | (off <= pad + half)
+    si, ei = si[keep], ei[keep]
+
+    P = np.column_stack([px[si], py[si]])
+    Q = np.column_stack([qx[si], qy[si]])
+    A = np.column_stack([index.ax[ei], index.ay[ei]])
+    B = np.column_stack([index.bx[ei], index.by[ei]])
+    # cruzamentos a 0 exacto (o ponto de maior aproximação dá ~1e-16)
+    d = np.where(segments_cross(P, Q, A, B), 0.0, segment_distance(P, Q, A, B))
+
+    # mínimo por (segmento, zona): os pares vêm ordenados por (segmento,
+    # lado) e os lados de cada zona são contíguos
+    key = si.astype(np.int64) * len(zones) + index.zone[ei]
+    if len(key):
+        first = np.flatnonzero(np.concatenate([[True], key[1:] != key[:-1]]))
+        key, d = key[first], np.minimum.reduceat(d, first)
+
+    # troço totalmente dentro de um polígono: a origem está no interior
+    pi, pz = index.inside(px, py)
+    if len(pi):
+        key = np.concatenate([key, pi.astype(np.int64) * len(zones) + pz])
+        d = np.concatenate([d, np.zeros(len(pi))])
+        order = np.lexsort((d, key))
+        key, d = key[order], d[order]
+        first = np.concatenate([[True], key[1:] != key[:-1]])
+        key, d = key[first], d[first]
+    if not len(key):
+        return empty
+    seg, zone = key // len(zones), key % len(zones)
+
+    bad = (d < c_zone[zone]) | (d <= TOUCH_TOL)
+    seg_b, zone_b, d_b = seg[bad], zone[bad], d[bad]
+    # por ancoragem, troço livre antes do selado, mais próximas primeiro
+    order = np.lexsort((d_b, seg_b >= n, seg_b % n))
+    seg_b, zone_b, d_b = seg_b[order], zone_b[order], d_b[order]
+    violations = pd.DataFrame({
+        "Anchor": anchors[seg_b % n],
+        "Part": np.where(seg_b < n, "Free", "Bond"),
+        "Zone": index.names[zone_b],
+        "Distance (m)": np.round(d_b, 3),
+        "Clearance (m)": c_zone[zone_b],
+        "Status": np.where(d_b <= TOUCH_TOL, "INTERSECTS", "CLEARANCE"),
+    })
+
+    a = seg % n
+    min_d = np.full(n, np.inf)
+    np.minimum.at(min_d, a, d)
+    n_bad = np.bincount(seg_b % n, minlength=n)
+    per_anchor = pd.DataFrame({
+        "Anchor": anchors,
+        "Violations": n_bad,
+        "Min distance (m)": np.where(np.isfinite(min_d), np.round(min_d, 3), np.nan),
+        "Zone Check": np.where(n_bad > 0, "FAIL", "OK"),
+    })
+    return {"violations": violations, "per_anchor": per_anchor}
@@ -0,0 +1,206 @@
+"""
+Vista interactiva da geometria, desenhada no browser (Vega-Lite).
+
+O servidor só envia tabelas compactas (float32): um segmento por troço
+livre/selado de cada ancoragem com P_block e R_bond, e os segmentos de
+parede, escavação, estratigrafia e sondagens. Zoom/arrastar e a
+informação ao passar o rato são tratados no cliente, por isso o rerun
+não tem custo de desenho e milhares de ancoragens continuam navegáveis.
+
+    st.vega_lite_chart(geoview.spec(df_res, geometry))
+"""
+import numpy as np
+import pandas as pd
+
+WIDTH = 700
+MAX_HEIGHT = 700
+PART_COLORS = {"Free": "#1f77b4", "Bond": "#2ca02c"}
+STATUS_COLORS = {"OK": "#2ca02c", "FAIL": "#d62728"}
+
+
+def anchor_segments(df_res):
+    """Duas linhas por ancoragem (troço livre e selado) com os resultados."""
+    n = len(df_res)
+    f32 = lambda c: df_res[c].to_numpy(dtype=np.float32)  # noqa: E731
+    ok = (df_res["Block Check"].to_numpy() == "OK") & (df_res["Bond Check"].to_numpy() == "OK")
+    common = {
+        "Anchor": np.tile(df_res["Anchor"].to_numpy(dtype=np.int32), 2),
+        "P_block": np.tile(f32("P_block (kN)"), 2),
+        "R_bond": np.tile(f32("Bond Resistance (kN)"), 2),
+        "Pmax": np.tile(f32("Pmax (kN)"), 2),
+        "Status": np.tile(np.where(ok, "OK", "FAIL"), 2),
+    }
+    return pd.DataFrame({
+        "Part": np.repeat(["Free", "Bond"], n),
+        "x": np.concatenate([f32("X1"), f32("X2")]),
+        "y": np.concatenate([f32("Y1"), f32("Y2")]),
+        "x2": np.concatenate([f32("X2"), f32("X3")]),
+        "y2": np.concatenate([f32("Y2"), f32("Y3")]),
+        "Length": np.concatenate([f32("L_free (m)"), f32("L_bond (m)")]),
+        **common,
+    })
+
+
+def site_segments(geometry):
+    """
+    Parede, escavação, camadas, sondagens, zonas de exclusão e plano de
+    Kranz como segmentos (kind, label, x, y, x2, y2).
+    """
+    x_ref = geometry["x_ref"]
+    y_excav, y_wall = geometry["y_excav"], geometry["y_wall"]
+    rows = [
+        ("Wall", "", x_ref, y_excav, x_ref, y_wall),
+        ("Excavation", "", x_ref, y_excav, x_ref - geometry["L_excav"], y_excav),
+    ]
+    for lay in geometry["stratigraphy"]:
+        rows.append(("Layer", f"{lay['name']} ({lay['y']:.2f} m)",
+                     x_ref, lay["y"], x_ref + lay.get("L", 5.0), lay["y"]))
+    bhs = [{"id": geometry["borehole_id"], "x": geometry["borehole_x"],
+            "stratigraphy": []}] + list(geometry.get("boreholes", []))
+    for b in bhs:
+        rows.append(("Borehole", str(b["id"]), b["x"], y_excav - 3, b["x"], y_wall))
+        for lay in b["stratigraphy"]:
+            rows.append(("Borehole layer", str(lay["name"]),
+                         b["x"] - 0.5, lay["y"], b["x"] + 0.5, lay["y"]))
+    for z in geometry.get("zones") or []:
+        p = z["points"] + (z["points"][:1] if z["closed"] else [])
+        for (xa, ya), (xb, yb) in zip(p[:-1], p[1:]):
+            rows.append(("Zone", z["name"], xa, ya, xb, yb))
+    kr = geometry.get("kranz")
+    if kr:
+        label = f"FS = {kr['FS']:.2f}"
+        for (xa, ya), (xb, yb) in zip(kr["points"][:-1], kr["points"][1:]):
+            rows.append(("Kranz", label, xa, ya, xb, yb))
+    df = pd.DataFrame(rows, columns=["kind", "label", "x", "y", "x2", "y2"])
+    for c in ("x", "y", "x2", "y2"):
+        df[c] = df[c].astype(np.float32)
+    return df
+
+
+def _frame(anchors, site, pad=0.05):
+    """Domínios x/y com a mesma escala nos dois eixos e o tamanho do gráfico."""
+    xs = np.concatenate([anchors[["x", "x2"]].to_numpy().ravel(),
+                         site[["x", "x2"]].to_numpy().ravel()])
+    ys = np.concatenate([anchors[["y", "y2"]].to_numpy().ravel(),
+                         site[["y", "y2"]].to_numpy().ravel()])
+    x0, x1 = float(xs.min()), float(xs.max())
+    y0, y1 = float(ys.min()), float(ys.max())
+    dx = max(x1 - x0, 1.0) * (1 + 2 * pad)
+    dy = max(y1 - y0, 1.0) * (1 + 2 * pad)
+    cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+
+    scale = WIDTH / dx  # px por metro
+    if dy * scale > MAX_HEIGHT:
+        scale = MAX_HEIGHT / dy
+    width, height = int(dx * scale), int(dy * scale)
+    return ([cx - dx / 2, cx + dx / 2], [cy - dy / 2, cy + dy / 2], width, height)
+
+
+def spec(df_res, geometry, labels_max=200):
+    """
+    Especificação Vega-Lite (com os dados em "datasets") para st.vega_lite_chart.
+
+    labels_max -> acima deste número de ancoragens os números não são
+                  desenhados (continuam disponíveis ao passar o rato)
+    """
+    anchors = anchor_segments(df_res)
+    site = site_segments(geometry)
+    xdom, ydom, width, height = _frame(anchors, site)
+
+    x = {"field": "x", "type": "quantitative", "title": "Horizontal coordinate (m)",
+         "scale": {"domain": xdom}}
+    y = {"field": "y", "type": "quantitative", "title": "Elevation (m)",
+         "scale": {"domain": ydom}}
+    seg = {"x": x, "y": y, "x2": {"field": "x2"}, "y2": {"field": "y2"}}
+    tooltip = [
+        {"field": "Anchor", "type": "quantitative"},
+        {"field": "Part", "type": "nominal"},
+        {"field": "Length", "type": "quantitative", "format": ".2f", "title": "Length (m)"},
+        {"field": "P_block", "type": "quantitative", "format": ".1f", "title": "P_block (kN)"},
+        {"field": "R_bond", "type": "quantitative", "format": ".1f", "title": "R_bond (kN)"},
+        {"field": "Pmax", "type": "quantitative", "format": ".1f", "title": "Pmax (kN)"},
+        {"field": "Status", "type": "nominal"},
+    ]
+
+    layers = [
+        {
+            "data": {"name": "site"},
+            "transform": [{"filter": "indexof(['Wall', 'Excavation', 'Borehole layer'], datum.kind) >= 0"}],
+            "mark": {"type": "rule", "color": "black", "strokeWidth": 2},
+            "encoding": seg,
+        },
+        {
+            "data": {"name": "site"},
+            "transform": [{"filter": "datum.kind == 'Layer'"}],
+            "mark": {"type": "rule", "color": "gray", "strokeDash": [2, 2]},
+            "encoding": {**seg, "tooltip": [{"field": "label", "title": "Layer"}]},
+        },
+        {
+            "data": {"name": "site"},
+            "transform": [{"filter": "datum.kind == 'Borehole'"}],
+            "mark": {"type": "rule", "color": "red", "strokeDash": [6, 4]},
+            "encoding": {**seg, "tooltip": [{"field": "label", "title": "Borehole"}]},
+        },
+        {
+            "data": {"name": "site"},
+            "transform": [{"filter": "datum.kind == 'Borehole'"}],
+            "mark": {"type": "text", "color": "red", "dy": -8},
+            "encoding": {"x": x, "y": {**y, "field": "y2"}, "text": {"field": "label"}},
+        },
+        {
+            "data": {"name": "site"},
+            "transform": [{"filter": "datum.kind == 'Zone'"}],
+            "mark": {"type": "rule", "color": "#8c564b", "strokeWidth": 2},
+            "encoding": {**seg, "tooltip": [{"field": "label", "title": "Exclusion zone"}]},
+        },
+        {
+            "data": {"name": "site"},
+            "transform": [{"filter": "datum.kind == 'Kranz'"}],
+            "mark": {"type": "rule", "color": "#9467bd", "strokeWidth": 2,
+                     "strokeDash": [8, 3, 2, 3]},
+            "encoding": {**seg, "tooltip": [{"field": "label", "title": "Kranz plane"}]},
+        },
+        {
+            "data": {"name": "anchors"},
+            "params": [{"name": "view", "select": "interval", "bind": "scales"}],
+            "mark": {"type": "rule", "strokeWidth": 2},
+            "encoding": {
+                **seg,
+                "color": {"field": "Part", "type": "nominal",
+                          "scale": {"domain": list(PART_COLORS),
+                                    "range": list(PART_COLORS.values())}},
+                "strokeDash": {"field": "Part", "type": "nominal",
+                               "scale": {"domain": ["Free", "Bond"],
+                                         "range": [[1, 0], [6, 3]]},
+                               "legend": None},
+                "tooltip": tooltip,
+            },
+        },
+        {
+            "data": {"name": "anchors"},
+            "transform": [{"filter": "datum.Part == 'Free'"}],
+            "mark": {"type": "point", "filled": True, "size": 40},
+            "encoding": {
+                "x": x, "y": y,
+                "fill": {"field": "Status", "type": "nominal",
+                         "scale": {"domain": list(STATUS_COLORS),
+                                   "range": list(STATUS_COLORS.values())}},
+                "tooltip": tooltip,
+            },
+        },
+    ]
+    if len(df_res) <= labels_max:
+        layers.append({
+            "data": {"name": "anchors"},
+            "transform": [{"filter": "datum.Part == 'Free'"}],
+            "mark": {"type": "text", "dx": -10, "align": "right", "fontSize": 10},
+            "encoding": {"x": x, "y": y, "text": {"field": "Anchor"}},
+        })
+
+    return {
+        "width": width,
+        "height": height,
+        "datasets": {"anchors": anchors, "site": site},
+        "layer": layers,
+        "resolve": {"scale": {"color": "independent", "fill": "independent"}},
+    }
@@ -0,0 +1,185 @@
+"""
+Expansão 3D ao longo da parede e efeito de grupo nas selagens.
+
+As ancoragens da secção repetem-se ao longo da parede (eixo z) a cada
+afast, de z = 0 até ao comprimento da parede; com `stagger` os níveis
+alternados ficam desfasados de afast / 2 (disposição em quincôncio).
+Cada selagem é um cilindro de eixo X2-X3 e raio r = drill_mm / 2000.
+
+Efeito de grupo (modelo simplificado de sobreposição das zonas de
+influência): cada selagem mobiliza o terreno num cilindro de raio
+R = influence · D / 2 em torno do eixo. Em cada ponto de amostragem do
+eixo, o terreno partilhado com uma selagem vizinha à distância d é a
+lente de intersecção dos dois círculos de raio R, e é repartido entre as
+duas:
+
+    f(d) = [2R² acos(d / 2R) - (d / 2) √(4R² - d²)] / (π R²)     (d < 2R)
+    perda(ponto) = min(Σ_vizinhas f / 2, reduction_max)
+    η = 1 - média da perda ao longo da selagem
+    R_bond,grupo = η · R_bond
+
+apply() passa o η mínimo de cada ancoragem para df_res (R_bond reduzido
+e Bond Check recalculado), que é o que a página usa nas verificações.
+
+As vizinhas são procuradas numa grelha 3D (spatial.BoxGrid) com as caixas
+dos eixos alargadas de R. Como a secção se repete, a geometria de um par
+só depende de (ancoragem, vizinha, Δz): as distâncias entre pontos e
+eixos são calculadas uma vez por combinação distinta, em blocos.
+"""
+import numpy as np
+import pandas as pd
+
+from anchorage.spatial import BoxGrid, segment_distance
+
+GROUP_DEFAULTS = {
+    "influence": 4.0,       # espaçamento entre eixos / D abaixo do qual há interacção
+    "samples": 11,          # pontos por selagem
+    "reduction_max": 0.5,   # perda máxima num ponto
+}
+MAX_CHUNK = 2_000_000
+
+
+def expand(df_res, afast, wall_length, stagger=False):
+    """
+    Instâncias 3D das selagens (x, y = cota, z = ao longo da parede).
+
+    Devolve dict com "anchor" (índice na secção), "z", "p0", "p1"
+    (extremos do eixo, (m, 3)) e "r" (raio, m).
+    """
+    if not afast > 0:
+        raise ValueError(f"anchor spacing must be positive (afast = {afast})")
+    n = len(df_res)
+    n_pos = int(np.floor(wall_length / afast + 1e-9)) + 1
+    shift = np.zeros(n)
+    if stagger:
+        _, level = np.unique(np.round(df_res["Y1"].to_numpy(float), 3), return_inverse=True)
+        shift = (level % 2) * afast / 2
+
+    a = np.repeat(np.arange(n), n_pos)
+    z = np.tile(np.arange(n_pos) * afast, n) + shift[a]
+    keep = z <= wall_length + 1e-9
+    a, z = a[keep], z[keep]
+
+    col = lambda c: df_res[c].to_numpy(float)[a]  # noqa: E731
+    return {
+        "anchor": a,
+        "z": z,
+        "p0": np.column_stack([col("X2"), col("Y2"), z]),
+        "p1": np.column_stack([col("X3"), col("Y3"), z]),
+        "r": col("drill_mm") / 2000,
+    }
+
+
+def lens_fraction(d, R):
+    """Área de intersecção de dois círculos de raio R a distância d, em fracção de π R²."""
+    x = np.clip(d / (2 * R), 0.0, 1.0)
+    A = 2 * R ** 2 * np.arccos(x) - d * R * np.sqrt(np.maximum(1 - x ** 2, 0.0))
+    return np.where(d < 2 * R, A / (np.pi * R ** 2), 0.0)
+
+
+def evaluate(df_res, afast, wall_length, stagger=False, params=None,
+             max_chunk=MAX_CHUNK):
+    """
+    Efeito de grupo em todas as selagens da parede.
+
+    df_res      -> resultados da secção (X2..Y3, drill_mm, P_block, R_bond)
+    afast       -> espaçamento ao longo da parede (m)
+    wall_length -> comprimento da parede (m)
+    params      -> GROUP_DEFAULTS alterados
+
+    Devolve dict com "per_anchor" (η mínimo e médio, menor distância entre
+    eixos, vizinhas, R_bond de grupo e verificação), "instances" (número de
+    selagens), "pairs" (pares que interagem) e "eta" (η por instância).
+    """
+    p = {**GROUP_DEFAULTS, **(params or {})}
+    inst = expand(df_res, afast, wall_length, stagger)
+    m = len(inst["anchor"])
+    R = p["influence"] * inst["r"]  # = influence · D / 2
+    S = int(p["samples"])
+
+    lo = np.minimum(inst["p0"], inst["p1"]) - R[:, None]
+    hi = np.maximum(inst["p0"], inst["p1"]) + R[:, None]
+    L = np.linalg.norm(inst["p1"] - inst["p0"], axis=1)
+    # células alongadas no plano da secção e finas ao longo da parede
+    c_xy = max(float(np.median(L)) / 4 if m else 1.0, 1e-3)
+    c_z = max(2 * float(R.max(initial=0.0)), 1e-3)
+    qi, it = BoxGrid(lo, hi, [c_xy, c_xy, c_z]).query(lo, hi)
+    keep = qi != it
+    qi, it = qi[keep], it[keep]
+
+    # a geometria de um par só depende de (ancoragem i, ancoragem j, Δz):
+    # distâncias e perdas calculadas uma vez por combinação distinta
+    a = inst["anchor"]
+    n = len(df_res)
+    dz = np.round((inst["z"][it] - inst["z"][qi]) * 1e6).astype(np.int64)
+    dz -= dz.min(initial=0)
+    key = (a[qi].astype(np.int64) * n + a[it]) * (int(dz.max(initial=0)) + 1) + dz
+    _, first, inv = np.unique(key, return_index=True, return_inverse=True)
+    ui, uj = qi[first], it[first]
+    p0j, p1j = inst["p0"][uj], inst["p1"][uj]
+
+    d_axis = segment_distance(inst["p0"][ui], inst["p1"][ui], p0j, p1j)
+    Ru = (R[ui] + R[uj]) / 2
+    near_u = d_axis < 2 * Ru
+
+    # perda em cada ponto de amostragem (combinações distintas, em blocos)
+    t = (np.arange(S) + 0.5) / S
+    f_u = np.zeros((len(ui), S))
+    idx = np.flatnonzero(near_u)
+    step = max(1, max_chunk // max(S, 1))
+    for k in range(0, len(idx), step):
+        c = idx[k:k + step]
+        i = ui[c]
+        pts = inst["p0"][i, None, :] + t[None, :, None] * (inst["p1"] - inst["p0"])[i, None, :]
+        d = segment_distance(
+            pts.reshape(-1, 3), pts.reshape(-1, 3),
+            np.repeat(p0j[c], S, axis=0), np.repeat(p1j[c], S, axis=0),
+        )
+        f_u[c] = (lens_fraction(d, np.repeat(Ru[c], S)) / 2).reshape(-1, S)
+
+    near = near_u[inv]
+    qi, it, inv = qi[near], it[near], inv[near]
+    d_axis = d_axis[inv]
+    loss = np.zeros((m, S))
+    np.add.at(loss, qi, f_u[inv])
+    eta = 1 - np.minimum(loss, p["reduction_max"]).mean(axis=1)
+
+    eta_min = np.ones(n)
+    np.minimum.at(eta_min, a, eta)
+    eta_mean = np.bincount(a, weights=eta, minlength=n) / np.maximum(np.bincount(a, minlength=n), 1)
+    d_min = np.full(n, np.inf)
+    np.minimum.at(d_min, a[qi], d_axis)
+    neigh = np.bincount(qi, minlength=m)
+    neigh_max = np.zeros(n, dtype=int)
+    np.maximum.at(neigh_max, a, neigh)
+
+    R_bond = df_res["Bond Resistance (kN)"].to_numpy(float)
+    R_group = R_bond * eta_min
+    P_block = df_res["P_block (kN)"].to_numpy(float)
+    per_anchor = pd.DataFrame({
+        "Anchor": df_res["Anchor"].to_numpy(),
+        "Instances": np.bincount(a, minlength=n),
+        "Neighbours (max)": neigh_max,
+        "Min axis distance (m)": np.where(np.isfinite(d_min), np.round(d_min, 3), np.nan),
+        "eta min": np.round(eta_min, 3),
+        "eta mean": np.round(eta_mean, 3),
+        "Bond Resistance (kN)": R_bond,
+        "Group R_bond (kN)": np.round(R_group, 2),
+        "P_block (kN)": P_block,
+        "Group Check": np.where(R_group > P_block, "OK", "FAIL"),
+    })
+    return {"per_anchor": per_anchor, "instances": m, "pairs": len(qi) // 2, "eta": eta}
+
+
+def apply(df_res, result):
+    """
+    df_res com o efeito de grupo: coluna "Group eta" (η mínimo), R_bond
+    reduzido e Bond Check igual ao Group Check. Não altera df_res.
+    """
+    ga = result["per_anchor"]
+    out = df_res.copy()
+    out["Bond Resistance (kN)"] = ga["Group R_bond (kN)"].to_numpy()
+    out["Bond Check"] = ga["Group Check"].to_numpy()
+    out.insert(out.columns.get_loc("Bond Resistance (kN)"), "Group eta",
+               ga["eta min"].to_numpy())
+    return out
@@ -0,0 +1,390 @@
+"""
+Histórico de versões de uma secção (data, stratigraphy e resultados).
+
+Os históricos ficam em HISTORY_DIR (dados do utilizador, persistente e
+privado, ver diskcache.private_dir), num directório por projecto e num
+ficheiro JSON lines por secção, só com acrescentos: uma linha por versão
+com o delta em relação à anterior.
+
+Os registos são identificados por um id estável: o campo "id" de cada
+ancoragem (anchor_ids; os resultados herdam o id da ancoragem na mesma
+posição) e a posição de cada camada. Os deltas são por registo e por
+campo:
+
+    {"n": número de registos,
+     "set": {id: {campo: valor novo, ...}, ...},
+     "del": {id: [campos removidos], ...},
+     "drop": [ids removidos],            (se houver)
+     "order": [ids]}                     (se a ordem não for a esperada)
+
+pelo que uma ancoragem que não mudou não ocupa espaço e apagar uma
+ancoragem não altera as seguintes. Sem "order" a ordem é a anterior sem
+as removidas, seguida das novas pela ordem de "set". A cada KEYFRAME
+versões guarda-se a versão completa (delta contra nada), o que limita a
+reconstrução a KEYFRAME deltas.
+
+diff(a, b) compara as verificações e utilizações de duas versões a partir
+dos resultados guardados: as ancoragens candidatas são as que aparecem
+nos deltas de resultados entre a e b, e só essas são comparadas (nada é
+recalculado).
+
+    U_block = P_block / Pmax
+    U_bond  = P_block / R_bond
+"""
+import datetime
+import hashlib
+import json
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from anchorage.diskcache import app_dir, private_dir
+
+DEFAULT_DIR = os.environ.get("ANCHORAGE_HISTORY_DIR") or app_dir("history", data=True)
+KEYFRAME = 25
+PARTS = ("data", "stratigraphy", "results")
+DIFF_COLUMNS = [
+    "Anchor", "Id", "Status",
+    "Block Check (from)", "Block Check (to)",
+    "Bond Check (from)", "Bond Check (to)",
+    "U_block (from)", "U_block (to)",
+    "U_bond (from)", "U_bond (to)",
+    "Check changed",
+]
+
+
+def _default(v):
+    if hasattr(v, "tolist"):  # numpy / pandas
+        return v.tolist()
+    return str(v)
+
+
+def _plain(v):
+    """
+    Cópia em tipos JSON (numpy -> Python, tuplos -> listas), igual ao que
+    se lê do ficheiro; a ida e volta pelo módulo json é feita em C.
+    """
+    return json.loads(json.dumps(v, default=_default))
+
+
+def _slug(name):
+    """Nome de ficheiro legível e único para um projecto / secção."""
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "_", str(name)).strip("_")[:40] or "section"
+    digest = hashlib.sha256(json.dumps([str(name)]).encode("utf-8")).hexdigest()
+    return f"{slug}-{digest[:8]}"
+
+
+def anchor_ids(ids):
+    """
+    Ids estáveis das ancoragens: mantém os ids dados (não vazios e únicos)
+    e preenche os restantes com "A<k>", o menor k livre a partir da posição.
+    """
+    out, used = [], set()
+    for v in ids:
+        v = "" if v is None or v != v else str(v).strip()  # None / NaN
+        out.append(v if v and v not in used else None)
+        used.add(v)
+    for i, v in enumerate(out):
+        if v is None:
+            k = i + 1
+            while f"A{k}" in used:
+                k += 1
+            out[i] = f"A{k}"
+            used.add(out[i])
+    return out
+
+
+def _expected_order(old, delta):
+    drop = set(delta.get("drop", ()))
+    return [k for k in old if k not in drop] + [k for k in delta["set"] if k not in old]
+
+
+def records_delta(old, new):
+    """Delta por registo (id) e por campo entre dois dicts {id: registo}."""
+    out = {"n": len(new), "set": {}, "del": {}}
+    for k, rec in new.items():
+        prev = old.get(k, {})
+        if rec == prev:
+            continue
+        changed = {f: v for f, v in rec.items() if f not in prev or prev[f] != v}
+        if changed:
+            out["set"][k] = changed
+        gone = [f for f in prev if f not in rec]
+        if gone:
+            out["del"][k] = gone
+    drop = [k for k in old if k not in new]
+    if drop:
+        out["drop"] = drop
+    if list(new) != _expected_order(old, out):
+        out["order"] = list(new)
+    return out
+
+
+def apply_delta(records, delta):
+    """Aplica records_delta sem alterar `records` (os dicts mudados são novos)."""
+    drop = set(delta.get("drop", ()))
+    recs = {k: v for k, v in records.items() if k not in drop}
+    for k, changed in delta["set"].items():
+        recs[k] = {**recs.get(k, {}), **changed}
+    for k, gone in delta["del"].items():
+        recs[k] = {f: v for f, v in recs[k].items() if f not in gone}
+    order = delta["order"] if "order" in delta else _expected_order(records, delta)
+    return {k: recs.get(k, {}) for k in order}
+
+
+def touched(delta):
+    """Ids de registos alterados, acrescentados ou removidos por um delta."""
+    return set(delta["set"]) | set(delta["del"]) | set(delta.get("drop", ()))
+
+
+def _unchanged(delta):
+    return not (delta["set"] or delta["del"] or "drop" in delta or "order" in delta)
+
+
+def _utilizations(results, ids):
+    """(check de bloco, check de selagem, U_block, U_bond) das ancoragens ids."""
+    rows = [results.get(k, {}) for k in ids]
+    col = lambda k: np.array([r.get(k, np.nan) for r in rows], dtype=float)  # noqa: E731
+    P = col("P_block (kN)")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        Ub = P / col("Pmax (kN)")
+        Ur = P / col("Bond Resistance (kN)")
+    return (
+        [r.get("Block Check") for r in rows],
+        [r.get("Bond Check") for r in rows],
+        Ub, Ur,
+    )
+
+
+class History:
+    """
+    section -> nome da secção (define o ficheiro do histórico)
+    project -> projecto (directório próprio; secções com o mesmo nome em
+               projectos diferentes têm históricos separados)
+    root    -> directório dos históricos (criado, privado, se não existir)
+    """
+
+    def __init__(self, section, project="", root=DEFAULT_DIR):
+        self.section = section
+        self.project = project
+        private_dir(root)
+        folder = private_dir(os.path.join(root, _slug(project or "default")))
+        self.path = os.path.join(folder, f"{_slug(section)}.jsonl")
+        # instância partilhada entre sessões (st.cache_resource): leituras
+        # e commit sob o mesmo lock, reentrante (diff -> changed_anchors)
+        self._lock = threading.RLock()
+        self._entries = []
+        self._read_bytes = 0
+        self._stat = None  # (tamanho, mtime) do ficheiro na última leitura
+        self._states = {}  # versão -> registos por id reconstruídos (poucas entradas)
+        self._load()
+
+    # ---------------------------------------------------------
+    # FICHEIRO
+    # ---------------------------------------------------------
+    def _load(self):
+        """
+        Lê as linhas acrescentadas desde a última leitura (outras sessões ou
+        processos). Se o ficheiro encolheu ou mudou sem crescer (reescrito),
+        relê tudo. Chamar com o lock.
+        """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            st = None
+        stat = (st.st_size, st.st_mtime_ns) if st else None
+        if stat == self._stat:
+            return
+        self._stat = stat
+        size = stat[0] if stat else 0
+        if size <= self._read_bytes:
+            self._entries, self._states, self._read_bytes = [], {}, 0
+            if not size:
+                return
+        with open(self.path, "rb") as fh:
+            fh.seek(self._read_bytes)
+            chunk = fh.read()
+        end = chunk.rfind(b"\n") + 1  # ignora uma linha ainda incompleta
+        for line in chunk[:end].splitlines():
+            if line.strip():
+                self._entries.append(json.loads(line))
+        self._read_bytes += end
+
+    def __len__(self):
+        with self._lock:
+            self._load()
+            return len(self._entries)
+
+    @property
+    def head(self):
+        """Número da última versão (-1 sem versões)."""
+        return len(self) - 1
+
+    # ---------------------------------------------------------
+    # VERSÕES
+    # ---------------------------------------------------------
+    def _state(self, version):
+        """
+        {"data", "stratigraphy", "results"} como dicts {id: registo}.
+        Chamar com o lock.
+        """
+        if not 0 <= version < len(self._entries):
+            raise IndexError(f"no version {version}")
+        if version in self._states:
+            return self._states[version]
+
+        start = version - version % KEYFRAME
+        for v in range(version, start, -1):  # estado intermédio já em memória
+            if v in self._states:
+                start = v
+                break
+        state = self._states.get(start, {p: {} for p in PARTS})
+        first = start + 1 if start in self._states else start
+        for v in range(first, version + 1):
+            e = self._entries[v]
+            state = {p: apply_delta(state[p], e[p]) for p in PARTS}
+
+        if len(self._states) >= 8:
+            head = len(self._entries) - 1
+            self._states.pop(min(k for k in self._states if k != head))
+        self._states[version] = state
+        return state
+
+    def snapshot(self, version):
+        """{"data", "stratigraphy", "results"} (listas de dicts) de uma versão."""
+        with self._lock:
+            self._load()
+            state = self._state(version)
+        snap = {p: list(state[p].values()) for p in PARTS}
+        # o número da ancoragem é a posição (não é guardado)
+        snap["results"] = [{"Anchor": i + 1, **r} for i, r in enumerate(snap["results"])]
+        return snap
+
+    def commit(self, data, stratigraphy, df_res, label=""):
+        """
+        Guarda uma versão nova (delta contra a última). As ancoragens sem
+        "id" recebem os de anchor_ids; df_res segue a ordem de data.
+        Devolve o número da versão; se nada mudou devolve a última sem escrever.
+        """
+        data = _plain(list(data))
+        ids = anchor_ids([d.get("id") for d in data])
+        # "Anchor" é a posição: guardá-la mudaria todas as seguintes ao apagar uma
+        results = _plain(df_res.drop(columns="Anchor", errors="ignore").to_dict("records"))
+        state = {
+            "data": {k: {**d, "id": k} for k, d in zip(ids, data)},
+            "stratigraphy": {str(i): r for i, r in enumerate(_plain(list(stratigraphy)))},
+            "results": dict(zip(ids, results)),
+        }
+        with self._lock:
+            self._load()
+            version = len(self._entries)
+            prev = self._state(version - 1) if version else {p: {} for p in PARTS}
+            deltas = {p: records_delta(prev[p], state[p]) for p in PARTS}
+            if version and all(_unchanged(d) for d in deltas.values()):
+                return version - 1
+
+            full = version % KEYFRAME == 0
+            if full:
+                deltas = {p: records_delta({}, state[p]) for p in PARTS}
+            entry = {
+                "version": version,
+                "time": datetime.datetime.now().isoformat(timespec="seconds"),
+                "label": str(label),
+                "full": full,
+                **deltas,
+            }
+            line = (json.dumps(entry, separators=(",", ":")) + "\n").encode("utf-8")
+            with open(self.path, "ab") as fh:
+                fh.write(line)
+            self._entries.append(entry)
+            self._read_bytes += len(line)
+            self._states[version] = state
+            st = os.stat(self.path)
+            if st.st_size == self._read_bytes:  # sem escritas de outros pelo meio
+                self._stat = (st.st_size, st.st_mtime_ns)
+        return version
+
+    def versions(self):
+        """Tabela das versões (anchors alteradas e tamanho do delta)."""
+        with self._lock:
+            self._load()
+            entries = list(self._entries)
+        rows = []
+        for e in entries:
+            d = e["results"]
+            rows.append({
+                "Version": e["version"],
+                "Time": e["time"],
+                "Label": e["label"],
+                "Anchors": d["n"],
+                "Changed anchors": d["n"] if e["full"] else len(touched(d)),
+                "Stored (bytes)": len(json.dumps(e, separators=(",", ":"))),
+            })
+        return pd.DataFrame(rows)
+
+    # ---------------------------------------------------------
+    # DIFF
+    # ---------------------------------------------------------
+    def changed_anchors(self, a, b):
+        """
+        Ids das ancoragens cujos resultados mudaram algures entre a e b,
+        pela ordem da versão b (as removidas no fim, pela ordem de a).
+        """
+        with self._lock:
+            self._load()
+            lo, hi = sorted((a, b))
+            ids = set()
+            for v in range(lo + 1, hi + 1):
+                d = self._entries[v]["results"]
+                if self._entries[v]["full"]:
+                    # versão completa: só conta o que difere da anterior
+                    d = records_delta(self._state(v - 1)["results"], self._state(v)["results"])
+                ids |= touched(d)
+            ra, rb = self._state(a)["results"], self._state(b)["results"]
+        return [k for k in rb if k in ids] + [k for k in ra if k in ids and k not in rb]
+
+    def diff(self, a, b, tol=1e-3):
+        """
+        Ancoragens com Block/Bond Check ou utilização diferentes entre as
+        versões a e b (|ΔU| > tol), identificadas pelo id. Devolve um
+        DataFrame com DIFF_COLUMNS; "Anchor" é o número na versão b (na
+        versão a para as removidas) e "Status" é "changed", "added" ou
+        "removed".
+        """
+        with self._lock:
+            ids = self.changed_anchors(a, b)
+            ra, rb = self._state(a)["results"], self._state(b)["results"]
+        if not ids:
+            return pd.DataFrame(columns=DIFF_COLUMNS)
+        pos_a = {k: i for i, k in enumerate(ra)}
+        pos_b = {k: i for i, k in enumerate(rb)}
+
+        bc_a, rc_a, ub_a, ur_a = _utilizations(ra, ids)
+        bc_b, rc_b, ub_b, ur_b = _utilizations(rb, ids)
+        status = np.array([
+            "added" if k not in ra else "removed" if k not in rb else "changed" for k in ids
+        ])
+        check_changed = (np.array(bc_a, dtype=object) != np.array(bc_b, dtype=object)) \
+            | (np.array(rc_a, dtype=object) != np.array(rc_b, dtype=object))
+        with np.errstate(invalid="ignore"):
+            moved = (np.abs(ub_b - ub_a) > tol) | (np.abs(ur_b - ur_a) > tol)
+        keep = check_changed | moved | (status != "changed")
+
+        df = pd.DataFrame({
+            "Anchor": [pos_b[k] + 1 if k in pos_b else pos_a[k] + 1 for k in ids],
+            "Id": ids,
+            "Status": status,
+            "Block Check (from)": bc_a,
+            "Block Check (to)": bc_b,
+            "Bond Check (from)": rc_a,
+            "Bond Check (to)": rc_b,
+            "U_block (from)": np.round(ub_a, 3),
+            "U_block (to)": np.round(ub_b, 3),
+            "U_bond (from)": np.round(ur_a, 3),
+            "U_bond (to)": np.round(ur_b, 3),
+            "Check changed": check_changed,
+        })
+        return df[keep].reset_index(drop=True)
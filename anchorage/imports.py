@@ -0,0 +1,223 @@
+"""
+Leitura dos ficheiros importados na página (CSV no formato do botão
+"Download ALL (CSV)" e livros Excel com uma folha por secção).
+
+parse_csv devolve {"anchors": [...], "geo": {...}}: as ancoragens válidas
+(dicts com as chaves do CSV) e o geo_json da primeira linha. A página
+guarda o resultado por hash do ficheiro (file_digest) para não voltar a
+ler o CSV em cada rerun.
+
+iter_workbook lê um .xlsx em modo read-only (openpyxl): as linhas de cada
+folha chegam em blocos de CHUNK_ROWS e passam pelas mesmas funções do CSV
+(normalize_columns, anchors_from_frame), sem carregar o livro inteiro. A
+página lista primeiro as folhas (workbook_sheets, sem ler células) e só
+lê a folha escolhida (read_sheet).
+"""
+import hashlib
+import io
+import json
+
+import pandas as pd
+
+COLS_ANCHOR = [
+    "x1", "y1", "angle", "free", "bond", "prestress",
+    "strands", "drill_mm", "alpha", "shear_stress", "fs",
+]
+REQUIRED = ("x1", "y1", "angle", "free", "bond")
+# parâmetros da secção lidos da primeira linha de cada folha
+SECTION_COLS = ("y_wall", "y_excav", "esp", "afast", "a_inf", "a_strand", "delta_l")
+CHUNK_ROWS = 5000
+
+
+def file_digest(raw):
+    """SHA-256 dos bytes carregados."""
+    return hashlib.sha256(raw).hexdigest()
+
+
+def safe_json_load(s):
+    if not isinstance(s, str):
+        return {}
+    s = s.strip()
+    if not s:
+        return {}
+    try:
+        return json.loads(s)
+    except Exception:
+        try:
+            return json.loads(s.replace("'", '"'))
+        except Exception:
+            return {}
+
+
+def geo_json(s):
+    """geo_json de uma linha -> dict com as chaves em minúsculas (como as colunas)."""
+    geo = safe_json_load(s)
+    if not isinstance(geo, dict):
+        return {}
+    return {str(k).lower(): v for k, v in geo.items()}
+
+
+def normalize_columns(df):
+    """Nomes de colunas em minúsculas, sem espaços nos extremos, '_' no meio."""
+    df.columns = (
+        df.columns.astype(str)
+        .str.strip()
+        .str.lower()
+        .str.replace(" ", "_")
+    )
+    return df
+
+
+def _anchor_id(v):
+    """Id da coluna "id" como texto ("3.0" lido como número -> "3")."""
+    if isinstance(v, float) and v.is_integer():
+        v = int(v)
+    return str(v).strip()
+
+
+def anchors_from_frame(df):
+    """
+    Ancoragens válidas (com x1, y1, angle, free, bond) de um DataFrame
+    normalizado; a coluna opcional "id" (id estável do histórico) é mantida.
+    """
+    cols = [c for c in COLS_ANCHOR if c in df.columns]
+    ids = df["id"].tolist() if "id" in df.columns else [None] * len(df)
+    anchors = []
+    for rec, aid in zip(df[cols].to_dict("records"), ids):
+        anchor = {c: float(v) for c, v in rec.items() if not pd.isna(v)}
+        if all(k in anchor for k in REQUIRED):
+            if aid is not None and not pd.isna(aid) and _anchor_id(aid):
+                anchor["id"] = _anchor_id(aid)
+            anchors.append(anchor)
+    return anchors
+
+
+def parse_csv(raw):
+    """
+    raw -> bytes do CSV (UTF-8 ou Latin-1, separador autodetectado)
+    Devolve {"anchors": [...], "geo": dict do geo_json ou {}}.
+    """
+    try:
+        text = raw.decode("utf-8")
+    except UnicodeDecodeError:
+        text = raw.decode("latin-1")
+
+    df = normalize_columns(pd.read_csv(io.StringIO(text), sep=None, engine="python"))
+
+    geo = {}
+    if "geo_json" in df.columns and len(df):
+        geo = geo_json(df["geo_json"].iloc[0])
+    return {"anchors": anchors_from_frame(df), "geo": geo}
+
+
+def export_csv(data, geo):
+    """
+    CSV do botão "Download ALL (CSV)", lido de volta por parse_csv.
+
+    data -> ancoragens (dicts com as chaves de ANCHOR_KEYS e "id")
+    geo  -> parâmetros globais da secção; em colunas e no geo_json, com
+            as chaves em minúsculas como o importador as lê
+    """
+    geo = {str(k).lower(): v for k, v in geo.items()}
+    df = pd.DataFrame([{**d, **geo, "geo_json": json.dumps(geo)} for d in data])
+    return df.to_csv(index=False).encode("utf-8")
+
+
+# =============================================================
+# EXCEL (UMA FOLHA POR SECÇÃO)
+# =============================================================
+def _frames(rows, chunk_rows=CHUNK_ROWS):
+    """
+    Linhas de uma folha (tuplos, a primeira não vazia é o cabeçalho) ->
+    DataFrames normalizados de até chunk_rows linhas, com as colunas das
+    ancoragens convertidas para número (texto inválido -> NaN).
+    """
+    header, buf = None, []
+
+    def frame():
+        df = normalize_columns(pd.DataFrame(buf, columns=header))
+        for c in COLS_ANCHOR:
+            if c in df.columns:
+                df[c] = pd.to_numeric(df[c], errors="coerce")
+        return df
+
+    for row in rows:
+        if all(v is None or (isinstance(v, str) and not v.strip()) for v in row):
+            continue
+        if header is None:
+            header = [str(v) if v is not None else f"col{i}" for i, v in enumerate(row)]
+            continue
+        buf.append(row[:len(header)] + (None,) * (len(header) - len(row)))
+        if len(buf) >= chunk_rows:
+            yield frame()
+            buf = []
+    if buf:
+        yield frame()
+
+
+def _section_geo(df):
+    """geo_json e colunas SECTION_COLS da primeira linha de uma folha."""
+    geo = {}
+    if "geo_json" in df.columns:
+        geo = geo_json(df["geo_json"].iloc[0])
+    for c in SECTION_COLS:
+        if c in df.columns and not pd.isna(df[c].iloc[0]):
+            try:
+                geo.setdefault(c, float(df[c].iloc[0]))
+            except (TypeError, ValueError):
+                pass
+    return geo
+
+
+def _open_workbook(source):
+    import openpyxl
+
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    try:
+        return openpyxl.load_workbook(source, read_only=True, data_only=True)
+    except Exception as e:
+        raise ValueError(f"cannot read workbook: {e}") from e
+
+
+def iter_workbook(source, sheets=None, chunk_rows=CHUNK_ROWS):
+    """
+    Secções de um livro Excel, uma por folha, lidas em streaming.
+
+    source -> caminho ou bytes do .xlsx
+    sheets -> nomes das folhas a ler (None = todas)
+
+    Gera {"name": nome da folha, "anchors": [...], "geo": {...}} por folha,
+    com as ancoragens válidas (mesmas colunas do CSV) e o geo_json /
+    parâmetros da secção da primeira linha. Só a folha corrente fica em
+    memória.
+    """
+    wb = _open_workbook(source)
+    try:
+        for ws in wb.worksheets:
+            if sheets is not None and ws.title not in sheets:
+                continue
+            anchors, geo = [], None
+            for df in _frames(ws.iter_rows(values_only=True), chunk_rows):
+                if geo is None:
+                    geo = _section_geo(df)
+                anchors.extend(anchors_from_frame(df))
+            yield {"name": ws.title, "anchors": anchors, "geo": geo or {}}
+    finally:
+        wb.close()
+
+
+def workbook_sheets(raw):
+    """Nomes das folhas de um .xlsx (só o índice do livro, sem ler células)."""
+    wb = _open_workbook(raw)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+def read_sheet(raw, name):
+    """Secção {"name", "anchors", "geo"} de uma só folha (vazia se não existir)."""
+    for section in iter_workbook(raw, sheets=[name]):
+        return section
+    return {"name": name, "anchors": [], "geo": {}}
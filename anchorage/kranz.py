@@ -0,0 +1,195 @@
+"""
+Estabilidade global do bloco ancorado (método de Kranz, plano profundo).
+
+Cada plano candidato vai do ponto F, na parede a uma profundidade t
+abaixo do fundo da escavação, ao ponto B da selagem de uma ancoragem
+(fracção f entre X2 e X3; f = 0.5 é o ponto médio clássico), e daí
+sobe na vertical até ao terreno (cota y_wall). Equilíbrio do bloco
+(por metro de parede):
+
+    G   peso do bloco
+    Ea  impulso activo na parede, de y_wall a F (reacção da parede)
+    E1  impulso activo no plano vertical por B
+    Q   reacção no plano FB, inclinada de φ da normal, + coesão c·l
+    A   força de ancoragem máxima admissível (direcção da ancoragem)
+
+    U   impulso da água no plano FB (normal ao plano), com nível freático
+
+    x: -A cos α - E1 + Ea - (N + U) sin ϑ + T cos ϑ = 0
+    y:  A sin α - G       + (N + U) cos ϑ + T sin ϑ = 0,   T = N tan φ + c l
+
+Com nível freático, G usa os pesos totais e Ea / E1 incluem a pressão
+da água (soil.active_profile); N é a normal efectiva.
+
+FS = A_poss / A_exist, em que A_exist soma (por metro, projectadas na
+direcção da ancoragem do plano) as forças P_block das ancoragens cujo
+ponto médio da selagem fica dentro do bloco.
+
+Todos os planos (ancoragens x profundidades t x fracções f) são
+avaliados de uma vez, em blocos de planos x grelha de cotas.
+"""
+import numpy as np
+import pandas as pd
+
+from anchorage import soil
+
+PLANE_SAMPLES = 40
+MAX_CHUNK = 4_000_000
+
+
+def candidate_planes(df_res, x_ref, y_excav, toe_depths, fractions):
+    """Pontos F e B de todos os planos candidatos (um dict de arrays)."""
+    n = len(df_res)
+    toe = np.asarray(toe_depths, dtype=float)
+    frac = np.asarray(fractions, dtype=float)
+    A, T, Fr = np.meshgrid(np.arange(n), toe, frac, indexing="ij")
+    A, T, Fr = A.ravel(), T.ravel(), Fr.ravel()
+
+    X2, Y2 = df_res["X2"].to_numpy(float), df_res["Y2"].to_numpy(float)
+    X3, Y3 = df_res["X3"].to_numpy(float), df_res["Y3"].to_numpy(float)
+    return {
+        "anchor": A,
+        "toe_depth": T,
+        "fraction": Fr,
+        "xf": np.full(len(A), float(x_ref)),
+        "yf": y_excav - T,
+        "xb": X2[A] + Fr * (X3[A] - X2[A]),
+        "yb": Y2[A] + Fr * (Y3[A] - Y2[A]),
+    }
+
+
+def _block_weight(xf, yf, xb, yb, prof):
+    """
+    Peso do bloco por metro: Σ largura(y) · γ(y) · dy na grelha de cotas
+    (planos x grelha). A largura cresce linearmente entre as cotas de F e B.
+    """
+    y = prof["y"]
+    ym = (y[1:] + y[:-1]) / 2
+    dz = y[:-1] - y[1:]
+    gamma = (prof["gamma"][1:] + prof["gamma"][:-1]) / 2
+
+    L = (xb - xf)[:, None]
+    lo = np.minimum(yf, yb)[:, None]
+    hi = np.maximum(yf, yb)[:, None]
+    span = np.where(hi > lo, hi - lo, 1.0)
+    # plano horizontal (F e B à mesma cota): largura L logo acima do plano
+    frac = np.where(hi > lo, np.clip((ym[None, :] - lo) / span, 0.0, 1.0), 1.0)
+    w = np.where(ym[None, :] >= lo, L * frac, 0.0)
+    return (w * (gamma * dz)[None, :]).sum(axis=1)
+
+
+def evaluate(df_res, geometry, afast, toe_depths=(0.0, 0.5, 1.0, 1.5, 2.0),
+             fractions=(0.5,), fs_required=1.5, y_water=None, max_chunk=MAX_CHUNK):
+    """
+    Procura o plano profundo condicionante.
+
+    df_res     -> resultados (X2..Y3, P_block, Anchor)
+    geometry   -> dict da página (x_ref, y_wall, y_excav, stratigraphy com
+                  gamma/phi/c por camada)
+    afast      -> espaçamento das ancoragens (m)
+    toe_depths -> profundidades de F abaixo do fundo da escavação (m)
+    fractions  -> posições de B ao longo da selagem (0 = X2, 1 = X3)
+    y_water    -> cota do nível freático (None = sem água)
+
+    Devolve dict com "planes" (todos os planos), "per_anchor" (plano
+    condicionante de cada ancoragem), "governing" (dict do plano com
+    menor FS, incluindo os pontos para desenhar) e "min_fs".
+    """
+    x_ref = float(geometry["x_ref"])
+    y_wall, y_excav = float(geometry["y_wall"]), float(geometry["y_excav"])
+    strat = geometry.get("stratigraphy", [])
+
+    pl = candidate_planes(df_res, x_ref, y_excav, toe_depths, fractions)
+    keep = pl["xb"] > x_ref + 1e-6
+    pl = {k: v[keep] for k, v in pl.items()}
+    if not len(pl["anchor"]):
+        return {"planes": pd.DataFrame(), "per_anchor": pd.DataFrame(),
+                "governing": None, "min_fs": None}
+
+    y_bottom = min(pl["yf"].min(), pl["yb"].min()) - 0.5
+    prof = soil.active_profile(strat, y_wall, y_bottom, y_water=y_water)
+    table = soil.layer_table(strat)
+
+    xf, yf, xb, yb = pl["xf"], pl["yf"], pl["xb"], pl["yb"]
+    L = xb - xf
+    theta = np.arctan2(yb - yf, L)
+    length = np.hypot(L, yb - yf)
+
+    # peso do bloco, em blocos de planos x grelha
+    G = np.empty(len(xf))
+    step = max(1, max_chunk // len(prof["y"]))
+    for i in range(0, len(xf), step):
+        s = slice(i, i + step)
+        G[s] = _block_weight(xf[s], yf[s], xb[s], yb[s], prof)
+
+    Ea = soil.thrust_above(prof, yf)
+    E1 = np.where(yb < y_wall, soil.thrust_above(prof, yb), 0.0)
+
+    # φ e c médios ao longo do plano FB
+    t = (np.arange(PLANE_SAMPLES) + 0.5) / PLANE_SAMPLES
+    ys = yf[:, None] + t[None, :] * (yb - yf)[:, None]
+    _, phi_s, c_s = soil.params_at(table, ys)
+    tan_phi = np.tan(np.radians(phi_s)).mean(axis=1)
+    cl = c_s.mean(axis=1) * length
+    U = np.zeros(len(xf))
+    if y_water is not None:
+        U = (soil.GAMMA_W * np.maximum(y_water - ys, 0.0)).mean(axis=1) * length
+
+    # inclinação de cada ancoragem (|θ|)
+    ang = np.abs(np.arctan2(
+        df_res["Y3"].to_numpy(float) - df_res["Y1"].to_numpy(float),
+        df_res["X3"].to_numpy(float) - df_res["X1"].to_numpy(float),
+    ))
+    alpha = ang[pl["anchor"]]
+
+    a11, a21 = -np.cos(alpha), np.sin(alpha)
+    a12 = -np.sin(theta) + tan_phi * np.cos(theta)
+    a22 = np.cos(theta) + tan_phi * np.sin(theta)
+    r1 = E1 - Ea - cl * np.cos(theta) + U * np.sin(theta)
+    r2 = G - cl * np.sin(theta) - U * np.cos(theta)
+    det = a11 * a22 - a12 * a21
+    A_poss = np.where(np.abs(det) > 1e-12, (r1 * a22 - a12 * r2) / np.where(det == 0, 1, det), 0.0)
+
+    # ancoragens com o ponto médio da selagem dentro do bloco (planos x ancoragens)
+    xm = ((df_res["X2"] + df_res["X3"]) / 2).to_numpy(float)
+    ym = ((df_res["Y2"] + df_res["Y3"]) / 2).to_numpy(float)
+    P = df_res["P_block (kN)"].to_numpy(float) / afast
+    A_exist = np.empty(len(xf))
+    step = max(1, max_chunk // max(len(xm), 1))
+    for i in range(0, len(xf), step):
+        s = slice(i, i + step)
+        y_line = yf[s, None] + (xm[None, :] - xf[s, None]) * np.tan(theta[s])[:, None]
+        inside = (xm[None, :] >= xf[s, None]) & (xm[None, :] <= xb[s, None] + 1e-9) \
+            & (ym[None, :] >= y_line - 1e-9) & (ym[None, :] <= y_wall)
+        inside[np.arange(inside.shape[0]), pl["anchor"][s]] = True
+        proj = np.cos(ang[None, :] - alpha[s, None])
+        A_exist[s] = (inside * P[None, :] * proj).sum(axis=1)
+
+    FS = np.where(A_exist > 0, np.maximum(A_poss, 0.0) / np.where(A_exist > 0, A_exist, 1), np.inf)
+
+    planes = pd.DataFrame({
+        "Anchor": df_res["Anchor"].to_numpy()[pl["anchor"]],
+        "Toe depth (m)": pl["toe_depth"],
+        "Bond point": pl["fraction"],
+        "Plane angle (deg)": np.round(np.degrees(theta), 2),
+        "G (kN/m)": np.round(G, 2),
+        "Ea (kN/m)": np.round(Ea, 2),
+        "E1 (kN/m)": np.round(E1, 2),
+        "U (kN/m)": np.round(U, 2),
+        "A_poss (kN/m)": np.round(A_poss, 2),
+        "A_exist (kN/m)": np.round(A_exist, 2),
+        "FS": np.round(FS, 3),
+        "Check": np.where(FS >= fs_required, "OK", "FAIL"),
+    })
+
+    order = np.lexsort((FS, planes["Anchor"].to_numpy()))
+    per_anchor = planes.iloc[order].drop_duplicates("Anchor").reset_index(drop=True)
+
+    g = int(np.argmin(FS))
+    governing = {
+        **planes.iloc[g].to_dict(),
+        "points": [[float(xf[g]), float(yf[g])],
+                   [float(xb[g]), float(yb[g])], [float(xb[g]), y_wall]],
+    }
+    return {"planes": planes, "per_anchor": per_anchor,
+            "governing": governing, "min_fs": float(FS[g])}
@@ -0,0 +1,290 @@
+"""
+Optimização da disposição das ancoragens: número de níveis, cotas y1 e
+espaçamento horizontal (afast).
+
+A força horizontal a ancorar por metro de parede (T_req, kN/m) é
+distribuída uniformemente em altura; cada nível recebe a área de
+influência entre os pontos médios dos níveis vizinhos (o topo da
+parede e o fundo da escavação fecham os extremos):
+
+    P_i = T_req / H * h_i * afast / cos(θ)     (arredondado a prestress_step)
+
+Para cada disposição candidata (níveis x afast) escolhe-se, em cada
+nível, o par (cordões, selagem) mais barato que verifica bloco
+(P_block < P_max) e selagem (R_bond > P_block); a disposição só é
+admissível se C_bolbo <= C_bolbo_max. Todas as disposições de um dado
+número de níveis são avaliadas em blocos (disposições x níveis x
+alternativas) com numpy.
+
+Custo por metro de parede = (custo do aço + custo da furação) / afast.
+"""
+import numpy as np
+import pandas as pd
+
+from anchorage.anchors import (
+    ANCHOR_DEFAULTS, E, F_STEEL, bond_resistance, slip_loss,
+)
+
+STEEL_DENSITY = 7850.0  # kg/m3
+
+LAYOUT_DEFAULTS = {
+    "rows_min": 1,
+    "rows_max": 4,
+    "level_step": 0.5,       # m, grelha de cotas candidatas
+    "clear_top": 1.0,        # m abaixo do topo da parede
+    "clear_bottom": 1.0,     # m acima do fundo da escavação
+    "row_spacing_min": 1.5,  # m entre níveis
+    "row_spacing_max": 4.0,  # m entre níveis (vão da parede)
+    "cantilever_max": 3.0,   # m do topo da parede ao primeiro nível
+    "bottom_max": 3.5,       # m do último nível ao fundo da escavação
+    "afast_min": 1.5,
+    "afast_max": 4.0,
+    "afast_step": 0.5,
+    "strands_min": 2,
+    "strands_max": 8,
+    "bond_min": 4.0,
+    "bond_max": 15.0,
+    "bond_step": 1.0,
+    "prestress_step": 10.0,  # kN
+    "cost_steel": 2.5,       # por kg de aço
+    "cost_drill": 50.0,      # por m furado
+}
+MAX_CHUNK = 4_000_000
+MAX_LAYOUTS = 2_000_000
+
+RANKED_COLUMNS = [
+    "Rank", "Rows", "Levels y1 (m)", "Spacing (m)", "Strands", "Bond (m)",
+    "Prestress (kN)", "Steel (kg/m)", "Drilled (m/m)", "Cost per m",
+    "U_block max", "U_bond max", "C_bolbo (kN)",
+]
+
+
+def _grid(lo, hi, step):
+    return np.round(np.arange(lo, hi + step / 2, step), 6)
+
+
+def candidate_levels(y_wall, y_excav, n_rows, p, max_layouts=None):
+    """
+    Conjuntos de n_rows cotas (por ordem crescente) na grelha de passo
+    level_step que respeitam os afastamentos mínimo/máximo entre níveis,
+    a consola no topo e o vão até ao fundo. Construídos nível a nível,
+    descartando logo as sequências que já não podem chegar ao topo.
+    """
+    step = p["level_step"]
+    tol = 1e-9
+    lo = y_excav + p["clear_bottom"]
+    hi = y_wall - p["clear_top"]
+    top_min = y_wall - p["cantilever_max"]  # o último nível tem de ficar acima
+    max_layouts = max_layouts or MAX_LAYOUTS
+
+    first = _grid(lo, min(hi, y_excav + p["bottom_max"]), step)
+    gaps = _grid(p["row_spacing_min"], p["row_spacing_max"], step)
+    gaps = gaps[gaps > 0]
+    if not len(first) or (n_rows > 1 and not len(gaps)):
+        return np.empty((0, n_rows))
+
+    seqs = first[:, None]
+    for r in range(1, n_rows + 1):
+        left = n_rows - r  # níveis ainda por colocar
+        last = seqs[:, -1]
+        reach = last + left * (gaps.max() if left else 0.0)
+        keep = (reach >= top_min - tol) & (last + left * (gaps.min() if left else 0.0) <= hi + tol)
+        seqs = seqs[keep]
+        if not left or not len(seqs):
+            break
+        nxt = seqs[:, -1:] + gaps[None, :]
+        k = len(seqs) * len(gaps)
+        if k > max_layouts:
+            raise ValueError(
+                f"More than {max_layouts} candidate level sets for {n_rows} rows; "
+                "increase the level step or reduce the number of rows."
+            )
+        seqs = np.concatenate(
+            [np.repeat(seqs, len(gaps), axis=0), nxt.reshape(-1, 1)], axis=1
+        )
+        seqs = np.round(seqs, 6)
+    return seqs
+
+
+def tributary_heights(levels, y_wall, y_excav):
+    """Altura de influência de cada nível (levels por ordem crescente)."""
+    mids = (levels[:, 1:] + levels[:, :-1]) / 2
+    lo = np.concatenate([np.full((len(levels), 1), y_excav), mids], axis=1)
+    hi = np.concatenate([mids, np.full((len(levels), 1), y_wall)], axis=1)
+    return hi - lo
+
+
+def design_menu(template, A_strand, delta_L, p, E=E, f_steel=F_STEEL):
+    """
+    Alternativas (cordões, selagem) por ordem crescente de custo por ancoragem.
+    Devolve dict de arrays (M,).
+    """
+    s = np.arange(p["strands_min"], p["strands_max"] + 1, dtype=float)
+    b = _grid(p["bond_min"], p["bond_max"], p["bond_step"])
+    S, B = (x.ravel() for x in np.meshgrid(s, b, indexing="ij"))
+
+    L_free = float(template["free"])
+    A = S * A_strand
+    steel_kg = A * 1e-6 * (L_free + B) * STEEL_DENSITY
+    drilled = L_free + B
+    cost = p["cost_steel"] * steel_kg + p["cost_drill"] * drilled
+    order = np.argsort(cost, kind="stable")
+
+    menu = {
+        "strands": S, "bond": B, "steel_kg": steel_kg, "drilled": drilled,
+        "cost": cost,
+        "slip": slip_loss(A, L_free, delta_L, E),
+        "Pmax": A * f_steel / 1000,
+        "R_bond": bond_resistance(B, template["drill_mm"], template["alpha"],
+                                  template["shear_stress"], template["FS"]),
+    }
+    return {k: v[order] for k, v in menu.items()}
+
+
+def _best_for_loads(loads, menu, max_chunk):
+    """
+    Índice da alternativa mais barata admissível para cada carga de
+    `loads` (-1 se nenhuma). Avaliado em blocos de cargas x alternativas.
+    """
+    M = len(menu["cost"])
+    best = np.full(len(loads), -1, dtype=int)
+    step = max(1, max_chunk // max(M, 1))
+    for i in range(0, len(loads), step):
+        Pb = loads[i:i + step, None] + menu["slip"][None, :]
+        ok = (Pb < menu["Pmax"][None, :]) & (menu["R_bond"][None, :] > Pb)
+        first = ok.argmax(axis=1)  # menu ordenado por custo
+        best[i:i + step] = np.where(ok.any(axis=1), first, -1)
+    return best
+
+
+def _best_per_row(P, menu, prestress_step, max_chunk):
+    """
+    _best_for_loads para uma matriz de cargas. Com cargas arredondadas a
+    prestress_step usa uma tabela indexada pelo múltiplo do passo; sem
+    arredondamento avalia só os valores distintos.
+    """
+    if prestress_step > 0:
+        k = np.rint(P / prestress_step).astype(int)
+        table = _best_for_loads(
+            np.arange(k.max() + 1) * prestress_step if k.size else np.empty(0),
+            menu, max_chunk,
+        )
+        return table[k]
+    uniq, inv = np.unique(P, return_inverse=True)
+    return _best_for_loads(uniq, menu, max_chunk)[inv].reshape(P.shape)
+
+
+def optimize(template, y_wall, y_excav, A_strand, delta_L, T_req,
+             C_bolbo_max=None, esp=0.30, A_inf=1.5, params=None,
+             E=E, f_steel=F_STEEL, top=20, max_chunk=MAX_CHUNK):
+    """
+    Procura as disposições admissíveis de menor custo.
+
+    template    -> ancoragem tipo (x1, angle, free, drill_mm, alpha,
+                   shear_stress, FS); y1, bond, strands e prestress são
+                   escolhidos pelo optimizador
+    T_req       -> força horizontal a ancorar (kN por metro de parede)
+    C_bolbo_max -> limite da carga no bolbo (kN); None = sem limite
+    params      -> sobrepõe LAYOUT_DEFAULTS
+
+    Devolve dict com "ranked" (DataFrame ordenado por custo), "layouts"
+    (lista de ancoragens de cada linha de "ranked", no formato de `data`),
+    "evaluated" e "feasible".
+    """
+    p = {**LAYOUT_DEFAULTS, **(params or {})}
+    t = {**ANCHOR_DEFAULTS, **template}
+    H = y_wall - y_excav
+    angle = float(t["angle"])
+    cos_a = np.cos(np.radians(abs(angle)))
+    sin_a = np.sin(np.radians(abs(angle)))
+    carga_parede = H * esp * 25
+
+    menu = design_menu(t, A_strand, delta_L, p, E, f_steel)
+    afasts = _grid(p["afast_min"], p["afast_max"], p["afast_step"])
+    afasts = afasts[afasts > 0]
+
+    step = p["prestress_step"]
+    found = []
+    evaluated = feasible = 0
+    for n_rows in range(int(p["rows_min"]), int(p["rows_max"]) + 1):
+        levels = candidate_levels(y_wall, y_excav, n_rows, p)
+        if not len(levels) or H <= 0:
+            continue
+        h = tributary_heights(levels, y_wall, y_excav)
+        # empate no custo: prefere alturas de influência mais uniformes
+        h_max = h.max(axis=1)
+
+        for af in afasts:
+            P = T_req / H * h * af / cos_a  # (disposições, níveis)
+            if step > 0:
+                P = np.ceil(P / step - 1e-9) * step
+            choice = _best_per_row(P, menu, step, max_chunk)
+            evaluated += len(P)
+
+            ok = (choice >= 0).all(axis=1)
+            # C_bolbo = (Σ V / afast + carga_parede) * A_inf
+            C = (P.sum(axis=1) * sin_a / af + carga_parede) * A_inf
+            if C_bolbo_max is not None:
+                ok &= C <= C_bolbo_max
+            idx = np.nonzero(ok)[0]
+            feasible += len(idx)
+            if not len(idx):
+                continue
+
+            cost = np.round(menu["cost"][choice[idx]].sum(axis=1) / af, 6)
+            # candidatos suficientes para sobreviverem à remoção de repetidos
+            m = min(len(idx), top * 20)
+            part = np.argpartition(cost, m - 1)[:m] if m < len(idx) else np.arange(len(idx))
+            for j in part:
+                i = idx[j]
+                found.append((cost[j], h_max[i], n_rows, levels[i], af,
+                              choice[i], P[i], C[i]))
+
+    found.sort(key=lambda f: (f[0], f[1]))
+    unique, seen = [], set()
+    for f in found:
+        # disposições com o mesmo dimensionamento só diferem nas cotas
+        sig = (f[2], f[4], tuple(f[5]), tuple(f[6]))
+        if sig not in seen:
+            seen.add(sig)
+            unique.append(f)
+            if len(unique) >= top:
+                break
+    found = unique
+
+    rows, layouts = [], []
+    for rank, (cost, _, n_rows, lv, af, ch, Pr, C) in enumerate(found, start=1):
+        Pb = Pr + menu["slip"][ch]
+        order = np.argsort(-lv)  # de cima para baixo
+        rows.append({
+            "Rank": rank,
+            "Rows": n_rows,
+            "Levels y1 (m)": ", ".join(f"{v:.2f}" for v in lv[order]),
+            "Spacing (m)": af,
+            "Strands": ", ".join(str(int(v)) for v in menu["strands"][ch][order]),
+            "Bond (m)": ", ".join(f"{v:g}" for v in menu["bond"][ch][order]),
+            "Prestress (kN)": ", ".join(f"{v:g}" for v in Pr[order]),
+            "Steel (kg/m)": round(float(menu["steel_kg"][ch].sum() / af), 2),
+            "Drilled (m/m)": round(float(menu["drilled"][ch].sum() / af), 2),
+            "Cost per m": round(float(cost), 2),
+            "U_block max": round(float((Pb / menu["Pmax"][ch]).max()), 3),
+            "U_bond max": round(float((Pb / menu["R_bond"][ch]).max()), 3),
+            "C_bolbo (kN)": round(float(C), 2),
+        })
+        layouts.append([
+            {**{k: t[k] for k in ("x1", "angle", "free", "drill_mm",
+                                  "alpha", "shear_stress", "FS")},
+             "y1": float(lv[j]),
+             "bond": float(menu["bond"][ch[j]]),
+             "prestress": float(Pr[j]),
+             "strands": int(menu["strands"][ch[j]]),
+             "afast": float(af)}
+            for j in order
+        ])
+
+    return {
+        "ranked": pd.DataFrame(rows, columns=RANKED_COLUMNS),
+        "layouts": layouts,
+        "evaluated": evaluated,
+        "feasible": feasible,
+    }
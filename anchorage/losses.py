@@ -0,0 +1,152 @@
+"""
+Perdas de pré-esforço diferidas: relaxação do aço, fluência e retracção.
+
+A carga residual é avaliada como uma matriz ancoragens x passos de tempo,
+por blocos (chunks), para que uma obra inteira com resolução diária ao
+longo de 100 anos não esgote a memória. Em memória ficam apenas curvas
+reamostradas e, por ancoragem, o instante em que cada verificação muda de
+estado.
+"""
+import numpy as np
+import pandas as pd
+
+from anchorage.anchors import E, anchor_arrays, bond_resistance, slip_loss
+
+# valores por omissão (ajustáveis no separador Long-Term Losses)
+LOSS_DEFAULTS = {
+    "f_pk": 1860.0,         # MPa, resistência característica do cordão
+    "rho_1000": 2.5,        # %, relaxação a 1000 h (classe 2, EN 1992-1-1)
+    "creep_ks": 0.5,        # mm por ciclo logarítmico (EN 1537)
+    "creep_t0": 1.0,        # dias, início da fluência
+    "shrinkage_inf": 1e-4,  # extensão de retracção final
+    "shrinkage_ts": 35.0,   # dias, meio-tempo da retracção
+    "residual_min": 0.85,   # carga residual mínima / pré-esforço
+}
+
+MAX_CHUNK = 2_000_000  # elementos por bloco (16 MB em float64)
+
+
+def relaxation_loss(sigma_pi, f_pk, rho_1000, t_days):
+    """
+    Perda de tensão por relaxação (MPa), EN 1992-1-1 (3.29), classe 2:
+    Δσ/σ_pi = 0.66 ρ1000 e^(9.1 μ) (t/1000)^(0.75 (1 - μ)) 1e-5, t em horas.
+    """
+    mu = sigma_pi / f_pk
+    t_h = np.maximum(t_days * 24.0, 1e-9)
+    loss = sigma_pi * 0.66 * rho_1000 * np.exp(9.1 * mu) \
+        * (t_h / 1000) ** (0.75 * (1 - mu)) * 1e-5
+    return np.where(t_days > 0, loss, 0.0)  # sem perda no instante da blocagem
+
+
+def creep_displacement(ks, t0, t_days):
+    """Deslocamento por fluência (mm): ks * log10(t / t0) para t > t0."""
+    return ks * np.log10(np.maximum(t_days, t0) / t0)
+
+
+def shrinkage_strain(eps_inf, ts, t_days):
+    """Extensão de retracção (hiperbólica): ε_inf * t / (t + ts)."""
+    return eps_inf * t_days / (t_days + ts)
+
+
+def _loss_matrix(A, L_free, sigma_pi, t, p, E):
+    """Perda total (kN) para ancoragens (coluna) x tempos (linha)."""
+    t = t[None, :]
+    d_relax = relaxation_loss(sigma_pi[:, None], p["f_pk"], p["rho_1000"], t) \
+        * A[:, None] / 1000
+    d_creep = slip_loss(A[:, None], L_free[:, None],
+                        creep_displacement(p["creep_ks"], p["creep_t0"], t), E)
+    d_shr = E * A[:, None] * shrinkage_strain(p["shrinkage_inf"], p["shrinkage_ts"], t) / 1000
+    return d_relax + d_creep + d_shr
+
+
+def _first_change(state, initial, found, offset):
+    """Actualiza `found` (índice do primeiro passo com estado diferente)."""
+    changed = state != initial[:, None]
+    hit = changed.any(axis=1) & (found < 0)
+    found[hit] = offset + changed[hit].argmax(axis=1)
+
+
+def simulate(data, A_strand, delta_L, years=100, step_days=1.0, params=None,
+             curve_points=300, E=E, max_chunk=MAX_CHUNK):
+    """
+    Histórico de carga residual ao longo da vida útil.
+
+    data       -> lista de dicts por ancoragem (ou DataFrame)
+    years      -> vida útil; step_days -> passo de tempo (dias)
+    params     -> dict com chaves de LOSS_DEFAULTS (valores em falta = omissão)
+    Devolve dict com:
+      "times"    -> instantes (anos) das curvas reamostradas
+      "residual" -> carga residual (kN), ancoragens x curve_points
+      "summary"  -> DataFrame por ancoragem (perdas finais e instantes em
+                    que as verificações de carga residual e selagem mudam)
+      "first_change_years" -> primeiro instante em que alguma ancoragem
+                    muda de estado (None se nenhuma muda)
+    """
+    p = {**LOSS_DEFAULTS, **(params or {})}
+    a = anchor_arrays(data)
+    n = len(a["x1"])
+
+    A = a["strands"] * A_strand
+    P0 = a["prestress"]
+    # tensão no aço após blocagem (P_block)
+    sigma_pi = (P0 + slip_loss(A, a["free"], delta_L, E)) * 1000 / A
+    R_bond = bond_resistance(a["bond"], a["drill_mm"], a["alpha"],
+                             a["shear_stress"], a["FS"])
+    P_min = p["residual_min"] * P0
+
+    n_steps = int(round(years * 365.25 / step_days)) + 1
+    t_all = np.arange(n_steps) * step_days  # dias
+
+    curve_idx = np.unique(np.linspace(0, n_steps - 1, curve_points).round().astype(int))
+    residual = np.empty((n, len(curve_idx)))
+    final = np.empty(n)
+    change_res = np.full(n, -1)
+    change_bond = np.full(n, -1)
+
+    res_init = np.ones(n, dtype=bool)    # P(0) = P0 >= P_min
+    bond_init = R_bond > P0
+
+    # blocos: ancoragens x passos, limitados a max_chunk elementos
+    a_chunk = max(1, min(n, max_chunk // min(n_steps, max_chunk)))
+    t_chunk = max(1, max_chunk // a_chunk)
+
+    for i0 in range(0, n, a_chunk):
+        sl = slice(i0, i0 + a_chunk)
+        found_r = change_res[sl]
+        found_b = change_bond[sl]
+        for j0 in range(0, n_steps, t_chunk):
+            t = t_all[j0:j0 + t_chunk]
+            P = P0[sl, None] - _loss_matrix(A[sl], a["free"][sl], sigma_pi[sl], t, p, E)
+
+            _first_change(P >= P_min[sl, None], res_init[sl], found_r, j0)
+            _first_change(R_bond[sl, None] > P, bond_init[sl], found_b, j0)
+
+            k = curve_idx[(curve_idx >= j0) & (curve_idx < j0 + len(t))]
+            if len(k):
+                pos = np.searchsorted(curve_idx, k)
+                residual[sl, pos] = P[:, k - j0]
+            if j0 + len(t) == n_steps:
+                final[sl] = P[:, -1]
+
+    def years_at(idx):
+        return np.where(idx >= 0, t_all[np.maximum(idx, 0)] / 365.25, np.nan)
+
+    summary = pd.DataFrame({
+        "Anchor": np.arange(1, n + 1),
+        "Prestress (kN)": P0,
+        "Residual end (kN)": np.round(final, 2),
+        "Loss (%)": np.round(100 * (1 - final / P0), 2),
+        "Residual min (kN)": np.round(P_min, 2),
+        "Residual Check (end)": np.where(final >= P_min, "OK", "FAIL"),
+        "Residual change (years)": np.round(years_at(change_res), 3),
+        "Bond Check (end)": np.where(R_bond > final, "OK", "FAIL"),
+        "Bond change (years)": np.round(years_at(change_bond), 3),
+    })
+
+    first = np.concatenate([change_res[change_res >= 0], change_bond[change_bond >= 0]])
+    return {
+        "times": t_all[curve_idx] / 365.25,
+        "residual": residual,
+        "summary": summary,
+        "first_change_years": float(t_all[first.min()] / 365.25) if len(first) else None,
+    }
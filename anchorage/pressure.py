@@ -0,0 +1,122 @@
+"""
+Cargas de ancoragem a partir do impulso activo de terras.
+
+O diagrama σ_h(y) (soil.active_profile: γ, φ, c por camada, nível
+freático e sobrecarga) é integrado numa grelha fina entre o topo da
+parede e o fundo da escavação. Cada nível de ancoragens recebe o
+impulso da sua faixa de influência, limitada pelos pontos médios entre
+níveis vizinhos (o topo da parede e o fundo da escavação fecham os
+extremos); o impulso abaixo do fundo da escavação fica para o
+encastramento da parede.
+
+    T_i = ∫ σ_h dy   na faixa do nível i                 (kN/m)
+    P_i = load_factor · T_i · afast / cos(θ) / n_i       (kN por ancoragem)
+    pré-esforço proposto = lockoff · P_i, arredondado para cima a
+                           prestress_step
+
+n_i é o número de ancoragens da secção ao mesmo nível.
+"""
+import numpy as np
+import pandas as pd
+
+from anchorage import soil
+
+PRESSURE_DEFAULTS = {
+    "surcharge": 0.0,       # kPa
+    "load_factor": 1.0,
+    "lockoff": 1.0,         # pré-esforço / carga necessária
+    "prestress_step": 10.0,  # kN
+}
+
+
+def row_bands(y1, y_wall, y_excav, decimals=3):
+    """
+    Faixas de influência dos níveis de ancoragem.
+
+    Devolve (levels, lo, hi, inv): níveis distintos por ordem crescente,
+    limites inferior/superior de cada faixa e o índice do nível de cada
+    ancoragem.
+    """
+    levels, inv = np.unique(np.round(np.asarray(y1, dtype=float), decimals),
+                            return_inverse=True)
+    mids = (levels[1:] + levels[:-1]) / 2
+    lo = np.clip(np.concatenate([[y_excav], mids]), y_excav, y_wall)
+    hi = np.clip(np.concatenate([mids, [y_wall]]), y_excav, y_wall)
+    return levels, lo, np.maximum(hi, lo), inv
+
+
+def required_loads(data, stratigraphy, y_wall, y_excav, afast,
+                   y_water=None, params=None, step=soil.GRID_STEP):
+    """
+    Carga necessária e pré-esforço proposto por ancoragem.
+
+    data         -> ancoragens da página (y1, angle, prestress)
+    stratigraphy -> camadas com gamma/phi/c
+    y_water      -> cota do nível freático (None = sem água)
+    params       -> PRESSURE_DEFAULTS alterados
+
+    Devolve dict com "table" (uma linha por ancoragem), "profile" (diagrama
+    de soil.active_profile) e "total" (impulso até ao fundo da escavação,
+    kN/m).
+    """
+    p = {**PRESSURE_DEFAULTS, **(params or {})}
+
+    prof = soil.active_profile(stratigraphy, y_wall, y_excav, step,
+                               y_water=y_water, surcharge=p["surcharge"])
+    total = float(prof["E"][-1])
+    if not data:
+        return {"table": pd.DataFrame(), "profile": prof, "total": total}
+
+    y1 = np.array([d["y1"] for d in data], dtype=float)
+    cos_a = np.cos(np.radians(np.abs([d["angle"] for d in data])))
+    current = np.array([d.get("prestress", 0.0) for d in data], dtype=float)
+
+    levels, lo, hi, inv = row_bands(y1, y_wall, y_excav)
+    T_row = soil.thrust_above(prof, lo) - soil.thrust_above(prof, hi)
+    n_row = np.bincount(inv, minlength=len(levels))
+
+    T = T_row[inv] / n_row[inv]
+    P_req = p["load_factor"] * T * afast / cos_a
+    step_p = p["prestress_step"]
+    proposed = np.ceil(p["lockoff"] * P_req / step_p - 1e-9) * step_p
+
+    table = pd.DataFrame({
+        "Anchor": np.arange(1, len(data) + 1),
+        "Y1 (m)": y1,
+        "Band top (m)": hi[inv],
+        "Band bottom (m)": lo[inv],
+        "Thrust (kN/m)": np.round(T, 2),
+        "Required (kN)": np.round(P_req, 1),
+        "Prestress (kN)": current,
+        "Proposed prestress (kN)": proposed,
+        "Prestress / required": np.round(
+            np.divide(current, P_req, out=np.full(len(data), np.inf), where=P_req > 0), 3
+        ),
+    })
+    return {"table": table, "profile": prof, "total": total}
+
+
+def pressure_figure(result, y_water=None):
+    """Diagrama σ_h (activo + água) em altura com as faixas dos níveis (matplotlib)."""
+    import matplotlib.pyplot as plt
+
+    prof = result["profile"]
+    fig, ax = plt.subplots(figsize=(5, 6))
+    ax.fill_betweenx(prof["y"], 0, prof["sigma_h"], color="tab:orange",
+                     alpha=0.3, label="σ_h total")
+    ax.plot(prof["sigma_a"], prof["y"], color="tab:brown", label="σ_a (soil)")
+    if y_water is not None:
+        ax.plot(prof["u"], prof["y"], color="tab:blue", label="u (water)")
+
+    table = result["table"]
+    if len(table):
+        for yb in np.unique(table["Band bottom (m)"]):
+            ax.axhline(yb, color="gray", linestyle=":", linewidth=1)
+        ax.plot(np.zeros(len(table)), table["Y1 (m)"], "ko", label="Anchor level")
+
+    ax.set_xlabel("Horizontal pressure (kPa)")
+    ax.set_ylabel("Elevation (m)")
+    ax.legend(loc="best", fontsize=8)
+    ax.grid(True)
+    fig.tight_layout()
+    return fig
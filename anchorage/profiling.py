@@ -0,0 +1,111 @@
+"""
+Perfil de um rerun completo da página, a pedido.
+
+RerunProfiler corre ao mesmo tempo:
+  - cProfile (determinístico) -> ficheiro pstats
+        python -m pstats anchorage.pstats   /   snakeviz anchorage.pstats
+  - amostragem das pilhas da thread do script (intervalo fixo) -> formato
+    "collapsed stacks" ("a;b;c N" por linha), lido por flamegraph.pl,
+    speedscope ou inferno
+        flamegraph.pl anchorage.folded > flame.svg
+
+Só existe enquanto o perfil está activo; quando a opção está desligada a
+página faz apenas uma consulta ao session_state.
+"""
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+
+def _frame_name(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler(threading.Thread):
+    """Amostra a pilha da thread `target` a cada `interval` segundos."""
+
+    def __init__(self, target, interval=0.001, root_file=None):
+        super().__init__(name="anchorage-stack-sampler", daemon=True)
+        self.target = target
+        self.interval = interval
+        self.root_file = os.path.abspath(root_file) if root_file else None
+        self.counts = Counter()
+        self.samples = 0
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            stack.reverse()
+            if self.root_file:
+                # começa no script da página (sem as camadas do Streamlit)
+                for i, code in enumerate(stack):
+                    if os.path.abspath(code.co_filename) == self.root_file:
+                        stack = stack[i:]
+                        break
+            self.counts[";".join(_frame_name(c) for c in stack)] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+    def folded(self):
+        """Pilhas no formato collapsed (uma por linha, mais frequentes primeiro)."""
+        return "\n".join(f"{k} {v}" for k, v in self.counts.most_common()) + "\n"
+
+
+class RerunProfiler:
+    """
+    profiler = RerunProfiler(root_file=__file__)
+    profiler.start()
+    ...                      # resto do script
+    result = profiler.stop() # dict com pstats, folded, summary, seconds, samples
+    """
+
+    def __init__(self, interval=0.001, root_file=None, top=30):
+        self.interval = interval
+        self.root_file = root_file
+        self.top = top
+        self._prof = None
+        self._sampler = None
+        self._t0 = None
+
+    def start(self):
+        self._sampler = StackSampler(threading.get_ident(), self.interval, self.root_file)
+        self._prof = cProfile.Profile()
+        self._t0 = time.perf_counter()
+        self._sampler.start()
+        self._prof.enable()
+
+    def stop(self):
+        self._prof.disable()
+        seconds = time.perf_counter() - self._t0
+        self._sampler.stop()
+
+        self._prof.create_stats()
+        # mesmo formato de Profile.dump_stats (lido por pstats.Stats); antes
+        # de criar o Stats, que esvazia self._prof.stats
+        raw = marshal.dumps(self._prof.stats)
+        buf = io.StringIO()
+        pstats.Stats(self._prof, stream=buf).sort_stats("cumulative").print_stats(self.top)
+
+        return {
+            "seconds": seconds,
+            "samples": self._sampler.samples,
+            "pstats": raw,
+            "folded": self._sampler.folded(),
+            "summary": buf.getvalue(),
+        }
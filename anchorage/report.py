@@ -0,0 +1,859 @@
+"""
+Motor de relatórios PDF para a verificação de ancoragens.
+
+As páginas são escritas para o ficheiro à medida que são geradas (a memória
+não cresce com o número de páginas) e o conteúdo de cada página é guardado
+numa cache de fragmentos indexada pelo hash dos dados que a originam: numa
+nova geração só as ancoragens alteradas voltam a ser desenhadas.
+
+Não usa o fpdf: o FPDF guarda todas as páginas em memória até output()
+e não tem forma pública de inserir o conteúdo de uma página já gerado,
+pelo que nem a escrita em streaming nem a cache de fragmentos cabem por
+cima dele. O texto usa as fontes base (Helvetica, WinAnsi/cp1252): os
+caracteres fora do cp1252 perdem o acento ou saem como "?" (pdf_text,
+unsupported_chars) e o texto é cortado para não sair das margens.
+"""
+import hashlib
+import io
+import json
+import threading
+import unicodedata
+import zlib
+from collections import OrderedDict
+
+# =============================================================
+# PAGE LAYOUT (A4, mm)
+# =============================================================
+PAGE_W = 210.0
+PAGE_H = 297.0
+MARGIN = 10.0
+K = 72 / 25.4  # pt por mm
+
+# incrementar sempre que o desenho das páginas mude (invalida a cache)
+LAYOUT_VERSION = 4
+
+SUMMARY_ROWS = 40   # linhas por página no modo "summary"
+BULB_ROWS = 30      # linhas por página na tabela de componentes verticais
+BULB_ROWS_FIRST = 24
+
+# larguras Helvetica / Helvetica-Bold (AFM, caracteres 32..126)
+_HELV = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333,
+    278, 278, 556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278,
+    584, 584, 584, 556, 1015, 667, 667, 722, 722, 667, 611, 778, 722, 278,
+    500, 667, 556, 833, 722, 778, 667, 778, 722, 667, 611, 722, 667, 944,
+    667, 667, 611, 278, 278, 278, 469, 556, 333, 556, 556, 500, 556, 556,
+    278, 556, 556, 222, 222, 500, 222, 833, 556, 556, 556, 556, 333, 500,
+    278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+)
+_HELV_B = (
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333,
+    278, 278, 556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333,
+    584, 584, 584, 611, 975, 722, 722, 722, 722, 667, 611, 778, 722, 278,
+    556, 722, 611, 833, 722, 778, 667, 778, 722, 667, 611, 722, 667, 944,
+    667, 667, 611, 333, 278, 333, 584, 556, 333, 556, 611, 556, 611, 556,
+    333, 611, 611, 278, 278, 556, 278, 889, 611, 611, 611, 611, 389, 556,
+    333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+)
+
+
+# as fontes base usam WinAnsiEncoding (cp1252); letras sem decomposição
+# NFKD que o cp1252 não tem
+_TRANSLIT = str.maketrans({"Ł": "L", "ł": "l", "Đ": "D", "đ": "d", "ı": "i",
+                           "Ħ": "H", "ħ": "h"})
+# larguras (AFM) dos símbolos cp1252 largos fora do ASCII
+_WIDE = {"—": 1000, "…": 1000, "‰": 1000, "™": 1000, "Œ": 1000, "œ": 944,
+         "Æ": 1000, "æ": 889}
+
+
+def _cp1252(ch):
+    try:
+        ch.encode("cp1252")
+        return True
+    except UnicodeEncodeError:
+        return False
+
+
+def pdf_text(s):
+    """
+    Texto tal como sai no PDF: os caracteres fora do cp1252 perdem o
+    acento ("ő" -> "o", NFKD) ou, sem equivalente, passam a "?" (ver
+    unsupported_chars).
+    """
+    out = []
+    for ch in str(s).translate(_TRANSLIT):
+        if not _cp1252(ch):
+            base = "".join(c for c in unicodedata.normalize("NFKD", ch)
+                           if _cp1252(c) and not unicodedata.combining(c))
+            ch = base or "?"
+        out.append(ch)
+    return "".join(out)
+
+
+def unsupported_chars(*values):
+    """
+    Caracteres de values (strings, ou dicts / listas com strings) que o
+    PDF mostra como "?". A página avisa antes de exportar.
+    """
+    found = set()
+    for v in values:
+        if isinstance(v, dict):
+            found |= unsupported_chars(*v.keys(), *v.values())
+        elif isinstance(v, (list, tuple)):
+            found |= unsupported_chars(*v)
+        elif isinstance(v, str):
+            found |= {ch for ch in v if ch != "?" and pdf_text(ch) == "?"}
+    return found
+
+
+def text_width(s, size, bold=False):
+    """Largura (mm) de uma string em Helvetica com o tamanho dado (pt)."""
+    table = _HELV_B if bold else _HELV
+    w = 0
+    for ch in pdf_text(s):
+        base = unicodedata.normalize("NFKD", ch)[0]  # "é" -> largura de "e"
+        c = ord(base)
+        w += table[c - 32] if 32 <= c < 127 else _WIDE.get(ch, 556)
+    return w * size / 1000 / K
+
+
+def fit_text(s, width, size, bold=False):
+    """s cortado com "..." para caber em width (mm)."""
+    s = pdf_text(s)
+    if text_width(s, size, bold) <= width:
+        return s
+    while s and text_width(s + "...", size, bold) > width:
+        s = s[:-1]
+    return s + "..." if s else ""
+
+
+def _pdf_str(s):
+    s = pdf_text(s).replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return s.encode("cp1252")
+
+
+# =============================================================
+# PAGE CANVAS (API SEMELHANTE AO FPDF)
+# =============================================================
+class Canvas:
+    """
+    Conteúdo de uma página. Mantém um cursor (x, y) em mm a partir do canto
+    superior esquerdo, como o FPDF, e produz o content stream da página.
+    """
+
+    def __init__(self):
+        self.ops = [b"0.57 w"]
+        self.images = []
+        self.x = MARGIN
+        self.y = MARGIN
+        self.bold = False
+        self.size = 11
+        self.lasth = 5
+
+    def set_font(self, style="", size=11):
+        self.bold = "B" in style
+        self.size = size
+
+    def text(self, x, y, txt):
+        # dentro das margens: desloca para a esquerda e corta se preciso
+        w = text_width(txt, self.size, self.bold)
+        x = max(MARGIN, min(x, PAGE_W - MARGIN - w))
+        txt = fit_text(txt, PAGE_W - MARGIN - x, self.size, self.bold)
+        font = b"/F2" if self.bold else b"/F1"
+        self.ops.append(
+            b"BT " + font + b" %.2f Tf %.2f %.2f Td (" % (self.size, x * K, (PAGE_H - y) * K)
+            + _pdf_str(txt) + b") Tj ET"
+        )
+
+    def set_draw_color(self, r, g, b):
+        self.ops.append(b"%.3f %.3f %.3f RG" % (r / 255, g / 255, b / 255))
+
+    def set_text_color(self, r, g, b):
+        self.ops.append(b"%.3f %.3f %.3f rg" % (r / 255, g / 255, b / 255))
+
+    def set_line_width(self, w):
+        self.ops.append(b"%.2f w" % (w * K))
+
+    def set_dash(self, on=0, off=0):
+        if on:
+            self.ops.append(b"[%.2f %.2f] 0 d" % (on * K, off * K))
+        else:
+            self.ops.append(b"[] 0 d")
+
+    def line(self, x1, y1, x2, y2):
+        self.ops.append(
+            b"%.2f %.2f m %.2f %.2f l S"
+            % (x1 * K, (PAGE_H - y1) * K, x2 * K, (PAGE_H - y2) * K)
+        )
+
+    def rect(self, x, y, w, h):
+        self.ops.append(
+            b"%.2f %.2f %.2f %.2f re S" % (x * K, (PAGE_H - y) * K, w * K, -h * K)
+        )
+
+    def image(self, name, x, y, w, h):
+        self.images.append(name)
+        self.ops.append(
+            b"q %.2f 0 0 %.2f %.2f %.2f cm /%s Do Q"
+            % (w * K, h * K, x * K, (PAGE_H - y - h) * K, name.encode("ascii"))
+        )
+
+    def cell(self, w, h, txt="", border=0, ln=False, align="L"):
+        if w == 0:
+            w = PAGE_W - MARGIN - self.x
+        if border:
+            self.rect(self.x, self.y, w, h)
+        if txt:
+            txt = fit_text(txt, w - 2, self.size, self.bold)
+            if align == "C":
+                tx = self.x + (w - text_width(txt, self.size, self.bold)) / 2
+            elif align == "R":
+                tx = self.x + w - 1 - text_width(txt, self.size, self.bold)
+            else:
+                tx = self.x + 1
+            self.text(tx, self.y + 0.5 * h + 0.3 * self.size / K, txt)
+        self.lasth = h
+        if ln:
+            self.x = MARGIN
+            self.y += h
+        else:
+            self.x += w
+
+    def ln(self, h=None):
+        self.x = MARGIN
+        self.y += self.lasth if h is None else h
+
+    def multi_cell(self, w, h, txt):
+        if w == 0:
+            w = PAGE_W - MARGIN - self.x
+        if txt.endswith("\n"):
+            txt = txt[:-1]
+        for para in txt.split("\n"):
+            words = para.split(" ")
+            line = words[0]
+            for word in words[1:]:
+                trial = f"{line} {word}"
+                if line.strip() and text_width(trial, self.size, self.bold) > w - 2:
+                    self.cell(w, h, line, ln=True)
+                    line = word
+                else:
+                    line = trial
+            self.cell(w, h, line, ln=True)
+
+    def fragment(self):
+        """Conteúdo comprimido + imagens usadas (o que fica em cache)."""
+        return zlib.compress(b"\n".join(self.ops)), tuple(self.images)
+
+
+# =============================================================
+# FRAGMENT CACHE
+# =============================================================
+def fragment_key(kind, payload):
+    """Hash do conteúdo que origina um fragmento de página."""
+    raw = json.dumps([LAYOUT_VERSION, kind, payload], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class FragmentCache:
+    """
+    Cache LRU em memória de fragmentos de página já comprimidos.
+    Partilhar a mesma instância entre gerações para só redesenhar o que mudou.
+    Segura entre threads (a página partilha uma instância por todas as
+    sessões); o desenho corre fora do lock.
+    """
+
+    def __init__(self, max_items=50000):
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key, render):
+        with self._lock:
+            frag = self._items.get(key)
+            if frag is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return frag
+            self.misses += 1
+        frag = render()
+        with self._lock:
+            self._items[key] = frag
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+        return frag
+
+
+# =============================================================
+# STREAMING PDF WRITER
+# =============================================================
+class PdfStream:
+    """
+    Escritor PDF incremental: cada objecto é escrito no ficheiro assim que
+    é criado; em memória ficam apenas os offsets para a tabela xref.
+    """
+
+    def __init__(self, fh):
+        self.fh = fh
+        self._pos = 0
+        self._offsets = {}
+        self._kids = []
+        self._images = {}
+        self.images_reused = 0
+        self._next = 5  # 1 catalog, 2 pages, 3/4 fontes
+
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._obj(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+                     b"/Encoding /WinAnsiEncoding >>")
+        self._obj(4, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold "
+                     b"/Encoding /WinAnsiEncoding >>")
+
+    @property
+    def page_count(self):
+        return len(self._kids)
+
+    def _write(self, b):
+        self.fh.write(b)
+        self._pos += len(b)
+
+    def _alloc(self):
+        i = self._next
+        self._next += 1
+        return i
+
+    def _obj(self, i, body, stream=None):
+        self._offsets[i] = self._pos
+        self._write(b"%d 0 obj\n" % i)
+        if stream is None:
+            self._write(body + b"\nendobj\n")
+        else:
+            self._write(body[:-2] + b" /Length %d >>\nstream\n" % len(stream))
+            self._write(stream + b"\nendstream\nendobj\n")
+
+    def add_image(self, name, width, height, data):
+        """
+        Regista uma imagem RGB (8 bits, já comprimida com zlib).
+        Imagens com o mesmo nome são escritas uma única vez no ficheiro.
+        """
+        if name in self._images:
+            self.images_reused += 1
+            return name
+        i = self._alloc()
+        self._obj(
+            i,
+            b"<< /Type /XObject /Subtype /Image /Width %d /Height %d "
+            b"/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /FlateDecode >>"
+            % (width, height),
+            data,
+        )
+        self._images[name] = i
+        return name
+
+    def add_page(self, fragment):
+        content, images = fragment
+        c = self._alloc()
+        self._obj(c, b"<< /Filter /FlateDecode >>", content)
+
+        xobj = b""
+        if images:
+            xobj = b" /XObject << " + b" ".join(
+                b"/%s %d 0 R" % (n.encode("ascii"), self._images[n]) for n in images
+            ) + b" >>"
+
+        p = self._alloc()
+        self._obj(
+            p,
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] "
+            b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >>%s >> /Contents %d 0 R >>"
+            % (PAGE_W * K, PAGE_H * K, xobj, c),
+        )
+        self._kids.append(p)
+
+    def close(self):
+        kids = b" ".join(b"%d 0 R" % k for k in self._kids)
+        self._obj(2, b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(self._kids))
+        self._obj(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+        xref = self._pos
+        self._write(b"xref\n0 %d\n0000000000 65535 f \n" % self._next)
+        for i in range(1, self._next):
+            self._write(b"%010d 00000 n \n" % self._offsets.get(i, 0))
+        self._write(
+            b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (self._next, xref)
+        )
+
+
+# =============================================================
+# PAGE RENDERERS
+# =============================================================
+EQUATIONS = (
+    "Slip loss:\n"
+    "  DP_slip = (E * A / L_free) * delta_L / 1000\n\n"
+    "Block head force:\n"
+    "  P_block = P_prestress + DP_slip\n\n"
+    "Steel capacity:\n"
+    "  P_max = A * f_steel / 1000\n\n"
+    "Bond resistance:\n"
+    "  R_bond = L_bond * pi * d * alpha * tau / FS\n\n"
+    "Vertical component:\n"
+    "  V = P_prestress * sin( abs(angle) )\n"
+)
+
+# (coluna do dataframe, cabeçalho, largura mm, formato)
+SUMMARY_COLS = [
+    ("Anchor", "N", 14, "{:.0f}"),
+    ("L_free (m)", "L_free", 20, "{:.2f}"),
+    ("L_bond (m)", "L_bond", 20, "{:.2f}"),
+    ("Prestress (kN)", "Prestress", 24, "{:.2f}"),
+    ("P_block (kN)", "P_block", 24, "{:.2f}"),
+    ("Pmax (kN)", "P_max", 22, "{:.2f}"),
+    ("Block Check", "Block", 18, "{}"),
+    ("Bond Resistance (kN)", "R_bond", 28, "{:.2f}"),
+    ("Bond Check", "Bond", 18, "{}"),
+]
+
+EXCLUSION_COLS = [
+    ("Anchor", "N", 16, "{:.0f}"),
+    ("Part", "Part", 20, "{}"),
+    ("Zone", "Zone", 60, "{}"),
+    ("Distance (m)", "Distance", 26, "{:.3f}"),
+    ("Clearance (m)", "Clearance", 26, "{:.2f}"),
+    ("Status", "Status", 30, "{}"),
+]
+
+BULB_COLS = [
+    ("Anchor", "N", 20, "{:.0f}"),
+    ("Prestress", "Prestress", 40, "{:.2f}"),
+    ("Angle", "Angle", 30, "{:.1f}"),
+    ("V", "V", 40, "{:.2f}"),
+]
+
+
+def _title_page(title, n_sections):
+    pdf = Canvas()
+    pdf.set_font("B", 16)
+    pdf.cell(0, 10, title, ln=True, align="C")
+    pdf.ln(5)
+
+    pdf.set_font("", 11)
+    pdf.multi_cell(
+        0,
+        6,
+        "This report presents the geometry, design parameters, "
+        "bond verification and bulb load verification for ground anchors."
+    )
+    if n_sections is not None:
+        pdf.cell(0, 6, f"Sections: {n_sections}", ln=True)
+    pdf.ln(8)
+
+    pdf.set_font("B", 13)
+    pdf.cell(0, 8, "Equations Used", ln=True)
+    pdf.set_font("", 10)
+    pdf.multi_cell(0, 5, EQUATIONS)
+    return pdf.fragment()
+
+
+def _section_page(name, p):
+    pdf = Canvas()
+    pdf.set_font("B", 12)
+    pdf.cell(0, 8, f"Section: {name}", ln=True)
+    pdf.ln(5)
+
+    pdf.set_font("B", 13)
+    pdf.cell(0, 8, "Global Parameters", ln=True)
+
+    pdf.set_font("", 10)
+    pdf.multi_cell(
+        0,
+        5,
+        f"E = {p.get('E')} MPa\n"
+        f"As = {p.get('A_strand')} mm2 per strand\n"
+        f"Wedge slip = {p.get('delta_L')} mm\n"
+        f"Allowable steel stress = {p.get('f_steel', 1440)} MPa\n"
+        f"Borehole ID = {p.get('borehole_id')}\n"
+        f"Borehole X position = {p.get('borehole_x')} m\n"
+        f"Wall thickness = {p.get('esp')} m\n"
+        f"Anchor spacing = {p.get('afast')} m\n"
+        f"Influence area = {p.get('A_inf')} m\n"
+    )
+    return pdf.fragment()
+
+
+def _anchor_page(row):
+    pdf = Canvas()
+    pdf.set_font("B", 14)
+    pdf.cell(0, 8, f"Anchor {int(row['Anchor'])}", ln=True)
+    pdf.ln(3)
+
+    pdf.set_font("", 10)
+    pdf.multi_cell(
+        0,
+        5,
+        "Coordinates:\n"
+        f"  X1 = {row['X1']:.2f}, Y1 = {row['Y1']:.2f}\n"
+        f"  X2 = {row['X2']:.2f}, Y2 = {row['Y2']:.2f}\n"
+        f"  X3 = {row['X3']:.2f}, Y3 = {row['Y3']:.2f}\n\n"
+        "Lengths:\n"
+        f"  Free length = {row['L_free (m)']:.2f} m\n"
+        f"  Bond length = {row['L_bond (m)']:.2f} m\n\n"
+    )
+
+    # efeito de grupo 3D: R_bond já reduzido por eta
+    eta = f"Group factor eta = {row['Group eta']:.3f}\n" if "Group eta" in row else ""
+    pdf.multi_cell(
+        0,
+        5,
+        f"Steel area A = {row['Steel Area (mm2)']:.0f} mm2\n"
+        f"Prestress = {row['Prestress (kN)']:.2f} kN\n"
+        f"Slip loss = {row['Slip Loss (kN)']:.2f} kN\n"
+        f"P_block = {row['P_block (kN)']:.2f} kN\n"
+        f"P_max = {row['Pmax (kN)']:.2f} kN\n"
+        f"Block check = {row['Block Check']}\n\n"
+        f"{eta}"
+        f"Bond resistance = {row['Bond Resistance (kN)']:.2f} kN\n"
+        f"Bond check = {row['Bond Check']}\n"
+    )
+    return pdf.fragment()
+
+
+def _table_page(heading, cols, rows, lines=None,
+                caption="Anchor vertical components:"):
+    """
+    Página de tabela; `lines` são linhas de texto antes da tabela, seguidas
+    de `caption` (None = sem título da tabela).
+    """
+    pdf = Canvas()
+    pdf.set_font("B", 14)
+    pdf.cell(0, 10, heading, ln=True)
+
+    if lines:
+        pdf.set_font("", 11)
+        pdf.ln(5)
+        for txt in lines:
+            pdf.cell(0, 8, txt, ln=True)
+        pdf.ln(8)
+        if caption:
+            pdf.set_font("B", 12)
+            pdf.cell(0, 8, caption, ln=True)
+
+    compact = len(cols) > 4
+    h = 6 if compact else 8
+    pdf.set_font("B", 8 if compact else 10)
+    for _, label, w, _ in cols:
+        pdf.cell(w, h, label, border=1)
+    pdf.ln()
+
+    pdf.set_font("", 8 if compact else 10)
+    for row in rows:
+        for (_, _, w, fmt), v in zip(cols, row):
+            pdf.cell(w, h, fmt.format(v), border=1)
+        pdf.ln()
+    return pdf.fragment()
+
+
+def _graph_page(image):
+    name, size = image[0], image[1]
+    pdf = Canvas()
+    pdf.set_font("B", 14)
+    pdf.cell(0, 10, "Anchorage Geometry", ln=True, align="C")
+    w, h = 190, 190 * size[1] / size[0]
+    if h > 255:
+        w, h = w * 255 / h, 255
+    pdf.image(name, 10, 30, w, h)
+    return pdf.fragment()
+
+
+def _raster_image(section, dpi, cache):
+    """
+    Rasteriza a figura da secção ("fig" matplotlib ou "graph_path" PNG).
+    Devolve (nome, (largura, altura), dados comprimidos); o nome é o hash
+    dos pixels, pelo que imagens iguais partilham o mesmo XObject.
+    """
+    from PIL import Image
+
+    src = section.get("fig")
+    if src is not None:
+        buf = io.BytesIO()
+        src.savefig(buf, format="png", dpi=dpi, bbox_inches="tight")
+        buf.seek(0)
+    else:
+        buf = section["graph_path"]
+
+    with Image.open(buf) as im:
+        im = im.convert("RGB")
+        size = im.size
+        rgb = im.tobytes()
+
+    name = "Im" + hashlib.sha256(rgb).hexdigest()[:16]
+    data = _render(cache, "image", name, lambda: zlib.compress(rgb, 6))
+    return name, size, data
+
+
+def _fit(points, box_w, box_h):
+    """Escala/origem para desenhar pontos (x, y) numa caixa, eixos iguais."""
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    x0, x1 = min(xs), max(xs)
+    y0, y1 = min(ys), max(ys)
+    s = min(box_w / max(x1 - x0, 1e-6), box_h / max(y1 - y0, 1e-6))
+    return s, x0, y1
+
+
+def _vector_page(df, geo):
+    """
+    Geometria desenhada directamente como traços PDF (sem raster):
+    comprimentos livres/selados, parede, escavação, estratigrafia, sondagem,
+    zonas de exclusão (geo["zones"]) e plano de Kranz condicionante
+    (geo["kranz"]), se existirem.
+    """
+    x_ref = geo["x_ref"]
+    y_excav, y_wall = geo["y_excav"], geo["y_wall"]
+    bx = geo.get("borehole_x")
+    strat = geo.get("stratigraphy", [])
+
+    coords = df[["X1", "Y1", "X2", "Y2", "X3", "Y3"]].to_numpy(dtype=float)
+    pts = [(x_ref, y_excav), (x_ref, y_wall), (x_ref - geo["L_excav"], y_excav)]
+    if len(coords):
+        pts += [(coords[:, 0].min(), coords[:, [1, 3, 5]].min()),
+                (coords[:, [0, 2, 4]].max(), coords[:, 1].max())]
+    pts += [(x_ref + lay["L"], lay["y"]) for lay in strat]
+    extra = geo.get("boreholes", [])
+    if bx is not None:
+        pts += [(bx, y_excav - 3), (bx, y_wall)]
+    pts += [(b["x"], y_excav - 3) for b in extra]
+    kr = geo.get("kranz")
+    if kr:
+        pts += [tuple(p) for p in kr["points"]]
+    zones = geo.get("zones") or []
+    for z in zones:
+        pts += [tuple(p) for p in z["points"]]
+
+    left, top, box_w, box_h = 15.0, 30.0, 160.0, 230.0
+    s, x0, y1 = _fit(pts, box_w, box_h)
+
+    def X(x):
+        return left + (x - x0) * s
+
+    def Y(y):
+        return top + (y1 - y) * s
+
+    pdf = Canvas()
+    pdf.set_font("B", 14)
+    pdf.cell(0, 10, "Anchorage Geometry", ln=True, align="C")
+    pdf.set_font("", 6)
+
+    # parede + escavação
+    pdf.set_line_width(0.8)
+    pdf.line(X(x_ref), Y(y_excav), X(x_ref), Y(y_wall))
+    pdf.set_line_width(0.5)
+    pdf.line(X(x_ref), Y(y_excav), X(x_ref - geo["L_excav"]), Y(y_excav))
+
+    # estratigrafia
+    pdf.set_line_width(0.2)
+    pdf.set_dash(0.5, 1.0)
+    for lay in strat:
+        pdf.line(X(x_ref), Y(lay["y"]), X(x_ref + lay["L"]), Y(lay["y"]))
+        pdf.text(X(x_ref + lay["L"]) + 1, Y(lay["y"]) - 0.5,
+                 f"{lay['name']} ({lay['y']:.2f} m)")
+
+    # ancoragens
+    label = len(coords) <= 200
+    pdf.set_line_width(0.3)
+    for k, (xa, ya, xb, yb, xc, yc) in enumerate(coords):
+        pdf.set_dash()
+        pdf.set_draw_color(31, 119, 180)
+        pdf.line(X(xa), Y(ya), X(xb), Y(yb))
+        pdf.set_dash(1.5, 1.0)
+        pdf.set_draw_color(44, 160, 44)
+        pdf.line(X(xb), Y(yb), X(xc), Y(yc))
+        if label:
+            pdf.text(X(xa) - 6, Y(ya) - 1, f"A{int(df['Anchor'].iloc[k])}")
+
+    # zonas de exclusão
+    if zones:
+        pdf.set_dash()
+        pdf.set_line_width(0.4)
+        pdf.set_draw_color(140, 86, 75)
+        for z in zones:
+            p = z["points"] + (z["points"][:1] if z["closed"] else [])
+            for (xa, ya), (xb, yb) in zip(p[:-1], p[1:]):
+                pdf.line(X(xa), Y(ya), X(xb), Y(yb))
+        pdf.set_draw_color(0, 0, 0)
+
+    # plano profundo condicionante (Kranz)
+    if kr:
+        pdf.set_dash(3.0, 1.0)
+        pdf.set_line_width(0.4)
+        pdf.set_draw_color(148, 103, 189)
+        pdf.set_text_color(148, 103, 189)
+        (xf, yf), (xb, yb), (xt, yt) = kr["points"]
+        pdf.line(X(xf), Y(yf), X(xb), Y(yb))
+        pdf.line(X(xb), Y(yb), X(xt), Y(yt))
+        pdf.text(X(xb) + 1, Y(yb) + 3, f"Kranz FS = {kr['FS']:.2f}")
+        pdf.set_text_color(0, 0, 0)
+
+    # sondagens
+    holes = [{"id": geo.get("borehole_id", ""), "x": bx}] if bx is not None else []
+    pdf.set_font("", 8)
+    for b in holes + list(extra):
+        pdf.set_draw_color(214, 39, 40)
+        pdf.set_text_color(214, 39, 40)
+        pdf.set_dash(2.0, 1.0)
+        pdf.set_line_width(0.5)
+        pdf.line(X(b["x"]), Y(y_excav - 3), X(b["x"]), Y(y_wall))
+        pdf.text(X(b["x"]) - 2, Y(y_wall) - 2, str(b["id"]))
+        pdf.set_dash()
+        pdf.set_line_width(0.2)
+        pdf.set_draw_color(0, 0, 0)
+        for lay in b.get("stratigraphy", []):
+            pdf.line(X(b["x"] - 0.5), Y(lay["y"]), X(b["x"] + 0.5), Y(lay["y"]))
+
+    pdf.set_dash()
+    pdf.set_draw_color(0, 0, 0)
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_font("", 8)
+    pdf.text(left, top + box_h + 10, f"Scale 1:{1000 / s:.0f} (A4)")
+    return pdf.fragment()
+
+
+# =============================================================
+# REPORT ASSEMBLY
+# =============================================================
+def _chunks(seq, n):
+    for i in range(0, len(seq), n):
+        yield seq[i:i + n]
+
+
+def _records(df, cols):
+    return df[[c[0] for c in cols]].to_numpy().tolist()
+
+
+def _render(cache, key_kind, payload, render):
+    if cache is None:
+        return render()
+    return cache.get(fragment_key(key_kind, payload), render)
+
+
+def write_section(stream, section, mode="pages", cache=None,
+                  figure="raster", dpi=150):
+    """
+    Escreve as páginas de uma secção no PdfStream.
+
+    section -> dict com "name", "df" (df_res), "df_bh", "params"
+               (parâmetros globais), "bulb" (carga no bolbo), "exclusion"
+               (violações das zonas de exclusão, opcional) e a geometria:
+               "geometry" (vectorial) e/ou "fig" / "graph_path" (raster)
+    figure  -> "vector" (traços PDF) ou "raster" (imagem com `dpi`)
+    """
+    name = section["name"]
+    df = section["df"]
+    params = section.get("params", {})
+    stream.add_page(_render(cache, "section", [name, params],
+                            lambda: _section_page(name, params)))
+
+    # ---------------------------------------------------------
+    # ANCHORS (UMA PÁGINA POR ANCORAGEM OU TABELA COMPACTA)
+    # ---------------------------------------------------------
+    if mode == "summary":
+        rows = _records(df, SUMMARY_COLS)
+        for k, chunk in enumerate(_chunks(rows, SUMMARY_ROWS)):
+            heading = f"{name} - Anchor Summary ({k + 1})"
+            stream.add_page(_render(
+                cache, "summary", [heading, chunk],
+                lambda: _table_page(heading, SUMMARY_COLS, chunk),
+            ))
+    else:
+        for row in df.to_dict("records"):
+            stream.add_page(_render(cache, "anchor", row, lambda: _anchor_page(row)))
+
+    # ---------------------------------------------------------
+    # GEOMETRY PAGE
+    # ---------------------------------------------------------
+    geo = section.get("geometry")
+    if figure == "vector" and geo is not None:
+        payload = [df[["Anchor", "X1", "Y1", "X2", "Y2", "X3", "Y3"]].to_numpy().tolist(), geo]
+        stream.add_page(_render(cache, "vector", payload, lambda: _vector_page(df, geo)))
+    elif section.get("fig") is not None or section.get("graph_path"):
+        img, size, data = _raster_image(section, dpi, cache)
+        stream.add_image(img, size[0], size[1], data)
+        stream.add_page(_render(cache, "graph", [img, size],
+                                lambda: _graph_page((img, size))))
+
+    # ---------------------------------------------------------
+    # EXCLUSION ZONES (VIOLAÇÕES)
+    # ---------------------------------------------------------
+    df_ex = section.get("exclusion")
+    if df_ex is not None:
+        rows = _records(df_ex, EXCLUSION_COLS)
+        if not rows:
+            stream.add_page(_render(
+                cache, "exclusion", [name, []],
+                lambda: _table_page(f"{name} - Exclusion Zones", EXCLUSION_COLS, [],
+                                    ["No clearance violations."], caption=None),
+            ))
+        for k, chunk in enumerate(_chunks(rows, SUMMARY_ROWS)):
+            heading = f"{name} - Exclusion Zone Violations ({k + 1})"
+            stream.add_page(_render(
+                cache, "exclusion", [heading, chunk],
+                lambda: _table_page(heading, EXCLUSION_COLS, chunk),
+            ))
+
+    # ---------------------------------------------------------
+    # BULB LOAD PAGES
+    # ---------------------------------------------------------
+    df_bh = section.get("df_bh")
+    b = section.get("bulb")
+    if b is None or df_bh is None:
+        return
+
+    lines = [
+        f"Wall load = {b['carga_parede']:.2f} kN/m",
+        f"Sum V = {b['V_total']:.2f} kN",
+        f"V per meter = {b['V_metro']:.2f} kN/m",
+        f"Bulb load = {b['C_bolbo']:.2f} kN",
+    ]
+    rows = _records(df_bh, BULB_COLS) if len(df_bh) else []
+    chunks = [rows[:BULB_ROWS_FIRST]] + list(_chunks(rows[BULB_ROWS_FIRST:], BULB_ROWS))
+    for k, chunk in enumerate(chunks):
+        first = lines if k == 0 else None
+        stream.add_page(_render(
+            cache, "bulb", [first, chunk],
+            lambda: _table_page("Bulb Load Verification", BULB_COLS, chunk, first),
+        ))
+
+
+def write_report(fh, sections, mode="pages", cache=None,
+                 title="Anchorage Safety Verification Report", n_sections=None,
+                 figure="raster", dpi=150):
+    """
+    Escreve o relatório completo em fh (ficheiro binário aberto).
+
+    sections -> iterável de secções (pode ser um gerador: cada secção é
+                escrita e libertada antes de ler a seguinte)
+    mode     -> "pages" (uma página por ancoragem) ou "summary" (tabela)
+    cache    -> FragmentCache partilhada entre gerações (None = sem cache)
+    figure   -> "vector" ou "raster"; dpi -> resolução do raster
+    Imagens idênticas entre secções são incorporadas uma única vez.
+    Devolve o número de páginas escritas.
+    """
+    stream = PdfStream(fh)
+    stream.add_page(_render(cache, "title", [title, n_sections],
+                            lambda: _title_page(title, n_sections)))
+    for section in sections:
+        write_section(stream, section, mode=mode, cache=cache,
+                      figure=figure, dpi=dpi)
+    stream.close()
+    return stream.page_count
+
+
+def render_report(sections, **kwargs):
+    """Igual a write_report mas devolve os bytes do PDF."""
+    buf = io.BytesIO()
+    write_report(buf, sections, **kwargs)
+    return buf.getvalue()
@@ -0,0 +1,180 @@
+"""
+Análise de sensibilidade das utilizações de bloco e de selagem.
+
+U_block = P_block / Pmax    U_bond = P_block / R_bond
+
+As fórmulas são as de anchors (slip_loss, bond_resistance). As derivadas
+são analíticas (produtos/quocientes simples) e conferidas nos testes com
+finite_differences; as diferenças finitas e os diagramas tornado são
+avaliados numa única passagem vectorizada sobre a matriz ancoragens x
+variantes.
+"""
+import numpy as np
+import pandas as pd
+
+from anchorage.anchors import E, F_STEEL, anchor_arrays, bond_resistance, slip_loss
+
+# (chave, rótulo); A_strand e delta_L são globais da secção
+PARAMS = [
+    ("prestress", "Prestress"),
+    ("strands", "Strands"),
+    ("A_strand", "A_strand"),
+    ("delta_L", "Wedge slip"),
+    ("free", "Free length"),
+    ("bond", "Bond length"),
+    ("drill_mm", "Drill diameter"),
+    ("alpha", "Alpha"),
+    ("shear_stress", "Shear stress"),
+    ("FS", "FS"),
+]
+
+
+def _inputs(data, A_strand, delta_L):
+    a = anchor_arrays(data)
+    n = len(a["x1"])
+    a["A_strand"] = np.full(n, float(A_strand))
+    a["delta_L"] = np.full(n, float(delta_L))
+    return a
+
+
+def utilizations(v, E=E, f_steel=F_STEEL):
+    """U_block e U_bond para arrays (de qualquer forma compatível)."""
+    A = v["strands"] * v["A_strand"]
+    P = v["prestress"] + slip_loss(A, v["free"], v["delta_L"], E)
+    Pmax = A * f_steel / 1000
+    R = bond_resistance(v["bond"], v["drill_mm"], v["alpha"], v["shear_stress"], v["FS"])
+    return P / Pmax, P / R
+
+
+def derivatives(data, A_strand, delta_L, E=E, f_steel=F_STEEL):
+    """
+    Derivadas analíticas dU/dx por ancoragem.
+    Devolve (df_block, df_bond), uma coluna por parâmetro de PARAMS.
+    """
+    v = _inputs(data, A_strand, delta_L)
+    n, As, dl, Lf = v["strands"], v["A_strand"], v["delta_L"], v["free"]
+    A = n * As
+    slip = slip_loss(A, Lf, dl, E)
+    P = v["prestress"] + slip
+    Pmax = A * f_steel / 1000
+    R = bond_resistance(v["bond"], v["drill_mm"], v["alpha"], v["shear_stress"], v["FS"])
+    zero = np.zeros_like(P)
+
+    # dP/dx para os parâmetros que entram em P_block
+    dP = {
+        "prestress": np.ones_like(P),
+        "strands": slip / n,
+        "A_strand": slip / As,
+        "delta_L": slip_loss(A, Lf, 1.0, E),  # linear em delta_L
+        "free": -slip / Lf,
+    }
+    # dPmax/dx (só A) e dR/dx (R é um produto: dR/dx = ±R/x)
+    dPmax = {"strands": Pmax / n, "A_strand": Pmax / As}
+    dR = {
+        "bond": R / v["bond"],
+        "drill_mm": R / v["drill_mm"],
+        "alpha": R / v["alpha"],
+        "shear_stress": R / v["shear_stress"],
+        "FS": -R / v["FS"],
+    }
+
+    block, bond = {}, {}
+    for key, label in PARAMS:
+        dp = dP.get(key, zero)
+        block[label] = (dp * Pmax - P * dPmax.get(key, zero)) / Pmax ** 2
+        bond[label] = (dp * R - P * dR.get(key, zero)) / R ** 2
+
+    anchors = pd.Index(np.arange(1, len(P) + 1), name="Anchor")
+    return pd.DataFrame(block, index=anchors), pd.DataFrame(bond, index=anchors)
+
+
+def finite_differences(data, A_strand, delta_L, rel=1e-6, E=E, f_steel=F_STEEL):
+    """
+    Derivadas por diferenças finitas centradas, todas as ancoragens e
+    parâmetros numa só avaliação. Mesmo formato de derivatives().
+    """
+    v = _inputs(data, A_strand, delta_L)
+    keys = [k for k, _ in PARAMS]
+    p = len(keys)
+
+    # colunas: +h e -h para cada parâmetro
+    mult = np.ones((2 * p, p))
+    mult[np.arange(p), np.arange(p)] += rel
+    mult[p + np.arange(p), np.arange(p)] -= rel
+
+    grid = {k: v[k][:, None] * mult[None, :, j] for j, k in enumerate(keys)}
+    grid.update({k: v[k][:, None] for k in v if k not in grid})
+    Ub, Ur = utilizations(grid, E, f_steel)
+
+    h = 2 * rel * np.stack([v[k] for k in keys], axis=1)
+    h = np.where(h == 0, np.nan, h)
+    anchors = pd.Index(np.arange(1, len(v["x1"]) + 1), name="Anchor")
+    labels = [lab for _, lab in PARAMS]
+    return (
+        pd.DataFrame((Ub[:, :p] - Ub[:, p:]) / h, index=anchors, columns=labels),
+        pd.DataFrame((Ur[:, :p] - Ur[:, p:]) / h, index=anchors, columns=labels),
+    )
+
+
+def tornado(data, A_strand, delta_L, variation=0.10, E=E, f_steel=F_STEEL):
+    """
+    Utilizações com cada parâmetro a variar ±variation (os restantes fixos),
+    avaliadas numa única passagem.
+
+    Devolve dict com "labels" e, para "U_block" / "U_bond":
+      base (n,), low (n, p), high (n, p) por ancoragem e
+      section_base, section_low (p,), section_high (p,) para a secção
+      (utilização máxima entre as ancoragens).
+    """
+    v = _inputs(data, A_strand, delta_L)
+    keys = [k for k, _ in PARAMS]
+    p = len(keys)
+
+    # coluna 0 = base; 1..p = -variation; p+1..2p = +variation
+    mult = np.ones((2 * p + 1, p))
+    mult[1 + np.arange(p), np.arange(p)] -= variation
+    mult[1 + p + np.arange(p), np.arange(p)] += variation
+
+    grid = {k: v[k][:, None] * mult[None, :, j] for j, k in enumerate(keys)}
+    grid.update({k: v[k][:, None] for k in v if k not in grid})
+    Ub, Ur = utilizations(grid, E, f_steel)
+
+    out = {"labels": [lab for _, lab in PARAMS], "variation": variation}
+    for name, U in (("U_block", Ub), ("U_bond", Ur)):
+        sec = U.max(axis=0) if len(U) else np.full(2 * p + 1, np.nan)
+        out[name] = {
+            "base": U[:, 0],
+            "low": U[:, 1:p + 1],
+            "high": U[:, p + 1:],
+            "section_base": sec[0],
+            "section_low": sec[1:p + 1],
+            "section_high": sec[p + 1:],
+        }
+    return out
+
+
+def tornado_figure(base, low, high, labels, title="", variation=0.10):
+    """Diagrama tornado (matplotlib), barras ordenadas pela amplitude."""
+    import matplotlib.pyplot as plt
+
+    low = np.asarray(low, dtype=float)
+    high = np.asarray(high, dtype=float)
+    order = np.argsort(np.abs(high - low))
+
+    fig, ax = plt.subplots(figsize=(7, 0.35 * len(labels) + 1.2))
+    y = np.arange(len(order))
+    ax.barh(y, low[order] - base, left=base, color="tab:blue",
+            label=f"-{variation:.0%}")
+    ax.barh(y, high[order] - base, left=base, color="tab:orange",
+            label=f"+{variation:.0%}")
+    ax.axvline(base, color="black", linewidth=1)
+    if base < 1.0 < max(low.max(), high.max()) or abs(base - 1.0) < 0.25:
+        ax.axvline(1.0, color="red", linestyle="--", linewidth=1)
+    ax.set_yticks(y)
+    ax.set_yticklabels([labels[i] for i in order])
+    ax.set_xlabel("Utilization")
+    ax.set_title(title)
+    ax.legend(loc="lower right", fontsize=8)
+    ax.grid(True, axis="x")
+    fig.tight_layout()
+    return fig
@@ -0,0 +1,472 @@
+"""
+Serviço HTTP local de verificação de ancoragens (sem a interface Streamlit).
+
+    python -m anchorage.service --port 8765
+
+POST /verify
+    JSON (Content-Type: application/json):
+        {"anchors": [{"x1": 0, "y1": 8, "angle": -25, ...}, ...],
+         "A_strand": 140, "delta_L": 6, "f_steel": 1440,
+         "y_wall": 5, "y_excav": 0, "esp": 0.3, "afast": 3, "A_inf": 1.5}
+    ou {"sections": [secção, secção, ...]} para várias secções num pedido
+    (avaliadas numa única passagem vectorizada).
+    Resposta por secção: {"columns": [...colunas de df_res...],
+    "data": [[...], ...], "bulb": {...}}.
+
+    Binário (Content-Type: application/octet-stream):
+        b"ANC1" + uint32 LE (tamanho do cabeçalho) + cabeçalho JSON
+        {"sections": [{"n": 10, "A_strand": 140, ...}, ...]}
+        + float64 LE, (soma dos n) x 11 colunas pela ordem ANCHOR_KEYS.
+    A resposta usa o mesmo envelope: cabeçalho {"columns", "sections":
+    [{"n", "bulb"}]} + matriz float64 com as colunas numéricas de df_res
+    (Block/Bond Check: 1.0 = OK, 0.0 = FAIL).
+
+    Excel (Content-Type: application/vnd.openxmlformats-officedocument.
+    spreadsheetml.sheet): livro com uma folha por secção, colunas do CSV
+    (ver imports.iter_workbook); resposta {"results": [...]} como no JSON,
+    enviada em Transfer-Encoding: chunked, um pedaço por lote de
+    BATCH_ANCHORS ancoragens (o corpo completo nunca fica em memória).
+    Erros de leitura antes do primeiro lote dão 400; um erro a meio
+    fecha a ligação sem o pedaço final (resposta incompleta).
+
+GET /health -> {"status": "ok"}
+
+As ligações são HTTP/1.1 keep-alive. O corpo tem de trazer Content-Length
+(sem ele: 411; inválido ou negativo: 400). O JSON é estrito nos dois
+sentidos: NaN/Infinity no pedido dão 400 e os valores não finitos dos
+resultados (p.ex. afast = 0) saem como null. O pedido, cada secção e
+cada ancoragem têm de ser objectos JSON (senão 400).
+
+Débito medido com benchmarks/bench_service.py (1 ligação keep-alive,
+1 núcleo), em ancoragens/s:
+
+    lote        JSON      binário
+    1            470          390
+    10         5 100        3 500
+    100       25 000       33 000
+    1 000     34 000      270 000
+    10 000    47 000      440 000
+
+Até ~100 ancoragens por pedido domina o custo fixo do HTTP (~2 ms);
+acima disso, no JSON domina a (des)serialização e convém usar o
+formato binário ou agrupar várias secções no mesmo pedido.
+"""
+import argparse
+import io
+import itertools
+import json
+import struct
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from anchorage import imports
+from anchorage.anchors import (
+    ANCHOR_DEFAULTS, ANCHOR_KEYS, E, F_STEEL, bulb_load, compute_anchors,
+)
+
+MAGIC = b"ANC1"
+MAX_BODY = 64 * 1024 * 1024
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+BATCH_ANCHORS = 20_000
+
+SECTION_DEFAULTS = {
+    "A_strand": 140.0,
+    "delta_L": 6.0,
+    "f_steel": F_STEEL,
+    "E": E,
+    "y_wall": 5.0,
+    "y_excav": 0.0,
+    "esp": 0.30,
+    "afast": 3.0,
+    "A_inf": 1.5,
+}
+
+
+class RequestError(ValueError):
+    """Pedido inválido (responde 400)."""
+
+
+def _reject_constant(name):
+    raise RequestError(f"{name} is not valid JSON")
+
+
+def loads_strict(raw):
+    """json.loads sem NaN / Infinity / -Infinity (RequestError)."""
+    return json.loads(raw, parse_constant=_reject_constant)
+
+
+def _object(v, what):
+    """v tem de ser um objecto JSON (dict); senão RequestError."""
+    if not isinstance(v, dict):
+        raise RequestError(f"{what} must be a JSON object")
+    return v
+
+
+def _objects(v, what):
+    """v tem de ser uma lista de objectos JSON; senão RequestError."""
+    if not isinstance(v, list):
+        raise RequestError(f"{what} must be a list")
+    for x in v:
+        _object(x, f"each item of {what}")
+    return v
+
+
+def dumps_strict(obj):
+    """json.dumps com allow_nan=False (os não finitos já vêm como None)."""
+    return json.dumps(obj, allow_nan=False).encode("utf-8")
+
+
+def finite(v):
+    """Cópia de v (dicts / listas / floats) com NaN e ±Inf -> None."""
+    if isinstance(v, dict):
+        return {k: finite(x) for k, x in v.items()}
+    if isinstance(v, (list, tuple)):
+        return [finite(x) for x in v]
+    if isinstance(v, float) and not np.isfinite(v):
+        return None
+    return v
+
+
+# =============================================================
+# BATCH COMPUTATION
+# =============================================================
+def _anchor_matrix(anchors):
+    """Lista de dicts (chaves do CSV, case-insensitive) -> matriz n x 11."""
+    rows = []
+    for a in _objects(anchors, "anchors"):
+        low = {str(k).lower(): v for k, v in a.items()}
+        missing = [k for k in ("x1", "y1", "angle", "free", "bond") if k not in low]
+        if missing:
+            raise RequestError(f"anchor without {', '.join(missing)}")
+        rows.append([
+            float(low.get(k.lower(), ANCHOR_DEFAULTS[k])) for k in ANCHOR_KEYS
+        ])
+    return np.array(rows, dtype=float).reshape(-1, len(ANCHOR_KEYS))
+
+
+def verify_batch(sections, matrix=None):
+    """
+    Verifica várias secções numa só passagem.
+
+    sections -> lista de dicts com os parâmetros de cada secção e "anchors"
+                (ou "n" quando `matrix` traz as ancoragens já em float64)
+    Devolve (df_all, offsets, bulbs): df_all com as colunas de df_res para
+    todas as ancoragens, offsets para separar as secções e a carga no
+    bolbo de cada secção.
+    """
+    _objects(sections, "sections")
+    if matrix is None:
+        blocks = [_anchor_matrix(s.get("anchors", [])) for s in sections]
+        counts = [len(b) for b in blocks]
+        matrix = np.vstack(blocks) if blocks else np.empty((0, len(ANCHOR_KEYS)))
+    else:
+        counts = [int(s.get("n", 0)) for s in sections]
+        if sum(counts) != len(matrix):
+            raise RequestError("section sizes do not match the anchor matrix")
+
+    params = [{**SECTION_DEFAULTS, **{k: s[k] for k in SECTION_DEFAULTS if k in s}}
+              for s in sections]
+    if any(p["afast"] == 0 for p in params):
+        raise RequestError("afast must be non-zero")
+
+    def per_anchor(key):
+        return np.repeat([float(p[key]) for p in params], counts)
+
+    df_in = pd.DataFrame(matrix, columns=ANCHOR_KEYS)
+    df_all = compute_anchors(
+        df_in,
+        per_anchor("A_strand"),
+        per_anchor("delta_L"),
+        E=per_anchor("E"),
+        f_steel=per_anchor("f_steel"),
+    )
+
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype(int)
+    # numeração por secção
+    df_all["Anchor"] = np.arange(len(df_all)) - np.repeat(offsets[:-1], counts) + 1
+
+    bulbs = []
+    for k, p in enumerate(params):
+        sl = slice(offsets[k], offsets[k + 1])
+        _, carga_parede, V_total, V_metro, C_bolbo = bulb_load(
+            matrix[sl, ANCHOR_KEYS.index("prestress")],
+            matrix[sl, ANCHOR_KEYS.index("angle")],
+            float(p["y_wall"]) - float(p["y_excav"]),
+            float(p["esp"]), float(p["afast"]), float(p["A_inf"]),
+        )
+        bulbs.append({"carga_parede": carga_parede, "V_total": V_total,
+                      "V_metro": V_metro, "C_bolbo": C_bolbo})
+    return df_all, offsets, bulbs
+
+
+def _workbook_section(sheet, defaults):
+    """Folha de imports.iter_workbook -> (secção com "n", matriz n x 11)."""
+    block = _anchor_matrix(sheet["anchors"])
+    geo = {str(k).lower(): v for k, v in sheet["geo"].items()}
+    section = {**(defaults or {}), "name": sheet["name"], "n": len(block)}
+    for k in SECTION_DEFAULTS:
+        if geo.get(k.lower()) is not None:
+            section[k] = float(geo[k.lower()])
+    return section, block
+
+
+def verify_workbook(source, defaults=None, max_anchors=BATCH_ANCHORS):
+    """
+    Verifica um livro Excel (uma folha por secção) em lotes.
+
+    source      -> caminho ou bytes do .xlsx
+    defaults    -> parâmetros das secções sem valor na folha
+    max_anchors -> ancoragens por lote (uma secção nunca é partida)
+
+    As folhas são lidas em streaming e convertidas logo em float64; cada
+    lote de secções passa por verify_batch. Gera (sections, df_all,
+    offsets, bulbs) por lote, pelo que a memória fica limitada ao lote
+    corrente.
+    """
+    sections, blocks, n = [], [], 0
+    for sheet in imports.iter_workbook(source):
+        section, block = _workbook_section(sheet, defaults)
+        if sections and n + len(block) > max_anchors:
+            yield (sections, *verify_batch(sections, np.vstack(blocks)))
+            sections, blocks, n = [], [], 0
+        sections.append(section)
+        blocks.append(block)
+        n += len(block)
+    if sections:
+        yield (sections, *verify_batch(sections, np.vstack(blocks)))
+
+
+# =============================================================
+# ENCODING
+# =============================================================
+def numeric_columns(df):
+    return [c for c in df.columns if c not in ("Block Check", "Bond Check")] \
+        + ["Block Check", "Bond Check"]
+
+
+def json_rows(df):
+    """Linhas de df como listas JSON, com NaN / ±Inf -> None."""
+    data = df.to_numpy(dtype=object)
+    num = [i for i, c in enumerate(df.columns) if df[c].dtype.kind == "f"]
+    if num:
+        bad = ~np.isfinite(df.iloc[:, num].to_numpy(float))
+        if bad.any():
+            block = data[:, num]
+            block[bad] = None
+            data[:, num] = block
+    return data.tolist()
+
+
+def json_results(sections, df_all, offsets, bulbs):
+    results = []
+    for k, s in enumerate(sections):
+        part = df_all.iloc[offsets[k]:offsets[k + 1]]
+        results.append({
+            "name": s.get("name", f"Section {k + 1}"),
+            "columns": list(part.columns),
+            "data": json_rows(part),
+            "bulb": finite(bulbs[k]),
+        })
+    return results
+
+
+def encode_json(sections, df_all, offsets, bulbs, single):
+    results = json_results(sections, df_all, offsets, bulbs)
+    return dumps_strict(results[0] if single else {"results": results})
+
+
+def encode_workbook(batches):
+    """
+    Resposta {"results": [...]} de verify_workbook em pedaços de bytes,
+    um por lote, para enviar em Transfer-Encoding: chunked.
+    """
+    yield b'{"results": ['
+    sep = b""
+    for batch in batches:
+        body = dumps_strict(json_results(*batch))[1:-1]
+        if body:
+            yield sep + body
+            sep = b", "
+    yield b"]}"
+
+
+def encode_binary(df_all, offsets, bulbs):
+    cols = numeric_columns(df_all)
+    out = df_all[cols].copy()
+    for c in ("Block Check", "Bond Check"):
+        out[c] = (out[c] == "OK").astype(float)
+    header = dumps_strict({
+        "columns": cols,
+        "sections": [
+            {"n": int(offsets[k + 1] - offsets[k]), "bulb": finite(b)}
+            for k, b in enumerate(bulbs)
+        ],
+    })
+    return MAGIC + struct.pack("<I", len(header)) + header \
+        + out.to_numpy(dtype="<f8").tobytes()
+
+
+def decode_binary(body):
+    """Envelope binário -> (cabeçalho, matriz float64)."""
+    if body[:4] != MAGIC or len(body) < 8:
+        raise RequestError("bad binary envelope")
+    (n,) = struct.unpack("<I", body[4:8])
+    header = _object(loads_strict(body[8:8 + n]), "binary header")
+    data = np.frombuffer(body[8 + n:], dtype="<f8")
+    if data.size % len(ANCHOR_KEYS):
+        raise RequestError("anchor matrix size is not a multiple of 11")
+    return header, data.reshape(-1, len(ANCHOR_KEYS))
+
+
+def encode_request(sections, anchors_by_section):
+    """Cliente: constrói um pedido binário (ver decode_binary)."""
+    blocks = [_anchor_matrix(a) for a in anchors_by_section]
+    header = dumps_strict({
+        "sections": [{**s, "n": len(b)} for s, b in zip(sections, blocks)]
+    })
+    mat = np.vstack(blocks) if blocks else np.empty((0, len(ANCHOR_KEYS)))
+    return MAGIC + struct.pack("<I", len(header)) + header + mat.astype("<f8").tobytes()
+
+
+def decode_response(body):
+    """Cliente: resposta binária -> lista de (df_res, bulb) por secção."""
+    (n,) = struct.unpack("<I", body[4:8])
+    header = json.loads(body[8:8 + n])
+    cols = header["columns"]
+    mat = np.frombuffer(body[8 + n:], dtype="<f8").reshape(-1, len(cols))
+    out, i = [], 0
+    for s in header["sections"]:
+        df = pd.DataFrame(mat[i:i + s["n"]], columns=cols)
+        for c in ("Block Check", "Bond Check"):
+            df[c] = np.where(df[c] > 0.5, "OK", "FAIL")
+        out.append((df, s["bulb"]))
+        i += s["n"]
+    return out
+
+
+# =============================================================
+# HTTP
+# =============================================================
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    # cabeçalho e corpo saem em escritas separadas: sem TCP_NODELAY o
+    # ACK atrasado do cliente acrescenta ~40 ms a cada pedido
+    disable_nagle_algorithm = True
+    server_version = "AnchorageService/1"
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _send(self, code, body, ctype="application/json"):
+        self.send_response(code)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_chunked(self, chunks, ctype="application/json"):
+        """200 com Transfer-Encoding: chunked, um pedaço por item de chunks."""
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for chunk in chunks:
+                if chunk:
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+        except Exception as e:
+            # cabeçalhos já enviados: sem o pedaço final o cliente vê a
+            # resposta como incompleta
+            self.log_error("aborted chunked response: %s", e)
+            self.close_connection = True
+            return
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _error(self, code, msg):
+        self._send(code, json.dumps({"error": msg}).encode("utf-8"))
+
+    def _body_length(self):
+        """Content-Length validado; None depois de responder 411/400/413."""
+        raw = self.headers.get("Content-Length")
+        if raw is None:
+            code, msg = 411, "Content-Length required"
+        elif not (raw.strip().isascii() and raw.strip().isdigit()):
+            code, msg = 400, "invalid Content-Length"
+        elif int(raw) > MAX_BODY:
+            code, msg = 413, "request body too large"
+        else:
+            return int(raw)
+        # o corpo não pode ser lido com segurança: a ligação é fechada
+        self.close_connection = True
+        self._error(code, msg)
+        return None
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, b'{"status": "ok"}')
+        else:
+            self._error(404, "not found")
+
+    def do_POST(self):
+        if self.path != "/verify":
+            self._error(404, "not found")
+            return
+
+        length = self._body_length()
+        if length is None:
+            return
+        body = self.rfile.read(length)
+        ctype = (self.headers.get("Content-Type") or "").split(";")[0].strip()
+
+        try:
+            if ctype == "application/octet-stream":
+                header, matrix = decode_binary(body)
+                sections = header.get("sections", [])
+                df_all, offsets, bulbs = verify_batch(sections, matrix)
+                self._send(200, encode_binary(df_all, offsets, bulbs),
+                           "application/octet-stream")
+            elif ctype == XLSX:
+                batches = verify_workbook(io.BytesIO(body), max_anchors=BATCH_ANCHORS)
+                # primeiro lote antes dos cabeçalhos: erros de leitura ainda dão 400
+                first = next(batches, None)
+                rest = [] if first is None else itertools.chain([first], batches)
+                self._send_chunked(encode_workbook(rest))
+            else:
+                req = _object(loads_strict(body or b"{}"), "request")
+                single = "sections" not in req
+                sections = [req] if single else req["sections"]
+                df_all, offsets, bulbs = verify_batch(sections)
+                self._send(200, encode_json(sections, df_all, offsets, bulbs, single))
+        except (RequestError, ValueError, KeyError, TypeError) as e:
+            self._error(400, str(e))
+
+
+def make_server(host="127.0.0.1", port=8765, verbose=False):
+    srv = ThreadingHTTPServer((host, port), Handler)
+    srv.daemon_threads = True
+    srv.verbose = verbose
+    return srv
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Anchor verification HTTP service")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--verbose", action="store_true")
+    args = ap.parse_args(argv)
+
+    srv = make_server(args.host, args.port, args.verbose)
+    print(f"Serving on http://{args.host}:{srv.server_address[1]}")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+
+
+if __name__ == "__main__":
+    main()
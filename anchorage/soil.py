@@ -0,0 +1,93 @@
+"""
+Parâmetros do terreno por camada e pressões de terras numa grelha fina.
+
+Cada camada da estratigrafia é {"name", "y" (cota do topo), "gamma"
+(kN/m³), "phi" (graus), "c" (kPa)}; os valores em falta usam
+SOIL_DEFAULTS. Acima do topo da primeira camada usa-se a camada mais
+alta.
+
+Impulso activo (Rankine, paramento vertical liso, terreno horizontal),
+com sobrecarga q à superfície e nível freático y_water (opcional):
+
+    u   = γ_w · max(y_water - y, 0)
+    σ'_v = q + Σ (γ - γ_w abaixo do freático) dz
+    Ka  = tan²(45° - φ/2)
+    σ_a = max(Ka σ'_v - 2 c √Ka, 0)
+    σ_h = σ_a + u
+"""
+import numpy as np
+
+SOIL_DEFAULTS = {"gamma": 19.0, "phi": 30.0, "c": 0.0}
+GAMMA_W = 10.0  # kN/m³
+GRID_STEP = 0.05  # m
+
+
+def layer_table(stratigraphy):
+    """Topos e parâmetros das camadas por ordem decrescente de cota."""
+    lays = sorted(stratigraphy or [], key=lambda lay: -float(lay["y"]))
+    if not lays:
+        lays = [{"name": "Soil", "y": np.inf}]
+    return {
+        "names": [str(lay.get("name", "")) for lay in lays],
+        "tops": np.array([float(lay["y"]) for lay in lays]),
+        **{k: np.array([float(lay.get(k, d) if lay.get(k) is not None else d)
+                        for lay in lays])
+           for k, d in SOIL_DEFAULTS.items()},
+    }
+
+
+def layer_index(table, y):
+    """Índice da camada que contém cada cota y (a de topo mais baixo acima de y)."""
+    y = np.asarray(y, dtype=float)
+    # tops decrescentes: número de topos >= y, menos um
+    idx = (table["tops"][None, :] >= y[..., None]).sum(axis=-1) - 1
+    return np.clip(idx, 0, len(table["tops"]) - 1)
+
+
+def params_at(table, y):
+    """gamma, phi (graus) e c nas cotas y."""
+    i = layer_index(table, y)
+    return table["gamma"][i], table["phi"][i], table["c"][i]
+
+
+def active_profile(stratigraphy, y_top, y_bottom, step=GRID_STEP,
+                   y_water=None, surcharge=0.0, gamma_w=GAMMA_W):
+    """
+    Tensões na grelha y_top -> y_bottom (descendente).
+
+    y_water   -> cota do nível freático (None = sem água)
+    surcharge -> sobrecarga uniforme à superfície (kPa)
+
+    Devolve dict com y, gamma, phi, c, sigma_v (efectiva), u, Ka, sigma_a,
+    sigma_h (= sigma_a + u) e E (impulso de sigma_h acumulado desde y_top,
+    kN/m).
+    """
+    n = max(2, int(np.ceil((y_top - y_bottom) / step)) + 1)
+    y = np.linspace(y_top, y_bottom, n)
+    table = layer_table(stratigraphy)
+    # parâmetros a meio de cada intervalo
+    ym = (y[1:] + y[:-1]) / 2
+    gamma, phi, c = params_at(table, ym)
+    dz = y[:-1] - y[1:]
+
+    if y_water is None:
+        u = np.zeros(n)
+    else:
+        u = gamma_w * np.maximum(y_water - y, 0.0)
+        gamma = np.where(ym < y_water, gamma - gamma_w, gamma)
+
+    sigma_v = surcharge + np.concatenate([[0.0], np.cumsum(gamma * dz)])
+    g, p, cc = params_at(table, y)
+    Ka = np.tan(np.radians(45 - p / 2)) ** 2
+    sigma_a = np.maximum(Ka * sigma_v - 2 * cc * np.sqrt(Ka), 0.0)
+    sigma_h = sigma_a + u
+    E = np.concatenate([[0.0], np.cumsum((sigma_h[1:] + sigma_h[:-1]) / 2 * dz)])
+
+    return {"y": y, "gamma": g, "phi": p, "c": cc, "sigma_v": sigma_v, "u": u,
+            "Ka": Ka, "sigma_a": sigma_a, "sigma_h": sigma_h, "E": E}
+
+
+def thrust_above(profile, y):
+    """Impulso activo entre o topo da grelha e a cota y (interpolado)."""
+    # np.interp precisa de abcissas crescentes
+    return np.interp(y, profile["y"][::-1], profile["E"][::-1])
@@ -0,0 +1,135 @@
+"""
+Índice espacial em grelha uniforme (2D ou 3D) para caixas alinhadas com
+os eixos.
+
+Cada caixa é registada em todas as células que cobre; as chaves das
+células ficam num array ordenado, e uma consulta localiza as suas
+células com np.searchsorted. Cada par sobreposto é devolvido uma única
+vez (na célula do canto inferior da intersecção), sem deduplicação por
+ordenação. Construção e consultas são vectorizadas:
+
+    grid = BoxGrid(lo, hi, cell)          # lo, hi -> (n, d)
+    qi, it = grid.query(qlo, qhi)         # pares (consulta, caixa) sobrepostos
+"""
+import numpy as np
+
+
+def _expand(i0, i1):
+    """
+    Células de cada intervalo [i0, i1] (arrays (n, d) de índices).
+    Devolve (dono, índices (m, d)).
+    """
+    ext = i1 - i0 + 1
+    cnt = np.where((ext > 0).all(axis=1), np.prod(np.maximum(ext, 0), axis=1), 0)
+    owner = np.repeat(np.arange(len(cnt)), cnt)
+    local = np.arange(cnt.sum()) - np.repeat(np.cumsum(cnt) - cnt, cnt)
+
+    idx = np.empty((len(owner), i0.shape[1]), dtype=np.int64)
+    for d in range(i0.shape[1] - 1, -1, -1):
+        e = ext[owner, d]
+        idx[:, d] = i0[owner, d] + local % e
+        local = local // e
+    return owner, idx
+
+
+class BoxGrid:
+    """
+    Caixas [lo, hi] (arrays (n, d)) registadas nas células que cobrem.
+    cell -> lado das células (escalar ou um valor por eixo)
+    """
+
+    def __init__(self, lo, hi, cell):
+        # column-major: as colunas de uma coordenada ficam contíguas
+        self.lo = np.asfortranarray(np.atleast_2d(np.asarray(lo, dtype=float)))
+        self.hi = np.asfortranarray(np.atleast_2d(np.asarray(hi, dtype=float)))
+        self.cell = np.broadcast_to(np.asarray(cell, dtype=float), self.lo.shape[1:]).copy()
+        self.origin = self.lo.min(axis=0)
+        self.shape = np.floor((self.hi.max(axis=0) - self.origin) / self.cell).astype(np.int64) + 1
+        self.strides = np.concatenate([np.cumprod(self.shape[::-1])[::-1][1:], [1]])
+
+        owner, idx = _expand(*self._cells(self.lo, self.hi))
+        keys = idx @ self.strides
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.items = owner[order]
+
+    def __len__(self):
+        return len(self.lo)
+
+    def _cells(self, lo, hi):
+        i0 = np.floor((lo - self.origin) / self.cell).astype(np.int64)
+        i1 = np.floor((hi - self.origin) / self.cell).astype(np.int64)
+        return np.clip(i0, 0, self.shape), np.clip(i1, -1, self.shape - 1)
+
+    def query(self, lo, hi):
+        """Pares (consulta, caixa) cujas caixas se sobrepõem, por ordem (consulta, caixa)."""
+        lo = np.asfortranarray(np.atleast_2d(np.asarray(lo, dtype=float)))
+        hi = np.asfortranarray(np.atleast_2d(np.asarray(hi, dtype=float)))
+        owner, idx = _expand(*self._cells(lo, hi))
+        keys = idx @ self.strides
+        a = np.searchsorted(self.keys, keys, "left")
+        b = np.searchsorted(self.keys, keys, "right")
+        cnt = b - a
+        qi = np.repeat(owner, cnt)
+        pos = np.repeat(a, cnt) + np.arange(cnt.sum()) - np.repeat(np.cumsum(cnt) - cnt, cnt)
+        it = self.items[pos]
+        cell = np.repeat(keys, cnt)
+
+        # um par sobreposto aparece em todas as células comuns: só conta na
+        # célula que contém o canto inferior da intersecção das duas caixas
+        # (por coordenada: gathers 1D, mais rápidos do que em (n, d))
+        hit = np.ones(len(qi), dtype=bool)
+        for d in range(lo.shape[1]):
+            hit &= (self.lo[:, d][it] <= hi[:, d][qi]) & (self.hi[:, d][it] >= lo[:, d][qi])
+        qi, it, cell = qi[hit], it[hit], cell[hit]
+        ref = np.zeros(len(qi), dtype=np.int64)
+        for d in range(lo.shape[1]):
+            corner = np.maximum(lo[:, d][qi], self.lo[:, d][it]) - self.origin[d]
+            # mesma fórmula de _cells (floor(x / c) e x // c diferem nas fronteiras)
+            i = np.clip(np.floor(corner / self.cell[d]).astype(np.int64), 0, self.shape[d] - 1)
+            ref += i * self.strides[d]
+        qi, it = qi[ref == cell], it[ref == cell]
+
+        order = np.argsort(qi.astype(np.int64) * len(self) + it, kind="stable")
+        return qi[order], it[order]
+
+
+def segments_cross(p0, p1, q0, q1):
+    """
+    Segmentos 2D (arrays (n, 2)) que se cruzam propriamente (cada um
+    separa os extremos do outro), pelo sinal das orientações; exacto,
+    sem a tolerância do ponto de maior aproximação.
+    """
+    def orient(o, a, b):
+        return (a[:, 0] - o[:, 0]) * (b[:, 1] - o[:, 1]) - (a[:, 1] - o[:, 1]) * (b[:, 0] - o[:, 0])
+
+    return (orient(p0, p1, q0) * orient(p0, p1, q1) < 0) \
+        & (orient(q0, q1, p0) * orient(q0, q1, p1) < 0)
+
+
+def segment_distance(p0, p1, q0, q1, eps=1e-12):
+    """
+    Distância mínima entre os segmentos p0-p1 e q0-q1 (arrays (n, d)),
+    pelo ponto de maior aproximação com os parâmetros limitados a [0, 1].
+    """
+    d1, d2, r = p1 - p0, q1 - q0, p0 - q0
+    a = (d1 * d1).sum(axis=1)
+    e = (d2 * d2).sum(axis=1)
+    b = (d1 * d2).sum(axis=1)
+    c = (d1 * r).sum(axis=1)
+    f = (d2 * r).sum(axis=1)
+    a_ = np.where(a > eps, a, 1.0)
+    e_ = np.where(e > eps, e, 1.0)
+
+    denom = a * e - b * b
+    s = np.where(denom > eps, np.clip((b * f - c * e) / np.where(denom > eps, denom, 1.0), 0, 1), 0.0)
+    s = np.where(e > eps, s, np.clip(-c / a_, 0, 1))
+    t = np.where(e > eps, (b * s + f) / e_, 0.0)
+    # t fora de [0, 1]: fixa t e recalcula s
+    s = np.where(t < 0, np.clip(-c / a_, 0, 1), np.where(t > 1, np.clip((b - c) / a_, 0, 1), s))
+    t = np.clip(t, 0, 1)
+    s = np.where(a > eps, s, 0.0)
+    t = np.where((a <= eps) & (e > eps), np.clip(f / e_, 0, 1), t)
+
+    diff = (p0 + d1 * s[:, None]) - (q0 + d2 * t[:, None])
+    return np.sqrt((diff * diff).sum(axis=1))
@@ -0,0 +1,65 @@
+"""
+Benchmark da verificação das zonas de exclusão.
+
+    python benchmarks/bench_exclusion.py
+
+Ancoragens aleatórias (troços livre + selado) contra polígonos de 10
+lados espalhados atrás da parede e um limite de propriedade vertical;
+mede a construção do índice e a verificação completa.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anchorage import exclusion  # noqa: E402
+from anchorage.anchors import compute_anchors  # noqa: E402
+
+
+def make_case(n_anchors, n_zones, extent=150.0, seed=0):
+    rng = np.random.default_rng(seed)
+    data = [{
+        "x1": 0.0, "y1": float(rng.uniform(-20, 0)),
+        "angle": float(rng.uniform(-35, -10)),
+        "free": float(rng.uniform(6, 15)), "bond": float(rng.uniform(6, 12)),
+        "prestress": 300.0, "strands": 4, "drill_mm": 150,
+        "alpha": 1.4, "shear_stress": 150, "FS": 1.8,
+    } for _ in range(n_anchors)]
+    df_res = compute_anchors(data, 140.0, 6.0)
+
+    t = np.linspace(0, 2 * np.pi, 10, endpoint=False)
+    zones = []
+    for k in range(n_zones):
+        cx, cy = rng.uniform(3, extent), rng.uniform(-extent, 0)
+        r = rng.uniform(0.3, 2.0)
+        zones.append({
+            "name": f"Z{k + 1}", "layer": "",
+            "points": np.column_stack([cx + r * np.cos(t), cy + r * np.sin(t)]).tolist(),
+            "closed": True, "clearance": None,
+        })
+    zones.append({"name": "Property", "layer": "", "points": [[30.0, 5.0], [30.0, -100.0]],
+                  "closed": False, "clearance": 0.5})
+    return df_res, zones
+
+
+def main():
+    print(f"{'anchors':>8}{'edges':>8}{'index (s)':>11}{'check (s)':>11}{'violations':>12}")
+    for n, z in ((1000, 100), (2000, 300), (5000, 500), (20000, 2000)):
+        df_res, zones = make_case(n, z)
+        edges = sum(len(zn["points"]) for zn in zones)
+
+        t = time.perf_counter()
+        exclusion.ZoneIndex(zones)
+        t_index = time.perf_counter() - t
+
+        t = time.perf_counter()
+        res = exclusion.check(df_res, zones, clearance=1.0)
+        t_check = time.perf_counter() - t
+        print(f"{n:>8}{edges:>8}{t_index:>11.3f}{t_check:>11.3f}{len(res['violations']):>12}")
+
+
+if __name__ == "__main__":
+    main()
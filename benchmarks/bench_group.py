@@ -0,0 +1,47 @@
+"""
+Benchmark do efeito de grupo 3D ao longo da parede.
+
+    python benchmarks/bench_group.py
+
+Secções com n níveis de ancoragens (1,5 m entre níveis, inclinações e
+comprimentos aleatórios, D = 150 ou 200 mm) repetidas ao longo da parede;
+mede a avaliação completa (expansão, índice, distâncias e η).
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anchorage import group  # noqa: E402
+from anchorage.anchors import compute_anchors  # noqa: E402
+
+
+def make_section(n_anchors, seed=0):
+    rng = np.random.default_rng(seed)
+    data = [{
+        "x1": 0.0, "y1": -1.5 * i,
+        "angle": float(rng.uniform(-30, -15)),
+        "free": float(rng.uniform(6, 12)), "bond": float(rng.uniform(6, 10)),
+        "prestress": 300.0, "strands": 4, "drill_mm": float(rng.choice([150, 200])),
+        "alpha": 1.4, "shear_stress": 150, "FS": 1.8,
+    } for i in range(n_anchors)]
+    return compute_anchors(data, 140.0, 6.0)
+
+
+def main():
+    print(f"{'anchors':>8}{'spacing':>9}{'wall (m)':>10}{'bond zones':>12}"
+          f"{'pairs':>9}{'time (s)':>10}{'min eta':>9}")
+    for n, afast, length in ((10, 1.0, 500), (20, 0.6, 1000), (20, 0.6, 2000), (50, 0.8, 1000)):
+        df_res = make_section(n)
+        t = time.perf_counter()
+        res = group.evaluate(df_res, afast, length)
+        dt = time.perf_counter() - t
+        print(f"{n:>8}{afast:>9.2f}{length:>10.0f}{res['instances']:>12}"
+              f"{res['pairs']:>9}{dt:>10.3f}{res['per_anchor']['eta min'].min():>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark do motor de relatórios PDF (1 000 e 10 000 ancoragens).
+
+    python benchmarks/bench_report.py
+
+Mede a geração a frio (cache vazia), a regeração com uma única ancoragem
+alterada (cache quente), o modo de tabela compacta e um relatório de
+várias secções escrito em streaming para disco.
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anchorage.report import FragmentCache, write_report  # noqa: E402
+
+
+def make_section(n, name="Section 1", seed=0):
+    rows = []
+    for i in range(n):
+        pre = 100.0 + (i * 7 + seed) % 400
+        rows.append({
+            "Anchor": i + 1,
+            "X1": 0.0, "Y1": 8.0 - 0.01 * i,
+            "X2": 9.06, "Y2": 3.77, "X3": 18.13, "Y3": -0.45,
+            "L_free (m)": 10.0, "L_bond (m)": 10.0,
+            "Strands": 3, "Steel Area (mm2)": 420.0,
+            "Prestress (kN)": pre, "Slip Loss (kN)": 52.92,
+            "P_block (kN)": pre + 52.92, "Pmax (kN)": 604.8,
+            "Block Check": "OK", "Bond Resistance (kN)": 549.78,
+            "Bond Check": "OK" if pre + 52.92 < 549.78 else "FAIL",
+        })
+    df = pd.DataFrame(rows)
+    df_bh = pd.DataFrame({
+        "Anchor": df["Anchor"],
+        "Prestress": df["Prestress (kN)"],
+        "Angle": -25.0,
+        "V": df["Prestress (kN)"] * 0.4226,
+    })
+    return {
+        "name": name,
+        "df": df,
+        "df_bh": df_bh,
+        "graph_path": None,
+        "params": {"E": 210000, "A_strand": 140.0, "delta_L": 6.0},
+        "bulb": {"carga_parede": 37.5, "V_total": float(df_bh["V"].sum()),
+                 "V_metro": 1.0, "C_bolbo": 1.0},
+    }
+
+
+def timed(path, sections, **kw):
+    t = time.perf_counter()
+    with open(path, "wb") as fh:
+        pages = write_report(fh, sections, **kw)
+    return time.perf_counter() - t, pages, os.path.getsize(path)
+
+
+def peak_memory(path, sections, **kw):
+    # passagem separada: o tracemalloc torna a geração várias vezes mais lenta
+    tracemalloc.start()
+    with open(path, "wb") as fh:
+        write_report(fh, sections, **kw)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    out = os.path.join(tempfile.gettempdir(), "bench_report.pdf")
+    print(f"{'case':<40}{'time (s)':>10}{'pages':>8}{'size (MB)':>11}")
+
+    for n in (1000, 10000):
+        sec = make_section(n)
+        cache = FragmentCache()
+        cases = [("cold", dict(cache=cache))]
+
+        changed = make_section(n)
+        changed["df"].loc[n // 2, "Prestress (kN)"] += 1.0
+        cases.append(("warm, 1 anchor changed", dict(cache=cache)))
+        cases.append(("summary table, cold", dict(mode="summary", cache=FragmentCache())))
+
+        for label, kw in cases:
+            section = changed if label.startswith("warm") else sec
+            dt, pages, size = timed(out, [section], **kw)
+            print(f"{f'{n} anchors, {label}':<40}{dt:>10.3f}{pages:>8}{size / 1e6:>11.2f}")
+
+    # várias secções lidas de um gerador: só uma secção em memória de cada vez
+    def sections(k):
+        return (make_section(1000, f"Section {j + 1}", seed=j) for j in range(k))
+
+    dt, pages, size = timed(out, sections(10), n_sections=10)
+    print(f"{'10 x 1000 anchors, streamed':<40}{dt:>10.3f}{pages:>8}{size / 1e6:>11.2f}")
+
+    print()
+    print("peak traced memory while streaming (MB):")
+    for k in (1, 10):
+        peak = peak_memory(out, sections(k), n_sections=k)
+        print(f"  {k:>2} x 1000 anchors: {peak / 1e6:.2f}")
+
+    os.unlink(out)
+
+
+if __name__ == "__main__":
+    main()
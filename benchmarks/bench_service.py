@@ -0,0 +1,116 @@
+"""
+Débito do serviço HTTP de verificação (anchorage/service.py).
+
+Arranca o serviço numa porta livre e, numa única ligação keep-alive,
+envia pedidos com lotes de tamanho crescente, em JSON e em binário.
+
+    python benchmarks/bench_service.py --batches 1,10,100,1000,10000
+
+Para cada tamanho de lote mostra pedidos/s, ancoragens/s e a latência
+mediana por pedido. Lotes pequenos são dominados pelo custo fixo do
+pedido HTTP; a partir de ~1000 ancoragens o débito é limitado pelo
+cálculo e pela (des)serialização, onde o formato binário é bastante
+mais rápido do que o JSON.
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+from anchorage import service  # noqa: E402
+
+SECTION = {"A_strand": 140, "delta_L": 6, "f_steel": 1440,
+           "y_wall": 10, "y_excav": 0, "esp": 0.3, "afast": 2.5, "A_inf": 1.5}
+
+
+def make_anchors(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {"x1": 0.0, "y1": float(9 - 0.01 * i), "angle": -25.0,
+         "free": float(rng.uniform(6, 14)), "bond": float(rng.uniform(6, 12)),
+         "prestress": float(rng.uniform(200, 600)), "strands": int(rng.integers(3, 7)),
+         "drill_mm": 150, "alpha": 1.4, "shear_stress": 150, "FS": 1.8}
+        for i in range(n)
+    ]
+
+
+def post(conn, body, ctype):
+    conn.request("POST", "/verify", body=body,
+                 headers={"Content-Type": ctype, "Content-Length": str(len(body))})
+    resp = conn.getresponse()
+    data = resp.read()
+    if resp.status != 200:
+        raise RuntimeError(f"HTTP {resp.status}: {data[:200]!r}")
+    return data
+
+
+def measure(conn, batch, fmt, min_time):
+    anchors = make_anchors(batch)
+    if fmt == "json":
+        body = json.dumps({**SECTION, "anchors": anchors}).encode("utf-8")
+        ctype = "application/json"
+    else:
+        body = service.encode_request([SECTION], [anchors])
+        ctype = "application/octet-stream"
+
+    post(conn, body, ctype)  # aquecimento
+    lat = []
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < min_time or len(lat) < 3:
+        t = time.perf_counter()
+        post(conn, body, ctype)
+        lat.append(time.perf_counter() - t)
+    wall = time.perf_counter() - t0
+    return {
+        "format": fmt,
+        "batch": batch,
+        "requests": len(lat),
+        "req_s": len(lat) / wall,
+        "anchors_s": len(lat) * batch / wall,
+        "p50_ms": statistics.median(lat) * 1000,
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--batches", default="1,10,100,1000,10000")
+    ap.add_argument("--formats", default="json,binary")
+    ap.add_argument("--min-time", type=float, default=1.0,
+                    help="tempo mínimo de medição por caso (s)")
+    ap.add_argument("--json", help="guarda os resultados neste ficheiro")
+    args = ap.parse_args(argv)
+
+    srv = service.make_server(port=0)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    conn = http.client.HTTPConnection("127.0.0.1", srv.server_address[1])
+
+    results = []
+    print(f"{'format':>8}{'batch':>8}{'req/s':>10}{'anchors/s':>12}{'p50 (ms)':>10}")
+    try:
+        for fmt in args.formats.split(","):
+            for b in [int(x) for x in args.batches.split(",") if x.strip()]:
+                r = measure(conn, b, fmt, args.min_time)
+                results.append(r)
+                print(f"{fmt:>8}{b:>8}{r['req_s']:>10.1f}{r['anchors_s']:>12.0f}"
+                      f"{r['p50_ms']:>10.2f}")
+    finally:
+        conn.close()
+        srv.shutdown()
+        srv.server_close()
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark da importação de livros Excel (uma folha por secção).
+
+    python benchmarks/bench_workbook.py
+
+Escreve livros com s folhas de n ancoragens num directório temporário
+(modo normal do openpyxl, que grava o <dimension> de cada folha como o
+Excel; sem ele o modo read-only percorre cada folha ao abrir) e mede a
+verificação em lotes com service.verify_workbook: tempo total e, numa
+segunda passagem, o pico de memória Python (tracemalloc), que depende do
+lote (BATCH_ANCHORS) e não do número de folhas.
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anchorage import service  # noqa: E402
+from anchorage.imports import COLS_ANCHOR  # noqa: E402
+
+
+def write_workbook(path, n_sheets, n_anchors, seed=0):
+    import openpyxl
+
+    rng = np.random.default_rng(seed)
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for k in range(n_sheets):
+        ws = wb.create_sheet(f"Section {k + 1}")
+        ws.append(COLS_ANCHOR + ["afast"])
+        for i in range(n_anchors):
+            ws.append([
+                0.0, -1.5 * (i % 10), float(rng.uniform(-35, -10)),
+                float(rng.uniform(6, 15)), float(rng.uniform(6, 12)),
+                300.0, 4, 150, 1.4, 150, 1.8, 3.0 if i == 0 else None,
+            ])
+    wb.save(path)
+
+
+def verify(path):
+    total = 0
+    for sections, df_all, offsets, bulbs in service.verify_workbook(path):
+        total += len(df_all)
+    return total
+
+
+def main():
+    print(f"{'sheets':>7}{'anchors':>9}{'file (MB)':>11}{'time (s)':>10}"
+          f"{'anchors/s':>11}{'peak (MB)':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for s, n in ((10, 1000), (50, 1000), (100, 1000), (5, 10000)):
+            path = os.path.join(tmp, f"wb_{s}_{n}.xlsx")
+            write_workbook(path, s, n)
+
+            t = time.perf_counter()
+            total = verify(path)
+            dt = time.perf_counter() - t
+
+            tracemalloc.start()
+            verify(path)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{s:>7}{total:>9}{os.path.getsize(path) / 1e6:>11.1f}{dt:>10.2f}"
+                  f"{total / dt:>11.0f}{peak / 1e6:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+Teste de carga da página de ancoragens com sessões simultâneas.
+
+Cada sessão é um AppTest (API de testes do Streamlit) a correr
+pages/anc_v2.py numa thread; as sessões de um nível partilham um processo,
+como no servidor `streamlit run`: o mesmo interpretador e GIL, os módulos
+importados, os recursos st.cache_resource (cache de resultados, cache de
+fragmentos do PDF) e a cache em disco. Não inclui o custo do websocket e
+do tornado do servidor. Todas as sessões arrancam em simultâneo e repetem
+um cenário realista: editar uma ancoragem, mudar parâmetros globais,
+carregar um CSV e pedir exportações (PDF/DXF).
+
+    python benchmarks/loadtest.py --sessions 1,2,4,8 --iterations 10
+
+Cada nível corre num processo novo: a RSS base é medida depois de uma
+sessão de aquecimento que percorre o cenário (módulos e caches partilhadas
+carregados) e o custo de cada sessão é o aumento de RSS com as n sessões
+vivas, a dividir por n.
+
+Para cada número de sessões mostra a latência de rerun (p50/p95/p99), o
+débito, o CPU total (em núcleos), a RSS base e a RSS acrescentada por
+sessão.
+Com --max-p95 o script termina com erro se algum p95 exceder o limite
+(útil para detectar regressões de escalabilidade).
+"""
+import argparse
+import gc
+import json
+import multiprocessing as mp
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGE = os.path.join(ROOT, "pages", "anc_v2.py")
+sys.path.insert(0, ROOT)
+
+
+def rss_bytes():
+    """RSS actual do processo (Linux /proc; senão o máximo via getrusage)."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def settled_rss():
+    """RSS depois de recolher o lixo e devolver ao SO a memória livre (glibc)."""
+    gc.collect()
+    try:
+        import ctypes
+
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+    return rss_bytes()
+
+
+def make_csv(n_anchors):
+    """CSV no formato do botão "Download ALL (CSV)"."""
+    geo = {
+        "y_excav": 0.0, "l_excav": 5.0, "y_wall": 10.0,
+        "stratigraphy": [{"name": "Clay", "y": -2.0, "L": 20.0},
+                         {"name": "Rock", "y": -8.0, "L": 20.0}],
+        "borehole_id": "S1", "borehole_x": 12.0,
+        "esp": 0.3, "afast": 2.5, "a_inf": 1.5,
+    }
+    lines = ["x1,y1,angle,free,bond,prestress,strands,drill_mm,alpha,shear_stress,fs,geo_json"]
+    for i in range(n_anchors):
+        g = json.dumps(geo).replace('"', '""') if i == 0 else ""
+        lines.append(
+            f"0,{9 - 0.5 * i:.2f},-25,{10 + i % 3},8,{300 + 10 * i},4,150,1.4,150,1.8,"
+            + (f'"{g}"' if g else "")
+        )
+    return "\n".join(lines).encode("utf-8")
+
+
+def _widget(elements, **match):
+    for e in elements:
+        if all(getattr(e, k, None) == v for k, v in match.items()):
+            return e
+    return None
+
+
+def share_script_cache():
+    """
+    Um ScriptCache para todas as sessões, como no servidor: o script é
+    compilado uma vez (o AppTest cria um por rerun, e ast.parse em várias
+    threads ao mesmo tempo falha no CPython 3.11).
+    """
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import local_script_runner
+
+    shared = ScriptCache()
+    local_script_runner.ScriptCache = lambda: shared
+
+
+def session(at, csv_bytes, iterations, barrier, out):
+    """Thread de uma sessão (AppTest já carregado); acrescenta o resultado a `out`."""
+    latencies, errors = [], []
+    barrier.wait()
+
+    def rerun(action):
+        t = time.perf_counter()
+        action()
+        at.run()
+        latencies.append(time.perf_counter() - t)
+        if at.exception:
+            errors.append(str(at.exception[0].value))
+
+    try:
+        for it in range(iterations):
+            step = it % 5
+
+            if step == 0:
+                # editar o pré-esforço da primeira ancoragem
+                w = at.number_input(key="pre_0")
+                rerun(lambda: w.set_value(w.value + 5.0))
+            elif step == 1:
+                w = _widget(at.sidebar.number_input, label="Wedge slip δ (mm)")
+                rerun(lambda: w.set_value(6.0 if w.value != 6.0 else 5.5))
+            elif step == 2:
+                up = getattr(at, "file_uploader", None)
+                if up:
+                    rerun(lambda: up[0].set_value(("anchors.csv", csv_bytes, "text/csv")))
+                else:  # versões do Streamlit sem suporte de upload no AppTest
+                    rerun(lambda: None)
+            elif step == 3:
+                w = _widget(at.radio, label="Anchor pages")
+                rerun(lambda: w.set_value(
+                    "Compact summary table" if w.value == "One page per anchor"
+                    else "One page per anchor"
+                ))
+            else:
+                w = _widget(at.button, label="Download DXF")
+                rerun(lambda: w.click())
+    except Exception:
+        errors.append(traceback.format_exc().strip())
+
+    out.append({"latencies": latencies, "errors": errors})
+
+
+def level(n_sessions, csv_bytes, iterations, timeout, queue):
+    """Processo de um nível: n sessões em threads; põe o resultado em `queue`."""
+    warnings.simplefilter("ignore", FutureWarning)
+    warnings.simplefilter("ignore", DeprecationWarning)
+    from streamlit.testing.v1 import AppTest
+
+    share_script_cache()
+    # aquecimento: uma sessão percorre o cenário e é descartada (módulos
+    # importados e caches partilhadas carregados)
+    warm = AppTest.from_file(PAGE, default_timeout=timeout)
+    warm.run()
+    session(warm, csv_bytes, 5, threading.Barrier(1), [])
+    del warm
+    rss0 = settled_rss()
+
+    apps = [AppTest.from_file(PAGE, default_timeout=timeout) for _ in range(n_sessions)]
+    for at in apps:
+        at.run()
+
+    barrier = threading.Barrier(n_sessions + 1)
+    out = []
+    threads = [
+        threading.Thread(target=session, args=(at, csv_bytes, iterations, barrier, out))
+        for at in apps
+    ]
+    for t in threads:
+        t.start()
+    barrier.wait()  # todas as sessões carregadas: começa a medição
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - wall0
+    cpu = time.process_time() - cpu0
+
+    rss1 = settled_rss()  # com as n sessões ainda vivas
+    queue.put({
+        "latencies": [x for o in out for x in o["latencies"]],
+        "errors": [e for o in out for e in o["errors"]],
+        "wall": wall,
+        "cpu": cpu,
+        "rss_base": rss0,
+        "rss": rss1,
+    })
+
+
+def percentile(values, q):
+    s = sorted(values)
+    if not s:
+        return float("nan")
+    k = (len(s) - 1) * q / 100
+    lo, hi = int(k), min(int(k) + 1, len(s) - 1)
+    return s[lo] + (s[hi] - s[lo]) * (k - lo)
+
+
+def run_level(n_sessions, csv_bytes, iterations, timeout):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=level,
+                       args=(n_sessions, csv_bytes, iterations, timeout, queue))
+    proc.start()
+    o = queue.get()
+    proc.join()
+
+    latencies, wall = o["latencies"], o["wall"]
+    return {
+        "sessions": n_sessions,
+        "reruns": len(latencies),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "throughput": len(latencies) / wall if wall else 0.0,
+        "cpu_cores": o["cpu"] / wall if wall else 0.0,
+        "rss_base_mb": o["rss_base"] / 1e6,
+        "rss_mb": o["rss"] / 1e6,
+        "rss_per_session_mb": (o["rss"] - o["rss_base"]) / n_sessions / 1e6,
+        "errors": o["errors"][:5],
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--sessions", default="1,2,4,8",
+                    help="números de sessões simultâneas, separados por vírgulas")
+    ap.add_argument("--iterations", type=int, default=10, help="reruns por sessão")
+    ap.add_argument("--anchors", type=int, default=20, help="ancoragens no CSV carregado")
+    ap.add_argument("--timeout", type=float, default=120.0, help="timeout por rerun (s)")
+    ap.add_argument("--json", help="guarda os resultados neste ficheiro")
+    ap.add_argument("--max-p95", type=float, help="falha se algum p95 (s) exceder este valor")
+    ap.add_argument("--keep-cache", action="store_true",
+                    help="usa a cache em disco existente em vez de uma vazia")
+    args = ap.parse_args(argv)
+
+    if not args.keep_cache:
+        os.environ["ANCHORAGE_CACHE_DIR"] = tempfile.mkdtemp(prefix="anchorage_load_")
+
+    csv_bytes = make_csv(args.anchors)
+    results = []
+
+    print(f"{'sessions':>8}{'reruns':>8}{'p50 (s)':>9}{'p95 (s)':>9}{'p99 (s)':>9}"
+          f"{'rerun/s':>9}{'CPU':>7}{'base MB':>9}{'RSS MB':>9}{'+MB/sess':>9}")
+    for n in [int(x) for x in args.sessions.split(",") if x.strip()]:
+        r = run_level(n, csv_bytes, args.iterations, args.timeout)
+        results.append(r)
+        print(f"{r['sessions']:>8}{r['reruns']:>8}{r['p50']:>9.3f}{r['p95']:>9.3f}"
+              f"{r['p99']:>9.3f}{r['throughput']:>9.2f}{r['cpu_cores']:>7.2f}"
+              f"{r['rss_base_mb']:>9.0f}{r['rss_mb']:>9.0f}{r['rss_per_session_mb']:>9.1f}")
+        for e in r["errors"]:
+            print(f"         error: {e}")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+    if args.max_p95 is not None:
+        worst = max(r["p95"] for r in results)
+        if worst > args.max_p95 or any(r["errors"] for r in results):
+            print(f"FAIL: p95 {worst:.3f} s > {args.max_p95:.3f} s or rerun errors")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,11 +2,34 @@ import streamlit as st
 import math
 import matplotlib.pyplot as plt
 import pandas as pd
-from fpdf import FPDF
+import io
 import json
 import tempfile
 import os
 
+from anchorage import (
+    alignment, boreholes as bh, design, exclusion, geoview, group, history, imports,
+    kranz, layout, losses, pressure, sensitivity, soil,
+)
+from anchorage.anchors import bulb_load, compute_anchors
+from anchorage.diskcache import DiskCache, content_key
+from anchorage.profiling import RerunProfiler
+from anchorage.report import LAYOUT_VERSION, FragmentCache, render_report, unsupported_chars
+
+# =============================================================
+# PROFILER (SÓ O RERUN SEGUINTE, A PEDIDO)
+# =============================================================
+stale = st.session_state.pop("rerun_profiler", None)
+if stale is not None:  # rerun anterior terminou com excepção
+    stale.stop()
+
+rerun_profiler = None
+if st.session_state.get("profile_next_rerun"):
+    st.session_state["profile_next_rerun"] = False
+    rerun_profiler = RerunProfiler(root_file=__file__)
+    st.session_state["rerun_profiler"] = rerun_profiler
+    rerun_profiler.start()
+
 # =============================================================
 # CONFIGURATION
 # =============================================================
@@ -19,6 +42,11 @@ st.title("Anchorage Safety Verification")
 st.sidebar.header("General Settings")
 
 section_name = st.sidebar.text_input("Section Name", value="Section 1")
+project = st.sidebar.text_input(
+    "Project",
+    key="project",
+    help="Version histories are kept per project and section.",
+)
 
 n = st.sidebar.number_input(
     "Number of anchors",
@@ -46,206 +74,95 @@ delta_L = st.sidebar.number_input(
     step=0.5
 )
 
+f_steel = st.sidebar.number_input(
+    "Allowable steel stress (MPa)",
+    min_value=100.0,
+    max_value=2500.0,
+    value=1440.0,
+    step=10.0
+)
+
 st.sidebar.markdown("---")
 st.sidebar.write(f"E = {E} MPa")
 
 # =============================================================
-# FUNCTIONS
+# RESULT CACHE (DISCO, PARTILHADA ENTRE SESSÕES)
 # =============================================================
+@st.cache_resource
+def result_cache():
+    return DiskCache()
+
 
-def compute_coords(x1, y1, ang, L1, L2):
-    rad = math.radians(ang)
-    x2 = x1 + L1 * math.cos(rad)
-    y2 = y1 + L1 * math.sin(rad)
-    x3 = x2 + L2 * math.cos(rad)
-    y3 = y2 + L2 * math.sin(rad)
-    return x2, y2, x3, y3
+@st.cache_resource
+def version_history(project, section):
+    # uma instância por projecto e secção: guarda em memória a última versão
+    return history.History(section, project)
 
 
 # =============================================================
-# PDF GENERATION (ASCII-SAFE)
+# PDF GENERATION (CP1252)
 # =============================================================
-def create_pdf(df, graph_path, section_name, df_bh,
+@st.cache_resource
+def pdf_fragment_cache():
+    # partilhada entre reruns e sessões: só as ancoragens alteradas
+    # voltam a ser desenhadas
+    return FragmentCache()
+
+
+def create_pdf(df, fig, section_name, df_bh,
                C_bolbo, carga_parede, V_total, V_metro,
-               borehole_id, borehole_x, esp, afast, A_inf):
+               borehole_id, borehole_x, esp, afast, A_inf, mode="pages",
+               geometry=None, figure="vector", dpi=150, exclusion=None):
     """
     Gera o PDF do relatório de verificação dos tirantes.
 
     df      -> dataframe com resultados por ancoragem
-    graph_path -> caminho do PNG com a geometria
+    fig     -> figura matplotlib com a geometria (usada no modo raster)
     df_bh   -> dataframe com componentes verticais (bulbo)
+    mode    -> "pages" (uma página por ancoragem) ou "summary" (tabela)
+    geometry -> parede/escavação/estratigrafia para o desenho vectorial
+    figure  -> "vector" ou "raster" (com resolução dpi)
+    exclusion -> violações das zonas de exclusão (dataframe) ou None
     Restantes -> parâmetros globais
     """
-
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.set_font("Helvetica", "", 11)
-
-    # ---------------------------------------------------------
-    # TITLE PAGE
-    # ---------------------------------------------------------
-    pdf.add_page()
-    pdf.set_font("Helvetica", "B", 16)
-    pdf.cell(0, 10, "Anchorage Safety Verification Report", ln=True, align="C")
-    pdf.ln(5)
-
-    pdf.set_font("Helvetica", "B", 12)
-    pdf.cell(0, 8, f"Section: {section_name}", ln=True)
-    pdf.ln(5)
-
-    pdf.set_font("Helvetica", "", 11)
-    pdf.multi_cell(
-        0,
-        6,
-        "This report presents the geometry, design parameters, "
-        "bond verification and bulb load verification for ground anchors."
-    )
-    pdf.ln(8)
-
-    # ---------------------------------------------------------
-    # GLOBAL PARAMETERS
-    # ---------------------------------------------------------
-    pdf.set_font("Helvetica", "B", 13)
-    pdf.cell(0, 8, "Global Parameters", ln=True)
-
-    pdf.set_font("Helvetica", "", 10)
-    pdf.multi_cell(
-        0,
-        5,
-        f"E = {E} MPa\n"
-        f"As = {A_strand} mm2 per strand\n"
-        f"Wedge slip = {delta_L} mm\n"
-        f"Allowable steel stress = 1440 MPa\n"
-        f"Borehole ID = {borehole_id}\n"
-        f"Borehole X position = {borehole_x} m\n"
-        f"Wall thickness = {esp} m\n"
-        f"Anchor spacing = {afast} m\n"
-        f"Influence area = {A_inf} m\n"
-    )
-    pdf.ln(4)
-
-    # ---------------------------------------------------------
-    # FORMULAS (ASCII ONLY)
-    # ---------------------------------------------------------
-    pdf.set_font("Helvetica", "B", 13)
-    pdf.cell(0, 8, "Equations Used", ln=True)
-
-    pdf.set_font("Helvetica", "", 10)
-    pdf.multi_cell(
-        0,
-        5,
-        "Slip loss:\n"
-        "  DP_slip = (E * A / L_free) * delta_L / 1000\n\n"
-        "Block head force:\n"
-        "  P_block = P_prestress + DP_slip\n\n"
-        "Steel capacity:\n"
-        "  P_max = A * 1440 / 1000\n\n"
-        "Bond resistance:\n"
-        "  R_bond = L_bond * pi * d * alpha * tau / FS\n\n"
-        "Vertical component:\n"
-        "  V = P_prestress * sin( abs(angle) )\n"
-    )
-    pdf.ln(8)
-
-    # ---------------------------------------------------------
-    # PER-ANCHOR PAGES
-    # ---------------------------------------------------------
-    for _, row in df.iterrows():
-        pdf.add_page()
-        pdf.set_font("Helvetica", "B", 14)
-        pdf.cell(0, 8, f"Anchor {int(row['Anchor'])}", ln=True)
-        pdf.ln(3)
-
-        pdf.set_font("Helvetica", "", 10)
-        pdf.multi_cell(
-            0,
-            5,
-            "Coordinates:\n"
-            f"  X1 = {row['X1']:.2f}, Y1 = {row['Y1']:.2f}\n"
-            f"  X2 = {row['X2']:.2f}, Y2 = {row['Y2']:.2f}\n"
-            f"  X3 = {row['X3']:.2f}, Y3 = {row['Y3']:.2f}\n\n"
-            "Lengths:\n"
-            f"  Free length = {row['L_free (m)']:.2f} m\n"
-            f"  Bond length = {row['L_bond (m)']:.2f} m\n\n"
-        )
-
-        pdf.multi_cell(
-            0,
-            5,
-            f"Steel area A = {row['Steel Area (mm2)']:.0f} mm2\n"
-            f"Prestress = {row['Prestress (kN)']:.2f} kN\n"
-            f"Slip loss = {row['Slip Loss (kN)']:.2f} kN\n"
-            f"P_block = {row['P_block (kN)']:.2f} kN\n"
-            f"P_max = {row['Pmax (kN)']:.2f} kN\n"
-            f"Block check = {row['Block Check']}\n\n"
-            f"Bond resistance = {row['Bond Resistance (kN)']:.2f} kN\n"
-            f"Bond check = {row['Bond Check']}\n"
-        )
-
-    # ---------------------------------------------------------
-    # GEOMETRY PAGE
-    # ---------------------------------------------------------
-    pdf.add_page()
-    pdf.set_font("Helvetica", "B", 14)
-    pdf.cell(0, 10, "Anchorage Geometry", ln=True, align="C")
-    pdf.image(graph_path, x=10, y=30, w=190)
-
-    # ---------------------------------------------------------
-    # BULB LOAD PAGE
-    # ---------------------------------------------------------
-    pdf.add_page()
-    pdf.set_font("Helvetica", "B", 14)
-    pdf.cell(0, 10, "Bulb Load Verification", ln=True)
-
-    pdf.set_font("Helvetica", "", 11)
-    pdf.ln(5)
-    pdf.cell(0, 8, f"Wall load = {carga_parede:.2f} kN/m", ln=True)
-    pdf.cell(0, 8, f"Sum V = {V_total:.2f} kN", ln=True)
-    pdf.cell(0, 8, f"V per meter = {V_metro:.2f} kN/m", ln=True)
-    pdf.cell(0, 8, f"Bulb load = {C_bolbo:.2f} kN", ln=True)
-    pdf.ln(8)
-
-    pdf.set_font("Helvetica", "B", 12)
-    pdf.cell(0, 8, "Anchor vertical components:", ln=True)
-
-    pdf.set_font("Helvetica", "B", 10)
-    pdf.cell(20, 8, "N", border=1)
-    pdf.cell(40, 8, "Prestress", border=1)
-    pdf.cell(30, 8, "Angle", border=1)
-    pdf.cell(40, 8, "V", border=1)
-    pdf.ln()
-
-    pdf.set_font("Helvetica", "", 10)
-    for _, row in df_bh.iterrows():
-        pdf.cell(20, 8, str(int(row["Anchor"])), border=1)
-        pdf.cell(40, 8, f"{row['Prestress']:.2f}", border=1)
-        pdf.cell(30, 8, f"{row['Angle']:.1f}", border=1)
-        pdf.cell(40, 8, f"{row['V']:.2f}", border=1)
-        pdf.ln()
-
-    # ---------------------------------------------------------
-    # OUTPUT (COMPATÍVEL COM WINPYTHON, ANACONDA, STREAMLIT)
-    # ---------------------------------------------------------
-    raw = pdf.output(dest="S")  # fpdf2 devolve normalmente str
-    if isinstance(raw, str):
-        raw = raw.encode("latin-1", "ignore")
-
-    return raw
-
-    # ---------------------------------------------------------
-    # OUTPUT
-    # ---------------------------------------------------------
-    raw = pdf.output(dest="S")
-    return bytes(raw)
+    section = {
+        "name": section_name,
+        "df": df,
+        "df_bh": df_bh,
+        "fig": fig,
+        "geometry": geometry,
+        "exclusion": exclusion,
+        "params": {
+            "E": E,
+            "A_strand": A_strand,
+            "delta_L": delta_L,
+            "f_steel": f_steel,
+            "borehole_id": borehole_id,
+            "borehole_x": borehole_x,
+            "esp": esp,
+            "afast": afast,
+            "A_inf": A_inf,
+        },
+        "bulb": {
+            "carga_parede": carga_parede,
+            "V_total": V_total,
+            "V_metro": V_metro,
+            "C_bolbo": C_bolbo,
+        },
+    }
+    return render_report([section], mode=mode, cache=pdf_fragment_cache(),
+                         figure=figure, dpi=dpi)
 
 # =============================================================
 # IMPORT CSV (ROBUSTO PARA STREAMLIT CLOUD)
 # =============================================================
-import io
 
 st.subheader("Import full data (anchors + excavation + stratigraphy + wall)")
 
-upload = st.file_uploader("Upload CSV file", type="csv")
+upload = st.file_uploader(
+    "Upload CSV file or Excel workbook (one sheet per section)",
+    type=["csv", "xlsx"],
+)
 
 anchors_imported = None
 y_excav_default = 0.0
@@ -254,79 +171,75 @@ y_wall_default = 5.0
 strat_default = []
 borehole_id_default = "S1"
 borehole_x_default = 1.0
+boreholes_default = []
+alignment_default = []
+y_water_default = None
 esp_default = 0.30
 afast_default = 3.0
 A_inf_default = 1.5
 
-def safe_json_load(s):
-    if not isinstance(s, str):
-        return {}
-    s = s.strip()
-    if not s:
-        return {}
-    try:
-        return json.loads(s)
-    except:
-        try:
-            return json.loads(s.replace("'", '"'))
-        except:
-            return {}
-
-if upload is not None:
-    try:
-        raw = upload.read()
-
-        # tenta UTF-8, se falhar usa Latin-1
+def parsed_upload(upload, parse=imports.parse_csv, state_key="import_cache",
+                  variant=None):
+    """
+    Ficheiro carregado já lido, guardado na sessão (state_key) pelo SHA-256
+    dos bytes e por `variant` (p.ex. a folha do livro). Um ficheiro ou
+    variante novos substituem a entrada anterior; sem ficheiro a entrada
+    é removida.
+    """
+    if upload is None:
+        st.session_state.pop(state_key, None)
+        st.session_state.pop("sheet_cache", None)  # folha lida de um livro
+        return None
+
+    raw = upload.getvalue()
+    sha = imports.file_digest(raw)
+    cached = st.session_state.get(state_key)
+    if cached is None or cached["sha"] != sha or cached.get("variant") != variant:
         try:
-            text = raw.decode("utf-8")
-        except:
-            text = raw.decode("latin-1")
-
-        # autodetecta separador
-        df_import = pd.read_csv(io.StringIO(text), sep=None, engine="python")
-
-        # normalizar nomes de colunas
-        df_import.columns = (
-            df_import.columns
-            .str.strip()
-            .str.lower()
-            .str.replace(" ", "_")
-        )
-
-        cols_anchor = [
-            "x1","y1","angle","free","bond","prestress",
-            "strands","drill_mm","alpha","shear_stress","fs"
-        ]
+            cached = {"sha": sha, "variant": variant, "parsed": parse(raw), "error": None}
+        except Exception as e:
+            cached = {"sha": sha, "variant": variant, "parsed": None, "error": str(e)}
+        st.session_state[state_key] = cached
+    return cached
+
+is_workbook = upload is not None and upload.name.lower().endswith(".xlsx")
+# livro: primeiro só os nomes das folhas; depois só a folha escolhida
+imported = parsed_upload(
+    upload, imports.workbook_sheets if is_workbook else imports.parse_csv
+)
 
-        anchors_imported = []
+if imported is not None and is_workbook and imported["error"] is None:
+    sheet = st.selectbox("Workbook sheet", imported["parsed"] or [""])
+    imported = parsed_upload(
+        upload, lambda raw: imports.read_sheet(raw, sheet), "sheet_cache", variant=sheet
+    )
+elif not is_workbook:
+    st.session_state.pop("sheet_cache", None)
 
-        for _, row in df_import.iterrows():
-            anchor = {}
-            for c in cols_anchor:
-                if c in row and not pd.isna(row[c]):
-                    anchor[c] = float(row[c])
-            # só aceita anchors válidos
-            if all(k in anchor for k in ("x1","y1","angle","free","bond")):
-                anchors_imported.append(anchor)
+if imported is not None:
+    if imported["error"] is None:
+        parsed = imported["parsed"]
+        anchors_imported = parsed["anchors"]
 
         # importa dados globais do geo_json
-        if "geo_json" in df_import.columns:
-            g = safe_json_load(df_import["geo_json"].iloc[0])
-            if g:
-                y_excav_default = g.get("y_excav", y_excav_default)
-                L_excav_default = g.get("l_excav", L_excav_default)
-                y_wall_default = g.get("y_wall", y_wall_default)
-                strat_default = g.get("stratigraphy", strat_default)
-                borehole_id_default = g.get("borehole_id", borehole_id_default)
-                borehole_x_default = g.get("borehole_x", borehole_x_default)
-                esp_default = g.get("esp", esp_default)
-                afast_default = g.get("afast", afast_default)
-                A_inf_default = g.get("a_inf", A_inf_default)
+        g = parsed["geo"]
+        if g:
+            y_excav_default = g.get("y_excav", y_excav_default)
+            L_excav_default = g.get("l_excav", L_excav_default)
+            y_wall_default = g.get("y_wall", y_wall_default)
+            strat_default = g.get("stratigraphy", strat_default)
+            borehole_id_default = g.get("borehole_id", borehole_id_default)
+            borehole_x_default = g.get("borehole_x", borehole_x_default)
+            boreholes_default = g.get("boreholes", boreholes_default)
+            alignment_default = g.get("alignment", alignment_default)
+            y_water_default = g.get("y_water", y_water_default)
+            esp_default = g.get("esp", esp_default)
+            afast_default = g.get("afast", afast_default)
+            A_inf_default = g.get("a_inf", A_inf_default)
 
         st.success("Data imported successfully.")
-
-    except Exception as e:
-        st.error(f"CSV read error: {e}")
+    else:
+        st.error(f"{'Workbook' if is_workbook else 'CSV'} read error: {imported['error']}")
 
 st.markdown("---")
 
@@ -335,7 +248,7 @@ st.markdown("---")
 # DXF EXPORT FUNCTION (FINAL + CLEAN)
 # =============================================================
 def export_dxf(filepath, data, stratigraphy, x_ref, y_excav, y_wall, L_excav,
-               borehole_x, borehole_id):
+               borehole_x, borehole_id, boreholes=()):
 
     import ezdxf
     doc = ezdxf.new(dxfversion="R2010")
@@ -442,6 +355,26 @@ def export_dxf(filepath, data, stratigraphy, x_ref, y_excav, y_wall, L_excav,
     )
     txt2.dxf.insert = (borehole_x, y_wall + 0.30)
 
+    # Additional boreholes (with their own layer levels)
+    for b in boreholes:
+        msp.add_line(
+            (b["x"], y_excav - 3),
+            (b["x"], y_wall),
+            dxfattribs={"layer": "BOREHOLE"}
+        )
+        txt = msp.add_text(
+            b["id"],
+            dxfattribs={"height": 0.30, "layer": "BOREHOLE"}
+        )
+        txt.dxf.insert = (b["x"], y_wall + 0.30)
+
+        for layer in b["stratigraphy"]:
+            msp.add_line(
+                (b["x"] - 0.5, layer["y"]),
+                (b["x"] + 0.5, layer["y"]),
+                dxfattribs={"layer": "STRATIGRAPHY"}
+            )
+
     # ---------------------------------------------------------
     # SAVE DXF
     # ---------------------------------------------------------
@@ -457,9 +390,11 @@ A_inf = A_inf_default
 # =============================================================
 # TABS
 # =============================================================
-tab_anchors, tab_geo, tab_res, tab_bolbo, tab_export, tab_calc = st.tabs(
+(tab_anchors, tab_geo, tab_res, tab_bolbo, tab_losses, tab_sens,
+ tab_layout, tab_export, tab_calc) = st.tabs(
     ["Anchors", "Excavation / Stratigraphy / Wall", "Results",
-     "Bulb Load", "Export", "Calculation Method"]
+     "Bulb Load", "Long-Term Losses", "Sensitivity", "Layout Optimizer",
+     "Export", "Calculation Method"]
 )
 
 # =============================================================
@@ -473,10 +408,16 @@ with tab_anchors:
     if anchors_imported:
         n = len(anchors_imported)
 
+    # ids estáveis (coluna "id" do CSV ou A1, A2, ...) para o histórico
+    anchor_ids = history.anchor_ids(
+        [anchors_imported[i].get("id") if anchors_imported else None for i in range(n)]
+    )
+
     for i in range(n):
         preset = anchors_imported[i] if anchors_imported else {}
 
         with st.expander(f"Anchor {i+1}", expanded=(i == 0)):
+            st.caption(f"Id {anchor_ids[i]}")
             col1, col2, col3 = st.columns(3)
 
             with col1:
@@ -538,12 +479,13 @@ with tab_anchors:
                 )
                 FS = st.number_input(
                     "Safety factor FS",
-                    value=preset.get("FS", 1.8),
+                    value=preset.get("fs", 1.8),
                     key=f"FS_{i}"
                 )
 
             data.append(
                 {
+                    "id": anchor_ids[i],
                     "x1": x1,
                     "y1": y1,
                     "angle": angle,
@@ -602,6 +544,19 @@ with tab_geo:
         value=len(strat_default)
     )
 
+    colW1, colW2 = st.columns(2)
+    with colW1:
+        has_water = st.checkbox("Groundwater", value=y_water_default is not None)
+    with colW2:
+        y_water = st.number_input(
+            "Water level (m)",
+            value=float(y_excav_default if y_water_default is None else y_water_default),
+            format="%.2f",
+            disabled=not has_water,
+        )
+    if not has_water:
+        y_water = None
+
     stratigraphy = []
 
     for j in range(n_layers):
@@ -627,229 +582,370 @@ with tab_geo:
                 format="%.2f",
                 key=f"lr_{j}"
             )
+            cg, cp, cc = st.columns(3)
+            gam = cg.number_input(
+                "γ (kN/m³)",
+                value=float(preset.get("gamma", soil.SOIL_DEFAULTS["gamma"])),
+                min_value=0.0,
+                key=f"gam_{j}"
+            )
+            phi = cp.number_input(
+                "φ (deg)",
+                value=float(preset.get("phi", soil.SOIL_DEFAULTS["phi"])),
+                min_value=0.0,
+                max_value=60.0,
+                key=f"phi_{j}"
+            )
+            coh = cc.number_input(
+                "c (kPa)",
+                value=float(preset.get("c", soil.SOIL_DEFAULTS["c"])),
+                min_value=0.0,
+                key=f"coh_{j}"
+            )
+
+            stratigraphy.append(
+                {"name": name, "y": y, "L": Lr, "gamma": gam, "phi": phi, "c": coh}
+            )
+
+    st.markdown("### Additional Boreholes")
+    st.caption(
+        "One row per layer: borehole ID, borehole X position, layer name "
+        "and layer top level. The main borehole above uses the stratigraphy."
+    )
+
+    df_boreholes = st.data_editor(
+        bh.boreholes_to_table(boreholes_default),
+        num_rows="dynamic",
+        use_container_width=True,
+        key="boreholes_extra",
+    )
+    bad_boreholes = bh.invalid_rows(df_boreholes)
+    if bad_boreholes is not None and len(bad_boreholes):
+        st.warning(
+            "Rows without a numeric borehole X are ignored: "
+            + ", ".join(sorted({str(b) for b in bad_boreholes["borehole_id"]}))
+        )
 
-            stratigraphy.append({"name": name, "y": y, "L": Lr})
+    st.markdown("### Deep-Seated Stability (Kranz)")
+    st.caption(
+        "Planes from the wall below the excavation bottom to the bond zone of "
+        "each anchor, then vertical to the surface. Soil parameters per layer "
+        "above (the top layer also applies above its top level)."
+    )
+    colK1, colK2, colK3, colK4 = st.columns(4)
+    with colK1:
+        kranz_toe_max = st.number_input(
+            "Max toe depth below excavation (m)", min_value=0.0, value=2.0, step=0.5
+        )
+    with colK2:
+        kranz_toe_n = st.number_input(
+            "Toe points", min_value=1, max_value=50, value=5
+        )
+    with colK3:
+        kranz_fs = st.number_input("Required FS", min_value=1.0, value=1.5, step=0.1)
+    with colK4:
+        kranz_along_bond = st.checkbox(
+            "Search along bond zone", value=False,
+            help="Bond points at 1/4, 1/2 and 3/4 of the bond length "
+                 "(off: bond midpoint only).",
+        )
+
+    st.markdown("### Exclusion Zones")
+    st.caption(
+        "Basements, tunnels and property lines the anchors must keep clear "
+        "of: closed polylines, circles and lines of a DXF (section "
+        "coordinates), or a CSV with columns zone, x, y [, clearance] "
+        "[, closed] (one vertex per row)."
+    )
+    zones_upload = st.file_uploader(
+        "Exclusion zones file", type=["dxf", "csv", "txt"], key="zones_file"
+    )
+    zones_parsed = parsed_upload(
+        zones_upload,
+        parse=lambda raw: exclusion.parse_file(raw, zones_upload.name),
+        state_key="zones_cache",
+    )
+
+    zones = []
+    colZ1, colZ2 = st.columns((2, 1))
+    with colZ2:
+        zone_clearance = st.number_input(
+            "Minimum clearance (m)", min_value=0.0, value=1.0, step=0.25,
+            help="Used for zones without their own clearance column.",
+        )
+    if zones_parsed is not None:
+        if zones_parsed["error"] is not None:
+            st.error(f"Exclusion zones read error: {zones_parsed['error']}")
+        else:
+            zone_layers = None
+            if zones_parsed["parsed"]["layers"]:
+                with colZ1:
+                    zone_layers = st.multiselect(
+                        "DXF layers",
+                        zones_parsed["parsed"]["layers"],
+                        default=zones_parsed["parsed"]["layers"],
+                    )
+            zones = exclusion.select(zones_parsed["parsed"]["zones"], zone_layers)
+            st.write(f"{len(zones)} zones loaded.")
+
+boreholes_extra = bh.boreholes_from_table(df_boreholes)
+boreholes = bh.boreholes_from_geo(
+    {"boreholes": boreholes_extra}, borehole_id, borehole_x, stratigraphy
+)
 
 # =============================================================
 # COMPUTATIONS
 # =============================================================
-table = []
+def draw_geometry(data, df_res, geometry):
+    """
+    Figura matplotlib com ancoragens, parede, escavação, sondagens, zonas de
+    exclusão e plano de Kranz.
+    """
+    x_ref = geometry["x_ref"]
+    y_excav, y_wall = geometry["y_excav"], geometry["y_wall"]
+    L_excav = geometry["L_excav"]
+    stratigraphy = geometry["stratigraphy"]
+    borehole_x, borehole_id = geometry["borehole_x"], geometry["borehole_id"]
+    boreholes_extra = geometry["boreholes"]
 
-fig, ax = plt.subplots(figsize=(10, 6))
+    fig, ax = plt.subplots(figsize=(10, 6))
 
-# Reference x coordinate for wall
-x_ref = min(d["x1"] for d in data)
+    for i, d in enumerate(data):
+        row = df_res.iloc[i]
+        x1, y1 = d["x1"], d["y1"]
+        ang = d["angle"]
+        L1, L2 = d["free"], d["bond"]
+        prestress = d["prestress"]
+        x2, y2, x3, y3 = row["X2"], row["Y2"], row["X3"], row["Y3"]
+        P_block = row["P_block (kN)"]
+        R_bond = row["Bond Resistance (kN)"]
+
+        # DRAW FREE LENGTH
+        ax.plot(
+            [x1, x2],
+            [y1, y2],
+            "o-",
+            label="Free Length" if i == 0 else "_nolegend_",
+        )
 
-for i, d in enumerate(data):
-    x1, y1 = d["x1"], d["y1"]
-    ang = d["angle"]
-    L1, L2 = d["free"], d["bond"]
-    strands = d["strands"]
-    prestress = d["prestress"]
-    drill = d["drill_mm"]
-    alpha = d["alpha"]
-    tau = d["shear_stress"]
-    FS_val = d["FS"]
-
-    x2, y2, x3, y3 = compute_coords(x1, y1, ang, L1, L2)
-
-    A = strands * A_strand
-    Lfree_mm = L1 * 1000
-
-    slip_loss = (E * A / Lfree_mm) * delta_L / 1000
-    P_block = prestress + slip_loss
-    Pmax = A * 1440 / 1000
-
-    block_check = "OK" if P_block < Pmax else "FAIL"
-
-    R_bond = (
-        L2
-        * math.pi
-        * (drill * 1e-3)
-        * alpha
-        * tau
-        / FS_val
-    )
-    bond_check = "OK" if R_bond > P_block else "FAIL"
+        xm_free = (x1 + x2) / 2
+        ym_free = (y1 + y2) / 2
+
+        ax.annotate(
+            f"{L1:.2f} m",
+            xy=(xm_free, ym_free),
+            xytext=(5, 5),
+            textcoords="offset points",
+            fontsize=8,
+            rotation=ang,
+            rotation_mode="anchor",
+            color="blue",
+        )
 
-    # DRAW FREE LENGTH
-    ax.plot(
-        [x1, x2],
-        [y1, y2],
-        "o-",
-        label="Free Length" if i == 0 else "_nolegend_",
-    )
+        # Prestress annotation near anchor head
+        ax.annotate(
+            f"P = {prestress:.0f} kN\nP_block = {P_block:.0f} kN",
+            xy=(x1, y1),
+            xytext=(-80, 0),
+            textcoords="offset points",
+            fontsize=8,
+            color="black",
+            ha="left",
+            va="center",
+            bbox=dict(
+                boxstyle="round,pad=0.2",
+                fc="white",
+                ec="black",
+                lw=0.5
+            ),
+        )
 
-    xm_free = (x1 + x2) / 2
-    ym_free = (y1 + y2) / 2
-
-    ax.annotate(
-        f"{L1:.2f} m",
-        xy=(xm_free, ym_free),
-        xytext=(5, 5),
-        textcoords="offset points",
-        fontsize=8,
-        rotation=ang,
-        rotation_mode="anchor",
-        color="blue",
-    )
+        # DRAW BOND LENGTH
+        ax.plot(
+            [x2, x3],
+            [y2, y3],
+            "o--",
+            label="Bond Length" if i == 0 else "_nolegend_",
+        )
 
-    # Prestress annotation near anchor head
-    ax.annotate(
-        f"P = {prestress:.0f} kN\nP_block = {P_block:.0f} kN",
-        xy=(x1, y1),
-        xytext=(-80, 0),
-        textcoords="offset points",
-        fontsize=8,
-        color="black",
-        ha="left",
-        va="center",
-        bbox=dict(
-            boxstyle="round,pad=0.2",
-            fc="white",
-            ec="black",
-            lw=0.5
-        ),
-    )
+        ax.annotate(
+            f"R = {R_bond:.0f} kN",
+            xy=(x2, y2),
+            xytext=(10, 0),
+            textcoords="offset points",
+            fontsize=8,
+            color="darkgreen",
+            ha="left",
+            va="center",
+            bbox=dict(
+                boxstyle="round,pad=0.2",
+                fc="white",
+                ec="darkgreen",
+                lw=0.5
+            ),
+        )
 
-    # DRAW BOND LENGTH
-    ax.plot(
-        [x2, x3],
-        [y2, y3],
-        "o--",
-        label="Bond Length" if i == 0 else "_nolegend_",
-    )
+        xm_bond = (x2 + x3) / 2
+        ym_bond = (y2 + y3) / 2
+
+        ax.annotate(
+            f"{L2:.2f} m",
+            xy=(xm_bond, ym_bond),
+            xytext=(5, 5),
+            textcoords="offset points",
+            fontsize=8,
+            rotation=ang,
+            rotation_mode="anchor",
+            color="green",
+        )
 
-    ax.annotate(
-        f"R = {R_bond:.0f} kN",
-        xy=(x2, y2),
-        xytext=(10, 0),
-        textcoords="offset points",
-        fontsize=8,
-        color="darkgreen",
-        ha="left",
-        va="center",
-        bbox=dict(
-            boxstyle="round,pad=0.2",
-            fc="white",
-            ec="darkgreen",
-            lw=0.5
-        ),
-    )
+    # DRAW WALL
+    ax.plot([x_ref, x_ref], [y_excav, y_wall], "k-", linewidth=3)
 
-    xm_bond = (x2 + x3) / 2
-    ym_bond = (y2 + y3) / 2
-
-    ax.annotate(
-        f"{L2:.2f} m",
-        xy=(xm_bond, ym_bond),
-        xytext=(5, 5),
-        textcoords="offset points",
-        fontsize=8,
-        rotation=ang,
-        rotation_mode="anchor",
-        color="green",
-    )
+    # Excavation
+    ax.plot([x_ref, x_ref - L_excav], [y_excav, y_excav], "k-", linewidth=2)
 
-    table.append(
-        {
-            "Anchor": i + 1,
-            "X1": x1,
-            "Y1": y1,
-            "X2": x2,
-            "Y2": y2,
-            "X3": x3,
-            "Y3": y3,
-            "L_free (m)": L1,
-            "L_bond (m)": L2,
-            "Strands": strands,
-            "Steel Area (mm2)": A,
-            "Prestress (kN)": prestress,
-            "Slip Loss (kN)": round(slip_loss, 2),
-            "P_block (kN)": round(P_block, 2),
-            "Pmax (kN)": round(Pmax, 2),
-            "Block Check": block_check,
-            "Bond Resistance (kN)": round(R_bond, 2),
-            "Bond Check": bond_check,
-            "drill_mm": drill,
-            "alpha": alpha,
-            "shear_stress": tau,
-            "FS": FS_val,
-        }
-    )
+    # STRATIGRAPHY
+    for layer in stratigraphy:
+        y_layer = layer["y"]
+        L_layer = layer["L"]
+        name = layer["name"]
+
+        ax.plot(
+            [x_ref, x_ref + L_layer],
+            [y_layer, y_layer],
+            "k:",
+            linewidth=1.5
+        )
 
-# DRAW WALL
-ax.plot([x_ref, x_ref], [y_excav, y_wall], "k-", linewidth=3)
+        x_label = x_ref + L_layer
 
-# Excavation
-ax.plot([x_ref, x_ref - L_excav], [y_excav, y_excav], "k-", linewidth=2)
+        ax.text(
+            x_label,
+            y_layer + 0.1,
+            f"{name}",
+            fontsize=8,
+            va="bottom",
+            ha="left",
+        )
 
-# STRATIGRAPHY
-for layer in stratigraphy:
-    y_layer = layer["y"]
-    L_layer = layer["L"]
-    name = layer["name"]
+        ax.text(
+            x_label,
+            y_layer - 0.1,
+            f"{y_layer:.2f} m",
+            fontsize=8,
+            va="top",
+            ha="left",
+            color="gray",
+        )
 
+    # BOREHOLE
     ax.plot(
-        [x_ref, x_ref + L_layer],
-        [y_layer, y_layer],
-        "k:",
-        linewidth=1.5
+        [borehole_x, borehole_x],
+        [y_excav - 3, y_wall],
+        color="red",
+        linestyle="--",
+        linewidth=2,
     )
 
-    x_label = x_ref + L_layer
-
     ax.text(
-        x_label,
-        y_layer + 0.1,
-        f"{name}",
-        fontsize=8,
+        borehole_x,
+        y_wall + 0.2,
+        borehole_id,
+        fontsize=10,
         va="bottom",
-        ha="left",
+        ha="center",
+        color="red",
     )
 
-    ax.text(
-        x_label,
-        y_layer - 0.1,
-        f"{y_layer:.2f} m",
-        fontsize=8,
-        va="top",
-        ha="left",
-        color="gray",
-    )
-
-# BOREHOLE
-ax.plot(
-    [borehole_x, borehole_x],
-    [y_excav - 3, y_wall],
-    color="red",
-    linestyle="--",
-    linewidth=2,
-)
-
-ax.text(
-    borehole_x,
-    y_wall + 0.2,
-    borehole_id,
-    fontsize=10,
-    va="bottom",
-    ha="center",
-    color="red",
-)
-
-ax.set_aspect("equal", adjustable="datalim")
-ax.set_xlabel("Horizontal coordinate (m)")
-ax.set_ylabel("Elevation (m)")
-ax.grid(True)
-ax.legend()
+    for b in boreholes_extra:
+        ax.plot(
+            [b["x"], b["x"]],
+            [y_excav - 3, y_wall],
+            color="red",
+            linestyle="--",
+            linewidth=1.5,
+        )
+        ax.text(b["x"], y_wall + 0.2, b["id"], fontsize=10,
+                va="bottom", ha="center", color="red")
+
+        for layer in b["stratigraphy"]:
+            ax.plot([b["x"] - 0.5, b["x"] + 0.5], [layer["y"], layer["y"]],
+                    "k-", linewidth=1)
+            ax.text(b["x"] + 0.6, layer["y"], layer["name"], fontsize=7,
+                    va="center", ha="left")
+
+    # EXCLUSION ZONES
+    zones = geometry.get("zones") or []
+    if zones:
+        from matplotlib.collections import LineCollection, PolyCollection
+
+        closed = [z["points"] for z in zones if z["closed"]]
+        lines = [z["points"] for z in zones if not z["closed"]]
+        ax.add_collection(PolyCollection(
+            closed, facecolor="tab:brown", edgecolor="tab:brown", alpha=0.3,
+            label="Exclusion zone",
+        ))
+        if lines:
+            ax.add_collection(LineCollection(
+                lines, colors="tab:brown", linewidths=2,
+                label="_nolegend_" if closed else "Exclusion zone",
+            ))
+        ax.autoscale_view()
+
+    # DEEP-SEATED PLANE (KRANZ)
+    kr = geometry.get("kranz")
+    if kr:
+        xs, ys = zip(*kr["points"])
+        ax.plot(xs, ys, "-.", color="tab:purple", linewidth=1.5,
+                label=f"Kranz plane (FS = {kr['FS']:.2f})")
+
+    ax.set_aspect("equal", adjustable="datalim")
+    ax.set_xlabel("Horizontal coordinate (m)")
+    ax.set_ylabel("Elevation (m)")
+    ax.grid(True)
+    ax.legend()
+
+    return fig
+
+
+def figure_png(fig, dpi=100):
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=dpi, bbox_inches="tight")
+    plt.close(fig)
+    return buf.getvalue()
 
-df_res = pd.DataFrame(table)
 
-# Save graph
-tmpfile = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
-plt.savefig(tmpfile.name, dpi=300, bbox_inches="tight")
-graph_path = tmpfile.name
+# Reference x coordinate for wall
+x_ref = min(d["x1"] for d in data)
 
+geometry = {
+    "x_ref": x_ref,
+    "y_excav": y_excav,
+    "y_wall": y_wall,
+    "L_excav": L_excav,
+    "stratigraphy": stratigraphy,
+    "borehole_x": borehole_x,
+    "borehole_id": borehole_id,
+    "boreholes": boreholes_extra,
+    "zones": zones,
+}
+
+# parâmetros que determinam os resultados (chaves da cache em disco)
+cache = result_cache()
+key_inputs = {
+    "data": data,
+    "A_strand": A_strand,
+    "delta_L": delta_L,
+    "f_steel": f_steel,
+    "E": E,
+}
+
+df_res = cache.get_object(
+    content_key("df_res", key_inputs),
+    "df_res",
+    lambda: compute_anchors(data, A_strand, delta_L, E=E, f_steel=f_steel),
+)
 
 # =============================================================
 # TAB 3 – RESULTS (SEM EXPORT)
@@ -857,26 +953,97 @@ graph_path = tmpfile.name
 with tab_res:
     st.subheader("Geometry and Results")
 
-    colL, colR = st.columns((1, 1))
-    colL.pyplot(fig)
-    colR.dataframe(df_res, use_container_width=True)
+    geo_view = st.radio(
+        "Geometry view", ["Interactive", "Static image"], horizontal=True,
+        help="Interactive: drawn in the browser (pan/zoom, hover for P_block "
+             "and R_bond). Static image: matplotlib figure rendered on the server.",
+    )
 
-    df_check = df_res[
-        ["Anchor", "P_block (kN)", "Bond Resistance (kN)", "Block Check", "Bond Check"]
-    ]
+    colL, colR = st.columns((1, 1))
+    # preenchidos depois do efeito de grupo (usa o espaçamento do separador
+    # Bulb Load e reduz R_bond)
+    geo_slot = colL.empty()
+    res_slot = colR.empty()
+    check_slot = st.empty()
 
     def color_check(v):
         return (
             "background-color:#c8f7c5" if v == "OK" else "background-color:#f7c5c5"
         )
 
-    st.table(
-        df_check.style.applymap(
-            color_check,
-            subset=["Block Check", "Bond Check"],
+    # ---------------------------------------------------------
+    # EXCLUSION ZONES (INTERSECTION / MINIMUM CLEARANCE)
+    # ---------------------------------------------------------
+    st.markdown("### Exclusion Zones")
+    zone_res = cache.get_object(
+        content_key("zones", key_inputs, zones, zone_clearance),
+        "zones",
+        lambda: exclusion.check(df_res, zones, clearance=zone_clearance),
+    )
+    if not zones:
+        st.caption("No exclusion zones loaded (Geometry tab).")
+    else:
+        df_viol = zone_res["violations"]
+        colX1, colX2, colX3 = st.columns(3)
+        colX1.metric("Zones", len(zones))
+        colX2.metric("Violations", len(df_viol))
+        colX3.metric(
+            "Anchors affected", int((zone_res["per_anchor"]["Zone Check"] == "FAIL").sum())
         )
+        if len(df_viol):
+            st.dataframe(
+                df_viol.style.applymap(
+                    lambda v: "background-color:#f7c5c5",
+                    subset=["Status"],
+                ),
+                use_container_width=True,
+                hide_index=True,
+            )
+        else:
+            st.success("All free and bond lengths keep the minimum clearance.")
+
+    # ---------------------------------------------------------
+    # BOREHOLE ASSIGNMENT (NEAREST BOREHOLE TO EACH BOND ZONE)
+    # ---------------------------------------------------------
+    st.markdown("### Borehole Assignment")
+
+    colB1, colB2 = st.columns(2)
+    with colB1:
+        k_near = st.number_input(
+            "Boreholes listed per anchor",
+            min_value=1,
+            max_value=max(1, len(boreholes)),
+            value=1,
+        )
+    with colB2:
+        interp_layers = st.checkbox(
+            "Interpolate layer levels between boreholes", value=False
+        )
+
+    df_assign = bh.assign(df_res, boreholes, k=k_near, interpolate=interp_layers)
+    st.dataframe(df_assign, use_container_width=True)
+
+    # ---------------------------------------------------------
+    # DESIGN COMBINATIONS (ANCHORS x COMBINATIONS)
+    # ---------------------------------------------------------
+    st.markdown("### Design Combinations")
+    st.caption(
+        "Partial factors on prestress/slip loss (gamma_P, gamma_slip), steel "
+        "(f_steel, gamma_s) and bond (gamma_bond; empty = anchor FS). "
+        "Indicative values - adjust to the applicable code."
     )
 
+    combos_default = design.combination_table(f_steel=f_steel)
+
+    combos = st.data_editor(
+        combos_default,
+        num_rows="dynamic",
+        use_container_width=True,
+        key="design_combinations",
+    )
+
+    gov_slot = st.empty()
+
 
 # =============================================================
 # TAB 4 – BULB LOAD (SEM EXPORT PDF)
@@ -893,36 +1060,364 @@ with tab_bolbo:
     with colB:
         esp = st.number_input("Wall thickness (m)", value=esp)
     with colC:
-        afast = st.number_input("Anchor spacing (m)", value=afast)
+        afast = st.number_input("Anchor spacing (m)", min_value=0.1, value=max(afast, 0.1))
     with colD:
         A_inf = st.number_input("Influence area (m)", value=A_inf)
 
-    carga_parede = H * esp * 25
+    angles = [d["angle"] for d in data]
+    df_bh, carga_parede, V_total, V_metro, C_bolbo = cache.get_object(
+        content_key("df_bh", df_res["Prestress (kN)"], angles, H, esp, afast, A_inf),
+        "df_bh",
+        lambda: bulb_load(df_res["Prestress (kN)"], angles, H, esp, afast, A_inf),
+    )
+
+    st.dataframe(df_bh, use_container_width=True)
 
-    bulb_rows = []
-    V_total = 0
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Sum V (kN)", f"{V_total:.2f}")
+    col2.metric("V per meter (kN/m)", f"{V_metro:.2f}")
+    col3.metric("Bulb load (kN)", f"{C_bolbo:.2f}")
 
-    for idx, row in df_res.iterrows():
-        P = row["Prestress (kN)"]
-        ang = data[idx]["angle"]
-        V = P * math.sin(math.radians(abs(ang)))
-        V_total += V
+    # ---------------------------------------------------------
+    # ALIGNMENT (PAINÉIS AO LONGO DO PK)
+    # ---------------------------------------------------------
+    st.markdown("### Alignment")
+    st.caption(
+        "Wall top and excavation bottom along the chainage. Anchors repeat "
+        "every spacing; each anchor row keeps its depth below the wall top "
+        "and is dropped in panels where it falls below the excavation."
+    )
 
-        bulb_rows.append(
-            {"Anchor": row["Anchor"], "Prestress": P, "Angle": ang, "V": V}
+    df_profile = st.data_editor(
+        pd.DataFrame(
+            alignment_default
+            or [{"chainage": 0.0, "y_wall": y_wall, "y_excav": y_excav},
+                {"chainage": 100.0, "y_wall": y_wall, "y_excav": y_excav}],
+            columns=alignment.PROFILE_COLUMNS,
+        ),
+        num_rows="dynamic",
+        use_container_width=True,
+        key="alignment_profile",
+    )
+    profile = alignment.profile_from_table(df_profile)
+    alignment_rows = profile.to_dict("records")
+
+    if len(profile) >= 2:
+        df_panels = alignment.evaluate(
+            profile,
+            df_res["Prestress (kN)"], angles, [d["y1"] for d in data],
+            y_wall, esp, afast, A_inf,
         )
+        if len(df_panels):
+            colP1, colP2, colP3 = st.columns(3)
+            colP1.metric("Panels", len(df_panels))
+            colP2.metric("Max bulb load (kN)", f"{df_panels['C_bolbo'].max():.2f}")
+            colP3.metric(
+                "At chainage",
+                f"{df_panels.loc[df_panels['C_bolbo'].idxmax(), 'Chainage']:.1f}",
+            )
 
-    df_bh = pd.DataFrame(bulb_rows)
+            st.image(cache.get_or_set(
+                content_key("figure-alignment", df_panels.to_dict("list"), alignment_rows),
+                "png",
+                lambda: figure_png(alignment.profile_figure(df_panels, profile)),
+            ), use_container_width=True)
+            st.dataframe(df_panels, use_container_width=True, hide_index=True)
+    else:
+        st.info("Enter at least two chainage points.")
 
-    V_metro = V_total / afast
-    C_bolbo = V_metro * A_inf + carga_parede * A_inf
+    # ---------------------------------------------------------
+    # EARTH PRESSURE LOADS (PRÉ-ESFORÇO PROPOSTO)
+    # ---------------------------------------------------------
+    st.markdown("### Earth Pressure Loads")
+    st.caption(
+        "Active earth pressure from the stratigraphy (γ, φ, c per layer, "
+        "groundwater level in the Geometry tab) between the wall top and the "
+        "excavation bottom, split among anchor levels by tributary height "
+        "and multiplied by the spacing."
+    )
 
-    st.dataframe(df_bh, use_container_width=True)
+    ed = pressure.PRESSURE_DEFAULTS
+    colE1, colE2, colE3, colE4 = st.columns(4)
+    with colE1:
+        surcharge = st.number_input("Surcharge (kPa)", min_value=0.0, value=ed["surcharge"])
+    with colE2:
+        load_factor = st.number_input(
+            "Load factor", min_value=0.1, value=ed["load_factor"], step=0.05
+        )
+    with colE3:
+        lockoff = st.number_input(
+            "Prestress / required load", min_value=0.1, value=ed["lockoff"], step=0.05
+        )
+    with colE4:
+        prestress_step = st.number_input(
+            "Round up to (kN)", min_value=1.0, value=ed["prestress_step"], step=5.0
+        )
 
-    col1, col2, col3 = st.columns(3)
-    col1.metric("Sum V (kN)", f"{V_total:.2f}")
-    col2.metric("V per meter (kN/m)", f"{V_metro:.2f}")
-    col3.metric("Bulb load (kN)", f"{C_bolbo:.2f}")
+    earth = pressure.required_loads(
+        data, stratigraphy, y_wall, y_excav, afast, y_water=y_water,
+        params={"surcharge": surcharge, "load_factor": load_factor,
+                "lockoff": lockoff, "prestress_step": prestress_step},
+    )
+
+    colE1, colE2 = st.columns((1, 2))
+    with colE1:
+        st.metric("Active thrust to excavation (kN/m)", f"{earth['total']:.1f}")
+        st.image(cache.get_or_set(
+            # o diagrama só depende do perfil e das cotas / faixas dos níveis
+            content_key("figure-pressure", stratigraphy, y_wall, y_excav, y_water, surcharge,
+                        [earth["table"].get(c, []) for c in ("Y1 (m)", "Band bottom (m)")]),
+            "png",
+            lambda: figure_png(pressure.pressure_figure(earth, y_water)),
+        ), use_container_width=True)
+    with colE2:
+        st.dataframe(earth["table"], use_container_width=True, hide_index=True)
+
+        def apply_proposed(values):
+            for i, v in enumerate(values):
+                st.session_state[f"pre_{i}"] = float(v)
+
+        st.button(
+            "Apply proposed prestress",
+            on_click=apply_proposed,
+            args=(list(earth["table"].get("Proposed prestress (kN)", [])),),
+            help="Writes the proposed values into the Prestress fields of the Anchors tab.",
+        )
+
+# =============================================================
+# DEEP-SEATED STABILITY (KRANZ) + GEOMETRY FIGURE
+# =============================================================
+n_toe = int(kranz_toe_n)
+kranz_res = cache.get_object(
+    content_key("kranz", key_inputs, geometry, afast, y_water,
+                kranz_toe_max, n_toe, kranz_fs, kranz_along_bond),
+    "kranz",
+    lambda: kranz.evaluate(
+        df_res, geometry, afast,
+        toe_depths=[kranz_toe_max * i / max(n_toe - 1, 1) for i in range(n_toe)],
+        fractions=(0.25, 0.5, 0.75) if kranz_along_bond else (0.5,),
+        fs_required=kranz_fs,
+        y_water=y_water,
+    ),
+)
+if kranz_res["governing"] is not None:
+    geometry["kranz"] = {
+        "points": kranz_res["governing"]["points"],
+        "FS": kranz_res["min_fs"],
+    }
+
+with tab_res:
+    st.markdown("### Deep-Seated Stability (Kranz)")
+    if kranz_res["governing"] is None:
+        st.info("No candidate plane: bond zones must lie behind the wall.")
+    else:
+        gov = kranz_res["governing"]
+        colK1, colK2, colK3 = st.columns(3)
+        colK1.metric("Minimum FS", f"{kranz_res['min_fs']:.2f}")
+        colK2.metric("Governing anchor", f"A{int(gov['Anchor'])}")
+        colK3.metric("Toe depth (m)", f"{gov['Toe depth (m)']:.2f}")
+        if kranz_res["min_fs"] >= kranz_fs:
+            st.success(f"All planes satisfy FS >= {kranz_fs:.2f}.")
+        else:
+            st.error(f"Governing plane below the required FS = {kranz_fs:.2f}.")
+        st.dataframe(
+            kranz_res["per_anchor"].style.applymap(color_check, subset=["Check"]),
+            use_container_width=True,
+            hide_index=True,
+        )
+
+    # ---------------------------------------------------------
+    # EFEITO DE GRUPO 3D (AO LONGO DA PAREDE)
+    # ---------------------------------------------------------
+    st.markdown("### 3D Group Effect (along the wall)")
+    st.caption(
+        "The section is repeated every spacing along the wall. Bond zones "
+        "closer than influence × D share the ground around them and their "
+        "bond resistance is reduced by the group factor η. When enabled, the "
+        "reduced R_bond is used in the results, the Bond Check, the design "
+        "combinations and the report."
+    )
+    group_on = st.checkbox("Evaluate group effect", value=False, key="group_on")
+    group_key = None  # parâmetros do efeito de grupo nas chaves da cache
+    if group_on:
+        gd = group.GROUP_DEFAULTS
+        wall_default = (
+            float(profile["chainage"].max() - profile["chainage"].min())
+            if len(profile) >= 2 else 30.0
+        )
+        colG1, colG2, colG3 = st.columns(3)
+        wall_length = colG1.number_input(
+            "Wall length (m)", min_value=0.0, value=wall_default, step=1.0,
+            key="group_length",
+        )
+        group_influence = colG2.number_input(
+            "Influence (spacing / D)", min_value=1.0, value=gd["influence"],
+            step=0.5, key="group_influence",
+        )
+        group_stagger = colG3.checkbox(
+            "Stagger alternate levels", value=False, key="group_stagger",
+            help="Shifts every other anchor level by half the spacing.",
+        )
+        group_res = cache.get_object(
+            content_key("group", key_inputs, afast, wall_length,
+                        group_influence, group_stagger),
+            "group",
+            lambda: group.evaluate(
+                df_res, afast, wall_length, stagger=group_stagger,
+                params={"influence": group_influence},
+            ),
+        )
+        df_res = group.apply(df_res, group_res)
+        group_key = [afast, wall_length, group_influence, group_stagger]
+        ga = group_res["per_anchor"]
+        colG4, colG5, colG6 = st.columns(3)
+        colG4.metric("Bond zones", f"{group_res['instances']:,}")
+        colG5.metric("Interacting pairs", f"{group_res['pairs']:,}")
+        colG6.metric("Minimum η", f"{ga['eta min'].min():.3f}" if len(ga) else "-")
+        if (ga["Group Check"] == "OK").all():
+            st.success("Group bond resistance exceeds the block force for all anchors.")
+        else:
+            st.error("Group bond resistance below the block force for some anchors.")
+        st.dataframe(
+            ga.style.applymap(color_check, subset=["Group Check"]),
+            use_container_width=True,
+            hide_index=True,
+        )
+
+    # ---------------------------------------------------------
+    # RESULTADOS E VERIFICAÇÕES (R_BOND COM O EFEITO DE GRUPO)
+    # ---------------------------------------------------------
+    res_slot.dataframe(df_res, use_container_width=True)
+
+    df_check = df_res[
+        ["Anchor", "P_block (kN)", "Bond Resistance (kN)", "Block Check", "Bond Check"]
+    ]
+    check_slot.table(
+        df_check.style.applymap(
+            color_check,
+            subset=["Block Check", "Bond Check"],
+        )
+    )
+
+    df_gov = design.governing(
+        data, A_strand, delta_L, combos, E=E, eta=df_res.get("Group eta"),
+        f_steel=f_steel,
+    )
+    gov_slot.dataframe(
+        df_gov.style.applymap(color_check, subset=["Check"]),
+        use_container_width=True,
+    )
+
+    if geo_view == "Interactive":
+        geo_slot.vega_lite_chart(geoview.spec(df_res, geometry))
+    else:
+        png = cache.get_or_set(
+            content_key("figure", key_inputs, geometry, group_key),
+            "png",
+            lambda: figure_png(draw_geometry(data, df_res, geometry)),
+        )
+        geo_slot.image(png, use_container_width=True)
+
+# =============================================================
+# TAB – LONG-TERM LOSSES (RELAXATION, CREEP, SHRINKAGE)
+# =============================================================
+with tab_losses:
+    st.subheader("Time-Dependent Prestress Losses")
+
+    ld = losses.LOSS_DEFAULTS
+    colA, colB, colC, colD = st.columns(4)
+
+    with colA:
+        life = st.number_input("Design life (years)", min_value=1, max_value=150, value=100)
+        step = st.number_input("Time step (days)", min_value=0.1, value=1.0, step=0.5)
+    with colB:
+        f_pk = st.number_input("Strand strength f_pk (MPa)", value=ld["f_pk"])
+        rho_1000 = st.number_input("Relaxation at 1000 h (%)", value=ld["rho_1000"], step=0.5)
+    with colC:
+        creep_ks = st.number_input("Creep k_s (mm per log cycle)", value=ld["creep_ks"], step=0.1)
+        shrinkage = st.number_input(
+            "Final shrinkage strain", value=ld["shrinkage_inf"], format="%.5f", step=1e-5
+        )
+    with colD:
+        residual_min = st.number_input(
+            "Minimum residual / prestress", value=ld["residual_min"], step=0.01
+        )
+
+    hist = losses.simulate(
+        data, A_strand, delta_L,
+        years=life,
+        step_days=step,
+        params={
+            "f_pk": f_pk,
+            "rho_1000": rho_1000,
+            "creep_ks": creep_ks,
+            "shrinkage_inf": shrinkage,
+            "residual_min": residual_min,
+        },
+        E=E,
+    )
+
+    df_curves = pd.DataFrame(
+        hist["residual"].T,
+        index=pd.Index(hist["times"], name="Time (years)"),
+        columns=[f"A{i+1}" for i in range(len(data))],
+    )
+    st.line_chart(df_curves)
+
+    if hist["first_change_years"] is None:
+        st.success("No check changes state over the design life.")
+    else:
+        st.warning(
+            f"First check state change at {hist['first_change_years']:.2f} years."
+        )
+
+    st.dataframe(hist["summary"], use_container_width=True)
+
+# =============================================================
+# TAB – SENSITIVITY (TORNADO)
+# =============================================================
+with tab_sens:
+    st.subheader("Sensitivity of Block and Bond Utilization")
+
+    colS1, colS2, colS3 = st.columns(3)
+    with colS1:
+        sens_target = st.selectbox(
+            "Anchor",
+            ["Section (max over anchors)"] + [f"Anchor {i+1}" for i in range(len(data))],
+        )
+    with colS2:
+        sens_metric = st.radio(
+            "Utilization", ["P_block / R_bond", "P_block / Pmax"]
+        )
+    with colS3:
+        sens_var = st.slider("Variation (±%)", 1, 50, 10) / 100
+
+    torn = sensitivity.tornado(
+        data, A_strand, delta_L, variation=sens_var, E=E, f_steel=f_steel
+    )
+    t = torn["U_bond" if sens_metric == "P_block / R_bond" else "U_block"]
+
+    if sens_target.startswith("Section"):
+        base, low, high = t["section_base"], t["section_low"], t["section_high"]
+    else:
+        k = int(sens_target.split()[-1]) - 1
+        base, low, high = t["base"][k], t["low"][k], t["high"][k]
+
+    title = f"{sens_target} - {sens_metric}"
+    st.image(cache.get_or_set(
+        content_key("figure-tornado", base, low, high, torn["labels"], title, sens_var),
+        "png",
+        lambda: figure_png(sensitivity.tornado_figure(
+            base, low, high, torn["labels"], title=title, variation=sens_var,
+        )),
+    ), use_container_width=True)
+
+    d_block, d_bond = sensitivity.derivatives(data, A_strand, delta_L, E=E, f_steel=f_steel)
+    st.markdown("Derivatives dU/dx (per unit of each input)")
+    st.dataframe(
+        d_bond if sens_metric == "P_block / R_bond" else d_block,
+        use_container_width=True,
+    )
 
 # =============================================================
 # TAB 5 – EXPORT (FINAL)
@@ -936,22 +1431,21 @@ with tab_export:
     geo_payload = {
         "section_name": section_name,
         "y_excav": y_excav,
-        "L_excav": L_excav,
+        "l_excav": L_excav,
         "y_wall": y_wall,
         "stratigraphy": stratigraphy,
         "borehole_id": borehole_id,
         "borehole_x": borehole_x,
+        "boreholes": boreholes_extra,
+        "alignment": alignment_rows,
+        "y_water": y_water,
         "esp": esp,
         "afast": afast,
-        "A_inf": A_inf,
-        "A_strand": A_strand,
-        "delta_L": delta_L,
+        "a_inf": A_inf,
+        "a_strand": A_strand,
+        "delta_l": delta_L,
     }
 
-    df_export = pd.DataFrame(
-        [{**d, **geo_payload, "geo_json": json.dumps(geo_payload)} for d in data]
-    )
-
     # ---------------------------------------------------------
     # EXPORT CSV
     # ---------------------------------------------------------
@@ -959,7 +1453,7 @@ with tab_export:
 
     st.download_button(
         "Download ALL (CSV)",
-        df_export.to_csv(index=False).encode("utf-8"),
+        imports.export_csv(data, geo_payload),
         "anchors_export.csv",
         mime="text/csv",
     )
@@ -971,9 +1465,40 @@ with tab_export:
 # ---------------------------------------------------------
     st.subheader("Export PDF Report")
 
-    pdf_bytes = create_pdf(
+    colP1, colP2, colP3 = st.columns(3)
+    with colP1:
+        pdf_mode = st.radio(
+            "Anchor pages",
+            ["One page per anchor", "Compact summary table"],
+        )
+    with colP2:
+        pdf_figure = st.radio(
+            "Geometry figure",
+            ["Vector", "Raster"],
+        )
+    with colP3:
+        pdf_dpi = st.select_slider(
+            "Raster resolution (dpi)",
+            options=[72, 100, 150, 200, 300],
+            value=150,
+            disabled=(pdf_figure == "Vector"),
+        )
+
+    # fontes base do PDF (cp1252): o resto sai como "?"
+    lost = unsupported_chars(section_name, geometry)
+    if lost:
+        st.warning(
+            "Characters not available in the PDF fonts will be shown as '?': "
+            + " ".join(sorted(lost))
+        )
+
+    pdf_key = content_key(
+        "pdf", LAYOUT_VERSION, key_inputs, geometry, section_name, esp, afast, A_inf,
+        pdf_mode, pdf_figure, pdf_dpi, zone_clearance, group_key,
+    )
+    pdf_bytes = cache.get_or_set(pdf_key, "pdf", lambda: create_pdf(
         df_res,
-        graph_path,
+        draw_geometry(data, df_res, geometry) if pdf_figure == "Raster" else None,
         section_name,
         df_bh,
         C_bolbo,
@@ -985,7 +1510,12 @@ with tab_export:
         esp,
         afast,
         A_inf,
-    )
+        mode="summary" if pdf_mode == "Compact summary table" else "pages",
+        geometry=geometry,
+        figure=pdf_figure.lower(),
+        dpi=pdf_dpi,
+        exclusion=zone_res["violations"] if zones else None,
+    ))
 
     st.download_button(
         "Download PDF Report",
@@ -1002,9 +1532,10 @@ with tab_export:
     # ---------------------------------------------------------
     st.subheader("Export DXF")
 
-    if st.button("Download DXF"):
+    def build_dxf():
         dxf_tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".dxf")
         dxf_path = dxf_tmp.name
+        dxf_tmp.close()
 
         export_dxf(
             filepath=dxf_path,
@@ -1015,21 +1546,163 @@ with tab_export:
             y_wall=y_wall,
             L_excav=L_excav,
             borehole_x=borehole_x,
-            borehole_id=borehole_id
+            borehole_id=borehole_id,
+            boreholes=boreholes_extra
         )
 
         with open(dxf_path, "rb") as f:
-            st.download_button(
-                "Download DXF File",
-                data=f.read(),
-                file_name=f"{section_name}_anchors.dxf",
-                mime="application/dxf"
-            )
+            raw = f.read()
 
         try:
             os.unlink(dxf_path)
         except Exception:
             pass
+        return raw
+
+    if st.button("Download DXF"):
+        st.download_button(
+            "Download DXF File",
+            data=cache.get_or_set(
+                content_key("dxf", key_inputs, geometry), "dxf", build_dxf
+            ),
+            file_name=f"{section_name}_anchors.dxf",
+            mime="application/dxf"
+        )
+
+    st.markdown("---")
+
+    # ---------------------------------------------------------
+    # VERSION HISTORY (DELTAS POR ANCORAGEM)
+    # ---------------------------------------------------------
+    st.subheader("Version History")
+    st.caption(
+        "Snapshots of the anchors, stratigraphy and results of this section, "
+        "kept per project. Each version only stores what changed since the "
+        "previous one; anchors are matched by their id (CSV column \"id\")."
+    )
+    if not project.strip():
+        st.info("Enter a project name in the sidebar to keep a version history.")
+    else:
+        vhist = version_history(project.strip(), section_name)
+
+        colH1, colH2 = st.columns((3, 1))
+        version_label = colH1.text_input("Version label", key="version_label")
+        version_auto = st.checkbox(
+            "Save a version whenever the results change", key="version_auto"
+        )
+        if colH2.button("Save version"):
+            v = vhist.commit(data, stratigraphy, df_res, version_label)
+            st.success(f"Saved as version {v}.")
+        elif version_auto:
+            vhist.commit(data, stratigraphy, df_res, "auto")
+
+        n_versions = len(vhist)  # inclui versões de outras sessões
+        if n_versions:
+            st.dataframe(vhist.versions(), use_container_width=True, hide_index=True)
+        if n_versions >= 2:
+            colH3, colH4 = st.columns(2)
+            v_from = colH3.selectbox(
+                "Compare version", range(n_versions), index=n_versions - 2, key="version_from"
+            )
+            v_to = colH4.selectbox(
+                "with version", range(n_versions), index=n_versions - 1, key="version_to"
+            )
+            df_diff = vhist.diff(v_from, v_to)
+            if len(df_diff):
+                st.write(
+                    f"{len(df_diff)} anchors changed, "
+                    f"{int(df_diff['Check changed'].sum())} with a different check."
+                )
+                st.dataframe(
+                    df_diff.style.applymap(
+                        color_check, subset=["Block Check (to)", "Bond Check (to)"]
+                    ),
+                    use_container_width=True,
+                    hide_index=True,
+                )
+            else:
+                st.info("No change in checks or utilization between these versions.")
+
+# =============================================================
+# TAB – LAYOUT OPTIMIZER (ROWS, LEVELS, SPACING)
+# =============================================================
+with tab_layout:
+    st.subheader("Anchor Layout Optimizer")
+    st.caption(
+        "Anchor 1 is the template (angle, free length, drill, α, τ, FS). "
+        "Rows, levels y1, spacing, strands, bond length and prestress are chosen "
+        "to minimize steel and drilling cost per metre of wall."
+    )
+
+    lp = layout.LAYOUT_DEFAULTS
+    colO1, colO2, colO3, colO4 = st.columns(4)
+    with colO1:
+        # impulso activo até ao fundo da escavação (separador Bulb Load)
+        T_req = load_factor * earth["total"]
+        st.metric("Required horizontal force (kN/m)", f"{T_req:.1f}")
+        st.caption("Active earth pressure thrust × load factor (Bulb Load tab).")
+        C_max = st.number_input("Max bulb load C_bolbo (kN, 0 = no limit)", value=0.0, step=10.0)
+    with colO2:
+        rows_max = st.number_input("Max rows", min_value=1, max_value=10, value=lp["rows_max"])
+        level_step = st.number_input("Level step (m)", min_value=0.1, value=lp["level_step"], step=0.25)
+    with colO3:
+        afast_rng = st.slider(
+            "Spacing range (m)", 0.5, 8.0, (lp["afast_min"], lp["afast_max"]), step=0.5
+        )
+        spacing_rng = st.slider(
+            "Vertical distance between rows (m)", 0.5, 8.0,
+            (lp["row_spacing_min"], lp["row_spacing_max"]), step=0.5,
+        )
+    with colO4:
+        cost_steel = st.number_input("Cost per kg steel", value=lp["cost_steel"])
+        cost_drill = st.number_input("Cost per m drilled", value=lp["cost_drill"])
+
+    if T_req <= 0:
+        st.info("No active thrust on the wall; nothing to anchor.")
+    elif st.button("Optimize layout"):
+        try:
+            st.session_state["layout_result"] = layout.optimize(
+                data[0], y_wall, y_excav, A_strand, delta_L, T_req,
+                C_bolbo_max=C_max or None, esp=esp, A_inf=A_inf,
+                params={
+                    "rows_max": rows_max,
+                    "level_step": level_step,
+                    "afast_min": afast_rng[0],
+                    "afast_max": afast_rng[1],
+                    "row_spacing_min": spacing_rng[0],
+                    "row_spacing_max": spacing_rng[1],
+                    "cost_steel": cost_steel,
+                    "cost_drill": cost_drill,
+                },
+                E=E, f_steel=f_steel,
+            )
+        except ValueError as e:
+            st.error(str(e))
+
+    opt = st.session_state.get("layout_result")
+    if opt is not None:
+        st.write(
+            f"{opt['evaluated']} layouts evaluated, {opt['feasible']} feasible."
+        )
+        if opt["layouts"]:
+            st.dataframe(opt["ranked"], use_container_width=True, hide_index=True)
+
+            rank = st.selectbox("Layout", opt["ranked"]["Rank"].tolist())
+            chosen = opt["layouts"][rank - 1]
+            geo_layout = {**geo_payload, "afast": chosen[0]["afast"]}
+            df_layout = pd.DataFrame([
+                {**{k: v for k, v in a.items() if k != "afast"},
+                 "geo_json": json.dumps(geo_layout) if i == 0 else ""}
+                for i, a in enumerate(chosen)
+            ])
+            st.download_button(
+                "Download layout (CSV, importable)",
+                df_layout.to_csv(index=False).encode("utf-8"),
+                f"{section_name}_layout_{rank}.csv",
+                mime="text/csv",
+            )
+        else:
+            st.warning("No feasible layout; relax the limits or widen the search ranges.")
 
 # =============================================================
 # TAB – CALCULATION METHOD
@@ -1076,7 +1749,7 @@ Slip δ = {delta_L} mm (user-editable)
 
     P_max = A * f_steel / 1000
 
-where f_steel = 1440 MPa.
+where f_steel = {f_steel} MPa (user-editable, default = 1440 MPa).
 
 Check: OK if P_block < P_max.
 
@@ -1100,16 +1773,193 @@ All parameters user-controlled.
     V_m = V_total / spacing
     C_bolbo = V_m * A_inf + carga_parede * A_inf
 
-## 10. Exports
+Alignment: H, carga_parede, V_total and C_bolbo per panel of width
+spacing along the chainage profile (H averaged over the panel; anchor rows
+kept at their depth below the wall top, dropped below the excavation).
+
+## 10. Design Combinations
+
+For each combination c (Results tab):
+
+    P_d = γ_P * P_prestress + γ_slip * ΔP_slip
+    P_max,d = A * f_steel / γ_s / 1000
+    R_d = L_bond * π * d * α * τ / γ_bond   (γ_bond empty → FS)
+
+    U_block = P_d / P_max,d      U_bond = P_d / R_d
+
+All anchors × combinations are evaluated at once; the governing
+combination is the one with the largest utilization (OK if U ≤ 1).
+
+## 11. Time-Dependent Losses
+
+Residual load P(t) = P_prestress − ΔP_relax − ΔP_creep − ΔP_shrink:
+
+    Δσ_relax = σ_pi · 0.66 ρ1000 e^(9.1 μ) (t_h/1000)^(0.75(1−μ)) · 1e-5,  μ = σ_pi / f_pk
+    ΔP_creep = (E * A / L_free_mm) * k_s log10(t / t0) / 1000
+    ΔP_shrink = E * A * ε_inf * t / (t + t_s) / 1000
+
+Evaluated as anchors × time steps in chunks; checks: P(t) ≥ ratio · P_prestress
+and R_bond > P(t).
+
+## 12. Sensitivity
+
+Analytic derivatives of U_block = P_block / P_max and U_bond = P_block / R_bond
+with respect to prestress, strands, A_strand, δ, free/bond length, drill,
+α, τ and FS. The tornado chart evaluates each input at ±variation (all
+anchors and inputs in one batch); the section chart uses the largest
+utilization among the anchors.
+
+## 13. Layout Optimizer
+
+The required horizontal force T_req (kN/m) is the active thrust down to
+the excavation bottom (section 15) times the load factor. It is spread
+uniformly over the wall height; each row takes the height between the mid-points to its
+neighbours (wall top and excavation bottom close the ends):
+
+    P_i = T_req / H * h_i * spacing / cos(θ)   (rounded up to 10 kN)
+
+For each candidate layout (rows × levels y1 × spacing) every row gets the
+cheapest (strands, bond length) that passes the block and bond checks;
+layouts with C_bolbo above the limit are discarded. Cost per metre:
+
+    (cost_steel * steel kg + cost_drill * drilled m) / spacing
+
+## 14. Deep-Seated Stability (Kranz)
+
+Candidate planes run from F, on the wall at a depth t below the
+excavation bottom, to a point B of each bond zone (mid-point, or 1/4,
+1/2, 3/4 of the bond length), then vertically to the wall top. Per metre
+of wall, for the soil block behind the wall:
+
+    G   block weight (γ per layer)
+    Ea  active thrust on the wall from the top down to F
+    E1  active thrust on the vertical through B
+    Q   reaction on FB, inclined by φ from the normal, plus cohesion c·l
+
+    Ka = tan²(45° - φ/2),   σ_a = max(Ka σ_v - 2 c √Ka, 0)
+
+Horizontal and vertical equilibrium give the largest anchor force the
+block can carry, A_poss. The existing force A_exist is the sum of
+P_block / spacing for the anchors whose bond mid-point lies inside the
+block (projected on the anchor direction of the plane):
+
+    FS = A_poss / A_exist   (minimum over all planes)
+
+## 15. Earth Pressure Loads
+
+Horizontal pressure from the stratigraphy, with surcharge q and optional
+groundwater level (unit weight of water 10 kN/m³):
+
+    u = γ_w * max(y_water - y, 0)
+    σ'_v = q + Σ γ' dz   (γ' = γ - γ_w below the water level)
+    σ_h = max(Ka σ'_v - 2 c √Ka, 0) + u
+
+σ_h is integrated on a 5 cm grid from the wall top to the excavation
+bottom. Each anchor level takes the band between the mid-points to its
+neighbours:
+
+    P_i = load factor * T_i * spacing / cos(θ) / (anchors at that level)
+    proposed prestress = (prestress / required) * P_i, rounded up
+
+## 16. Exclusion Zones
+
+Zones come from a DXF (closed polylines and circles are areas, lines and
+open polylines are boundaries) or a coordinate CSV. For each anchor the
+free (X1-X2) and bond (X2-X3) segments are checked against every zone:
+
+    distance = min distance between the segment and the zone edges
+               (0 if they cross or the segment lies inside an area)
+    violation if distance < clearance
+
+Zone edges are stored in a uniform grid, so each segment is only compared
+with edges in the cells around it.
+
+## 17. 3D Group Effect
+
+The section is repeated along the wall every spacing (optionally with
+alternate levels shifted by half the spacing). Each bond zone mobilises
+the ground within R = influence * D / 2 of its axis; at each of 11 points
+along the bond, the ground shared with a neighbour at distance d is the
+lens common to the two circles, split between both:
+
+    f(d) = [2R² acos(d/2R) - (d/2) √(4R² - d²)] / (π R²)   (d < 2R)
+    loss = min(Σ f / 2, 0.5)
+    η = 1 - mean loss along the bond
+    R_bond,group = η_min * R_bond   (check: R_bond,group > P_block)
+
+With the group effect enabled, R_bond,group replaces R_bond in the results
+table, the Bond Check, the design combinations (R_d * η_min) and the PDF.
+
+Neighbours are found with a 3D grid of the bond zone boxes; pairs with
+the same anchors and the same offset along the wall are computed once.
+
+## 18. Exports
 
 You can export:
 - Full CSV including section name and design parameters
-- Full PDF report
+- Full PDF report (with exclusion zone violations, when zones are loaded)
 - Full DXF geometry with layers:
   ANCHOR_FREE, ANCHOR_BOND, ANCHOR_LABEL, WALL, EXCAVATION, STRATIGRAPHY, BOREHOLE
-"""
-    )
 
+## 19. Version History
 
+Histories are kept per project (sidebar) and section, in the user's data
+directory. Anchors are identified by a stable id (CSV column "id", or
+A1, A2, ... when missing), so deleting an anchor does not change the
+others. Each saved version stores, per anchor (and per stratigraphy
+layer), only the fields that changed since the previous version; every
+25th version is stored in full. Comparing two versions uses the stored results:
 
+    U_block = P_block / Pmax,   U_bond = P_block / R_bond
 
+Only anchors changed between the two versions are compared; an anchor is
+listed when its Block/Bond Check or a utilization changed.
+"""
+    )
+
+# =============================================================
+# RESULT CACHE STATISTICS (SIDEBAR)
+# =============================================================
+with st.sidebar.expander("Result cache"):
+    cs = cache.stats()
+    st.write(
+        f"{cs['entries']} entries, {cs['bytes'] / 1e6:.1f} / "
+        f"{cs['max_bytes'] / 1e6:.0f} MB"
+    )
+    st.write(
+        f"Hits {cs['hits']} / misses {cs['misses']} "
+        f"({cs['hit_rate']:.0%}), evictions {cs['evictions']}"
+    )
+    if st.button("Clear cache"):
+        cache.clear()
+
+# =============================================================
+# PROFILER (SIDEBAR)
+# =============================================================
+if rerun_profiler is not None:
+    st.session_state.pop("rerun_profiler", None)
+    st.session_state["profile_result"] = rerun_profiler.stop()
+
+with st.sidebar.expander("Profiler"):
+    st.checkbox(
+        "Profile next rerun",
+        key="profile_next_rerun",
+        help="Runs the next rerun under cProfile and a stack sampler; "
+             "switches itself off afterwards.",
+    )
+    prof = st.session_state.get("profile_result")
+    if prof:
+        st.write(f"Last profile: {prof['seconds']:.2f} s, {prof['samples']} samples")
+        st.download_button(
+            "Download pstats",
+            prof["pstats"],
+            "anchorage.pstats",
+            mime="application/octet-stream",
+        )
+        st.download_button(
+            "Download flamegraph stacks",
+            prof["folded"].encode("utf-8"),
+            "anchorage.folded",
+            mime="text/plain",
+        )
+        st.code(prof["summary"], language=None)
@@ -0,0 +1,34 @@
+"""
+Parede ao longo do alinhamento (anchorage.alignment): carga no bolbo por
+painel, calculada à mão.
+"""
+import numpy as np
+import pandas as pd
+
+from anchorage import alignment
+
+PRESTRESS, ANGLE, Y1 = [300.0, 300.0], [-20.0, -20.0], [-1.5, -4.5]
+
+
+def test_constant_section():
+    # H = 6, carga_parede = 6 · 0.3 · 25 = 45; V = 2 · 300 · sin 20° = 205.21
+    # C_bolbo = (205.21 / 2.5 + 45) · 1.5 = 190.63
+    profile = pd.DataFrame({"chainage": [0.0, 10.0], "y_wall": [0.0, 0.0],
+                            "y_excav": [-6.0, -6.0]})
+    out = alignment.evaluate(profile, PRESTRESS, ANGLE, Y1, 0.0, 0.3, 2.5, 1.5)
+    assert out["Chainage"].tolist() == [1.25, 3.75, 6.25, 8.75]
+    assert (out["Rows"] == 2).all() and (out["carga_parede"] == 45.0).all()
+    V = 600.0 * np.sin(np.radians(20.0))
+    assert np.allclose(out["C_bolbo"], round((V / 2.5 + 45.0) * 1.5, 2))
+
+
+def test_level_below_excavation_is_dropped():
+    # fundo de -2 (PK 0) a -6 (PK 10): painel 1 com H = 2.5 só tem o nível
+    # a 1.5 m de profundidade; painel 4 com H = 5.5 tem os dois
+    profile = pd.DataFrame({"chainage": [0.0, 10.0], "y_wall": [0.0, 0.0],
+                            "y_excav": [-2.0, -6.0]})
+    out = alignment.evaluate(profile, PRESTRESS, ANGLE, Y1, 0.0, 0.3, 2.5, 1.5)
+    assert np.allclose(out["H"], [2.5, 3.5, 4.5, 5.5])
+    assert out["Rows"].tolist() == [1, 1, 1, 2]
+    V = 300.0 * np.sin(np.radians(20.0))
+    assert np.isclose(out["C_bolbo"].iloc[0], round((V / 2.5 + 2.5 * 0.3 * 25) * 1.5, 2))
@@ -0,0 +1,53 @@
+"""
+Sondagens (anchorage.boreholes): leitura da tabela do data_editor com
+valores inválidos, sondagem mais próxima e camada de cada selagem.
+"""
+import numpy as np
+import pandas as pd
+
+from anchorage import boreholes as bh
+from anchorage.anchors import compute_anchors
+
+
+def test_table_with_invalid_x():
+    df = pd.DataFrame({
+        "borehole_id": ["S2", "S2", "S3", "S4", None],
+        "borehole_x": [10.0, 10.0, "abc", None, 5.0],
+        "name": ["L1", "L2", "L1", "L1", "L1"],
+        "y": [2.0, "x", 1.0, 0.0, 0.0],
+    })
+    out = bh.boreholes_from_table(df)
+    # S3 (texto) e S4 (vazio) ignoradas; camada com y inválido ignorada
+    assert out == [{"id": "S2", "x": 10.0, "stratigraphy": [{"name": "L1", "y": 2.0}]}]
+    assert bh.invalid_rows(df)["borehole_id"].tolist() == ["S3", "S4"]
+    assert bh.boreholes_from_table(df.iloc[:0]) == []
+
+
+def test_table_round_trip():
+    holes = [{"id": "S2", "x": 10.0, "stratigraphy": [{"name": "L1", "y": 2.0},
+                                                      {"name": "L2", "y": -3.0}]},
+             {"id": "S3", "x": -4.0, "stratigraphy": []}]
+    assert bh.boreholes_from_table(bh.boreholes_to_table(holes)) == holes
+
+
+def test_nearest_and_layer():
+    holes = bh.boreholes_from_geo(
+        {"boreholes": [{"id": "S2", "x": 20.0,
+                        "stratigraphy": [{"name": "A", "y": 5.0}, {"name": "B", "y": -10.0}]}]},
+        "S1", 0.0, [{"name": "A", "y": 5.0}, {"name": "B", "y": -2.0}],
+    )
+    index = bh.BoreholeIndex(holes)
+    near, dist = index.nearest([-1.0, 9.0, 11.0, 30.0])
+    assert index.ids[near[:, 0]].tolist() == ["S1", "S1", "S2", "S2"]
+    assert np.allclose(dist[:, 0], [1.0, 9.0, 9.0, 10.0])
+    # a meio caminho, o topo de B interpolado entre -2 e -10
+    assert np.allclose(index.layer_tops([10.0], interpolate=True), [[5.0, -6.0]])
+
+    df_res = compute_anchors([{
+        "x1": 0.0, "y1": 0.0, "angle": 0.0, "free": 2.0, "bond": 2.0,
+        "prestress": 300.0, "strands": 4, "drill_mm": 150,
+        "alpha": 1.4, "shear_stress": 150, "FS": 1.8,
+    }], 140.0, 6.0)
+    out = bh.assign(df_res, holes)
+    # selagem horizontal de x = 2 a 4 na cota 0: camada A na sondagem S1
+    assert out["Borehole"].tolist() == ["S1"] and out["Bond layer"].tolist() == ["A"]
@@ -0,0 +1,63 @@
+"""
+Combinações de cálculo (anchorage.design): a combinação SLS reproduz
+compute_anchors, incluindo a verificação no limite (U = 1 -> FAIL).
+"""
+import numpy as np
+
+from anchorage import design
+from anchorage.anchors import compute_anchors
+
+SLS = [{"name": "SLS"}]
+
+
+def anchors(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [{
+        "x1": 0.0, "y1": 8.0 - 1.5 * i, "angle": -25.0,
+        "free": float(rng.uniform(4, 15)), "bond": float(rng.uniform(3, 12)),
+        "prestress": float(rng.uniform(100, 900)), "strands": int(rng.integers(2, 6)),
+        "drill_mm": 150, "alpha": 1.4, "shear_stress": float(rng.uniform(80, 250)),
+        "FS": float(rng.choice([1.5, 1.8, 2.0])),
+    } for i in range(n)]
+
+
+def test_sls_reproduces_compute_anchors():
+    data = anchors(200)
+    f_steel, E = 1600.0, 195000.0
+    df = compute_anchors(data, 140.0, 6.0, E=E, f_steel=f_steel)
+    res = design.evaluate(data, 140.0, 6.0, SLS, E=E, f_steel=f_steel)
+
+    assert np.allclose(res["P_d"][:, 0], df["P_block (kN)"], atol=0.005)
+    assert np.allclose(res["Pmax_d"][:, 0], df["Pmax (kN)"], atol=0.005)
+    assert np.allclose(res["R_d"][:, 0], df["Bond Resistance (kN)"], atol=0.005)
+
+    gov = design.governing(data, 140.0, 6.0, SLS, E=E, f_steel=f_steel)
+    ok = (df["Block Check"] == "OK") & (df["Bond Check"] == "OK")
+    assert set(ok) == {True, False}  # os dois casos no teste
+    assert (gov["Check"] == np.where(ok, "OK", "FAIL")).all()
+
+
+def test_utilization_of_one_fails_in_both_tables():
+    # P_block = 90 + 10 = 100 kN = Pmax = 100 mm2 x 1000 MPa
+    data = [{"x1": 0.0, "y1": 0.0, "angle": -20.0, "free": 10.0, "bond": 8.0,
+             "prestress": 90.0, "strands": 1, "drill_mm": 150, "alpha": 1.4,
+             "shear_stress": 150, "FS": 1.8}]
+    df = compute_anchors(data, 100.0, 5.0, E=200000.0, f_steel=1000.0)
+    gov = design.governing(data, 100.0, 5.0, SLS, E=200000.0, f_steel=1000.0)
+    assert df["P_block (kN)"].iloc[0] == df["Pmax (kN)"].iloc[0] == 100.0
+    assert df["Block Check"].iloc[0] == "FAIL"
+    assert gov["U_block"].iloc[0] == 1.0 and gov["Check"].iloc[0] == "FAIL"
+
+
+def test_missing_f_steel_uses_section_value():
+    combos = design.combination_table([{"name": "A"}, {"name": "B", "f_steel": 1200.0}],
+                                      f_steel=1600.0)
+    assert combos["f_steel"].tolist() == [1600.0, 1200.0]
+    res = design.evaluate(anchors(3), 140.0, 6.0, combos, f_steel=1600.0)
+    strands = np.array([a["strands"] for a in anchors(3)])
+    assert np.allclose(res["Pmax_d"], (strands * 140.0)[:, None] * [1600.0, 1200.0] / 1000)
+
+
+def test_default_combinations_are_distinct():
+    factors = design.combination_table().drop(columns="name")
+    assert not factors.astype(str).duplicated().any()
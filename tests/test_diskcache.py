@@ -0,0 +1,122 @@
+"""
+Cache em disco (anchorage.diskcache): objectos guardados sem pickle e
+reconstruídos tal e qual, directório privado e versão nas chaves.
+"""
+import os
+import stat
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from anchorage import diskcache, group, kranz
+from anchorage.diskcache import DiskCache, content_key, dumps, loads
+
+from test_report import make_section
+
+
+def same(a, b):
+    assert type(a) is type(b)
+    if isinstance(a, pd.DataFrame):
+        pd.testing.assert_frame_equal(a, b)
+    elif isinstance(a, np.ndarray):
+        assert a.dtype == b.dtype and np.array_equal(a, b)
+    elif isinstance(a, dict):
+        assert list(a) == list(b)
+        for k in a:
+            same(a[k], b[k])
+    elif isinstance(a, (list, tuple)):
+        assert len(a) == len(b)
+        for x, y in zip(a, b):
+            same(x, y)
+    else:
+        assert a == b
+
+
+def test_results_round_trip():
+    s = make_section(12)
+    df = s["df"]
+    for obj in (
+        df,
+        (s["df_bh"], 1.5, 2.5, 3.5, 4.5),
+        kranz.evaluate(df, s["geometry"], 3.0),
+        group.evaluate(df, 3.0, 10.0),
+        {"empty": pd.DataFrame(), "index": df.iloc[3:7], "n": 3, "none": None, "text": "x"},
+    ):
+        same(obj, loads(dumps(obj)))
+
+
+def test_no_pickle():
+    with pytest.raises(TypeError):
+        dumps({"f": lambda: 0})
+    with pytest.raises(TypeError):
+        dumps(pd.DataFrame({"a": [object()]}))
+    with pytest.raises(TypeError):
+        dumps({1: "non-string key"})
+
+
+def test_get_object_uses_npz(tmp_path):
+    cache = DiskCache(str(tmp_path / "c"))
+    df = make_section(3)["df"]
+    key = content_key("df_res", 1)
+    same(cache.get_object(key, "df_res", lambda: df), df)
+    raw = cache.get(key, "df_res")
+    assert raw.startswith(b"PK")  # zip do .npz
+    same(cache.get_object(key, "df_res", lambda: pytest.fail("not cached")), df)
+
+    # tipos não suportados são devolvidos sem ficar em cache
+    obj = cache.get_object(content_key("x"), "x", lambda: {"f": len})
+    assert obj["f"] is len and cache.get(content_key("x"), "x") is None
+
+
+def test_stats_without_disk_scan(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path / "c"), max_bytes=1000)
+    for i in range(5):
+        cache.set(content_key(i), "bin", b"x" * 100)
+    cache.set(content_key(0), "bin", b"y" * 50)  # substituição: mesma entrada
+
+    def scan():
+        return list(cache._entries())
+    on_disk = scan()
+
+    monkeypatch.setattr(cache, "_entries", lambda: pytest.fail("stats read the disk"))
+    st = cache.stats()
+    assert (st["entries"], st["bytes"]) == (len(on_disk), sum(e[1] for e in on_disk)) == (5, 450)
+    monkeypatch.undo()
+
+    for i in range(5, 12):  # acima de max_bytes: evict
+        cache.set(content_key(i), "bin", b"x" * 100)
+    on_disk = scan()
+    st = cache.stats()
+    assert st["evictions"] > 0
+    assert (st["entries"], st["bytes"]) == (len(on_disk), sum(e[1] for e in on_disk))
+
+    # uma nova instância lê o estado do disco
+    st = DiskCache(str(tmp_path / "c"), max_bytes=1000).stats()
+    assert (st["entries"], st["bytes"]) == (len(on_disk), sum(e[1] for e in on_disk))
+
+
+@pytest.mark.skipif(os.name != "posix", reason="permissões POSIX")
+def test_private_directory(tmp_path):
+    root = tmp_path / "a" / "b"
+    DiskCache(str(root))
+    assert stat.S_IMODE(os.stat(root).st_mode) == 0o700
+
+    shared = tmp_path / "shared"
+    shared.mkdir(mode=0o777)
+    os.chmod(shared, 0o777)
+    cache = DiskCache(str(shared))
+    assert stat.S_IMODE(os.stat(shared).st_mode) == 0o700
+    cache.set(content_key("k"), "bin", b"x")
+    sub = os.path.dirname(cache._path(content_key("k"), "bin"))
+    assert stat.S_IMODE(os.stat(sub).st_mode) & 0o077 == 0
+
+
+def test_default_dir_not_in_tmp():
+    assert diskcache.app_dir("cache").endswith(os.path.join("anchorage", "cache"))
+
+
+def test_version_in_every_key(monkeypatch):
+    key = content_key("df_res", {"a": 1})
+    monkeypatch.setattr(diskcache, "CACHE_VERSION", diskcache.CACHE_VERSION + 1)
+    assert content_key("df_res", {"a": 1}) != key
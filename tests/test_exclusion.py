@@ -0,0 +1,166 @@
+"""
+Verificação das zonas de exclusão (anchorage.exclusion.check): casos
+simples e comparação com uma verificação por força bruta em Python puro.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+from anchorage import exclusion
+from anchorage.anchors import compute_anchors
+
+TUNNEL = [[4.0, -4.0], [6.0, -4.0], [6.0, 1.0], [4.0, 1.0]]
+
+
+def anchors(rows):
+    return compute_anchors([{
+        "x1": x1, "y1": y1, "angle": ang, "free": free, "bond": bond,
+        "prestress": 300.0, "strands": 4, "drill_mm": 150,
+        "alpha": 1.4, "shear_stress": 150, "FS": 1.8,
+    } for x1, y1, ang, free, bond in rows], 140.0, 6.0)
+
+
+def zone(name, points, closed=True, clearance=None):
+    return {"name": name, "layer": "", "points": points,
+            "closed": closed, "clearance": clearance}
+
+
+def test_crossing_is_a_violation_with_zero_clearance():
+    df_res = anchors([(0.0, -0.5 * k, -20.0, 10.0, 8.0) for k in range(4)])
+    for zones, clearance in (
+        ([zone("Tunnel", TUNNEL)], 0.0),                    # afastamento global 0
+        ([zone("Tunnel", TUNNEL, clearance=0.0)], 1.0),     # afastamento da zona 0
+    ):
+        res = exclusion.check(df_res, zones, clearance=clearance)
+        pa = res["per_anchor"]
+        assert (pa["Zone Check"] == "FAIL").all()
+        assert (pa["Min distance (m)"] == 0).all()
+        assert len(res["violations"]) == 4
+        assert (res["violations"]["Status"] == "INTERSECTS").all()
+        assert (res["violations"]["Part"] == "Free").all()
+
+
+def test_touching_edge_is_a_violation_with_zero_clearance():
+    # linhas sobre o troço livre ou a tocá-lo: a distância calculada
+    # sai da ordem de 1e-16 em vez de 0
+    df_res = anchors([(0.0, 0.0, -20.0, 10.0, 8.0)])
+    r = df_res.iloc[0]
+    on = lambda t: [r["X1"] + t * (r["X2"] - r["X1"]),  # noqa: E731
+                    r["Y1"] + t * (r["Y2"] - r["Y1"])]
+    for line in ([on(0.3), on(0.95)], [on(0.95), [on(0.95)[0], 3.0]]):
+        res = exclusion.check(df_res, [zone("Edge", line, closed=False)], clearance=0.0)
+        v = res["violations"]
+        assert list(v["Part"]) == ["Free"] and list(v["Status"]) == ["INTERSECTS"]
+        assert res["per_anchor"]["Zone Check"].tolist() == ["FAIL"]
+
+
+def test_segment_inside_area_is_a_violation():
+    df_res = anchors([(0.0, 0.0, -10.0, 2.0, 2.0)])
+    box = [[-1.0, -5.0], [10.0, -5.0], [10.0, 5.0], [-1.0, 5.0]]
+    res = exclusion.check(df_res, [zone("Basement", box)], clearance=0.0)
+    assert list(res["violations"]["Part"]) == ["Free", "Bond"]
+    assert (res["violations"]["Distance (m)"] == 0).all()
+
+
+def test_clearance_only_counts_below_the_limit():
+    df_res = anchors([(0.0, 0.0, 0.0, 10.0, 8.0)])  # horizontal, y = 0
+    line = [[3.0, 0.3], [12.0, 0.3]]
+    res = exclusion.check(df_res, [zone("Pipe", line, closed=False)], clearance=0.5)
+    v = res["violations"]
+    assert list(v["Status"]) == ["CLEARANCE", "CLEARANCE"]
+    assert np.allclose(v["Distance (m)"], 0.3)
+
+    res = exclusion.check(df_res, [zone("Pipe", line, closed=False)], clearance=0.2)
+    assert res["violations"].empty
+    assert res["per_anchor"]["Zone Check"].tolist() == ["OK"]
+    # só são procuradas zonas até ao maior afastamento
+    assert np.isnan(res["per_anchor"]["Min distance (m)"].iloc[0])
+
+
+def test_zones_from_table():
+    df = pd.DataFrame({
+        "Zone": ["B1"] * 4 + ["L1"] * 2,
+        "X": [4, 12, 12, 4, 30, 30], "Y": [5, 5, 3, 3, 10, -10],
+        "Clearance": [0.5, 0.5, 0.5, 0.5, None, None],
+    })
+    zones = exclusion.zones_from_table(df)
+    assert [(z["name"], z["closed"], z["clearance"]) for z in zones] == [
+        ("B1", True, 0.5), ("L1", False, None)]
+
+
+# =============================================================
+# FORÇA BRUTA
+# =============================================================
+def _point_segment(p, a, b):
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    L2 = dx * dx + dy * dy
+    t = 0.0 if L2 == 0 else max(0.0, min(1.0, ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / L2))
+    return math.hypot(p[0] - a[0] - t * dx, p[1] - a[1] - t * dy)
+
+
+def _cross(p, q, a, b):
+    def orient(o, u, v):
+        return (u[0] - o[0]) * (v[1] - o[1]) - (u[1] - o[1]) * (v[0] - o[0])
+    return orient(p, q, a) * orient(p, q, b) < 0 and orient(a, b, p) * orient(a, b, q) < 0
+
+
+def _inside(p, poly):
+    hit = False
+    for a, b in zip(poly, poly[1:] + poly[:1]):
+        if (a[1] > p[1]) != (b[1] > p[1]):
+            x = a[0] + (p[1] - a[1]) * (b[0] - a[0]) / (b[1] - a[1])
+            hit ^= x > p[0]
+    return hit
+
+
+def brute(df_res, zones, clearance):
+    out = []
+    for r in df_res.to_dict("records"):
+        n_bad, d_min = 0, math.inf
+        for p, q in (((r["X1"], r["Y1"]), (r["X2"], r["Y2"])),
+                     ((r["X2"], r["Y2"]), (r["X3"], r["Y3"]))):
+            for z in zones:
+                pts = z["points"]
+                edges = list(zip(pts, pts[1:] + (pts[:1] if z["closed"] else [])))
+                d = min(
+                    0.0 if _cross(p, q, a, b) else min(
+                        _point_segment(p, a, b), _point_segment(q, a, b),
+                        _point_segment(a, p, q), _point_segment(b, p, q))
+                    for a, b in edges
+                )
+                if z["closed"] and _inside(p, pts):
+                    d = 0.0
+                c = clearance if z["clearance"] is None else z["clearance"]
+                n_bad += d < c or d <= 0
+                d_min = min(d_min, d)
+        out.append((n_bad, d_min))
+    return out
+
+
+def test_matches_brute_force():
+    rng = np.random.default_rng(3)
+    df_res = anchors([
+        (0.0, float(rng.uniform(-15, 0)), float(rng.uniform(-35, -5)),
+         float(rng.uniform(4, 12)), float(rng.uniform(4, 10)))
+        for _ in range(150)
+    ])
+    t = np.linspace(0, 2 * np.pi, 7, endpoint=False)
+    zones = []
+    for k in range(40):
+        cx, cy, r = rng.uniform(2, 25), rng.uniform(-25, 0), rng.uniform(0.3, 2.5)
+        pts = np.column_stack([cx + r * np.cos(t), cy + r * np.sin(t)]).tolist()
+        zones.append(zone(f"Z{k}", pts, closed=bool(k % 3), clearance=[None, 0.0, 0.8][k % 3]))
+
+    for clearance in (0.0, 0.5, 1.5):
+        res = exclusion.check(df_res, zones, clearance=clearance)["per_anchor"]
+        ref = brute(df_res, zones, clearance)
+        assert res["Violations"].tolist() == [b for b, _ in ref]
+        # distância mínima exacta dentro do raio de procura (maior
+        # afastamento); fora dele, NaN ou maior do que o raio
+        pad = max(clearance, 0.8)
+        d = res["Min distance (m)"].to_numpy()
+        d_ref = np.array([dr for _, dr in ref])
+        near = d_ref <= pad
+        assert np.allclose(d[near], np.round(d_ref[near], 3), atol=1e-3)
+        assert (np.isnan(d[~near]) | (d[~near] > pad)).all()
@@ -0,0 +1,118 @@
+"""
+Histórico de versões (anchorage.history): reconstrução das versões através
+de uma versão completa (KEYFRAME), ancoragens identificadas pelo id e
+históricos separados por projecto.
+"""
+import pandas as pd
+
+from anchorage.anchors import compute_anchors
+from anchorage.history import KEYFRAME, History, anchor_ids
+from anchorage.imports import parse_csv
+
+
+def section(n, prestress=200.0, ids=None):
+    data = [{
+        "x1": 0.0, "y1": -1.5 * i, "angle": -20.0, "free": 8.0, "bond": 6.0 + i % 3,
+        "prestress": prestress + 10 * i, "strands": 3, "drill_mm": 150,
+        "alpha": 1.4, "shear_stress": 150, "FS": 1.8,
+    } for i in range(n)]
+    for d, k in zip(data, ids or anchor_ids([None] * n)):
+        d["id"] = k
+    return data
+
+
+def commit(h, data, label=""):
+    strat = [{"name": "L1", "y": -2.0}, {"name": "L2", "y": -6.0 - len(data) % 2}]
+    return h.commit(data, strat, compute_anchors(data, 140.0, 6.0), label)
+
+
+def test_anchor_ids():
+    assert anchor_ids([None, None, None]) == ["A1", "A2", "A3"]
+    assert anchor_ids(["A2", None, "x", "x", float("nan")]) == ["A2", "A3", "x", "A4", "A5"]
+
+
+def test_snapshots_across_keyframe(tmp_path):
+    h = History("Section 1", "P", root=str(tmp_path))
+    expected = []
+    for v in range(KEYFRAME + 6):
+        data = section(5 + v % 4, prestress=200.0 + 5 * v)
+        assert commit(h, data, f"v{v}") == v
+        expected.append(data)
+    assert commit(h, expected[-1]) == KEYFRAME + 5  # nada mudou: não escreve
+
+    versions = h.versions()
+    assert versions["Version"].tolist() == list(range(KEYFRAME + 6))
+    # a versão completa ocupa mais do que os deltas à sua volta
+    stored = versions["Stored (bytes)"]
+    assert stored[KEYFRAME] > stored[KEYFRAME - 1] and stored[KEYFRAME] > stored[KEYFRAME + 1]
+
+    # instância nova: reconstrói tudo a partir do ficheiro
+    fresh = History("Section 1", "P", root=str(tmp_path))
+    assert len(fresh) == KEYFRAME + 6
+    for v in (0, KEYFRAME - 1, KEYFRAME, KEYFRAME + 3, KEYFRAME + 5, 2):
+        snap = fresh.snapshot(v)
+        assert snap["data"] == expected[v]
+        ref = compute_anchors(expected[v], 140.0, 6.0)
+        pd.testing.assert_frame_equal(pd.DataFrame(snap["results"]), ref, check_dtype=False)
+
+    # diff através da versão completa: só as ancoragens que mudaram
+    d = fresh.diff(KEYFRAME - 1, KEYFRAME + 1)
+    assert set(d["Status"]) <= {"changed", "added", "removed"}
+    assert d["Id"].is_unique
+
+
+def test_deleting_an_anchor_only_removes_it(tmp_path):
+    h = History("S", "P", root=str(tmp_path))
+    data = section(6)
+    commit(h, data)
+    commit(h, data[:2] + data[3:])  # apaga A3
+    assert h.changed_anchors(0, 1) == ["A3"]
+    d = h.diff(0, 1)
+    assert d[["Anchor", "Id", "Status"]].values.tolist() == [[3, "A3", "removed"]]
+    assert h.versions()["Changed anchors"].tolist() == [6, 1]
+
+    # reordenar não muda resultados; a ordem é reconstruída
+    commit(h, data[3:] + data[:2])
+    assert [r["id"] for r in h.snapshot(2)["data"]] == ["A4", "A5", "A6", "A1", "A2"]
+    assert h.diff(1, 2).empty
+
+
+def test_ids_from_csv(tmp_path):
+    data = section(4, ids=["N1", "N2", "S1", "S2"])
+    raw = pd.DataFrame(data).to_csv(index=False).encode()
+    anchors = parse_csv(raw)["anchors"]
+    assert [a["id"] for a in anchors] == ["N1", "N2", "S1", "S2"]
+
+    numeric = parse_csv(b"id,x1,y1,angle,free,bond\n7,0,0,-20,8,6\n,0,-1,-20,8,6\n")["anchors"]
+    assert [a.get("id") for a in numeric] == ["7", None]
+
+
+def test_projects_are_separate(tmp_path):
+    a = History("Section 1", "Project A", root=str(tmp_path))
+    b = History("Section 1", "Project B", root=str(tmp_path))
+    commit(a, section(3))
+    assert len(a) == 1 and len(b) == 0
+    assert a.path != b.path
+
+
+def test_sees_versions_from_other_writers(tmp_path):
+    # duas instâncias no mesmo ficheiro (outra sessão / outro processo)
+    a = History("S", "P", root=str(tmp_path))
+    b = History("S", "P", root=str(tmp_path))
+    commit(a, section(3))
+    commit(a, section(3, prestress=400.0), "more")
+    assert len(b) == 2 and b.head == 1
+    assert b.versions()["Label"].tolist() == ["", "more"]
+    assert b.snapshot(1)["data"] == section(3, prestress=400.0)
+    assert len(b.diff(0, 1)) == 3
+
+    # b escreve a seguir às versões de a
+    assert commit(b, section(4)) == 2
+    assert len(a) == 3 and a.snapshot(2)["data"] == section(4)
+
+    # ficheiro reescrito (p.ex. reposto de uma cópia): relido de início
+    with open(a.path, "rb") as fh:
+        first = fh.readline()
+    with open(a.path, "wb") as fh:
+        fh.write(first)
+    assert len(b) == 1 and b.snapshot(0)["data"] == section(3)
@@ -0,0 +1,50 @@
+"""
+Importação (anchorage.imports): o CSV exportado pela página volta a ser
+lido com as mesmas ancoragens e parâmetros globais.
+"""
+import json
+
+import pandas as pd
+
+from anchorage import imports
+
+
+def section():
+    data = [{
+        "id": f"T{i}", "x1": 0.0, "y1": 8.0 - 1.5 * i, "angle": -25.0,
+        "free": 10.0, "bond": 8.0 + i, "prestress": 300.0, "strands": 4,
+        "drill_mm": 150, "alpha": 1.4, "shear_stress": 150, "FS": 2.0 + 0.1 * i,
+    } for i in range(3)]
+    geo = {
+        "section_name": "S1", "y_excav": 0.0, "L_excav": 7.5, "y_wall": 8.0,
+        "stratigraphy": [{"name": "Argila", "y": 4.0, "L": 20.0}],
+        "borehole_id": "BH1", "borehole_x": 2.0, "esp": 0.4, "afast": 2.5,
+        "A_inf": 1.8, "A_strand": 150.0, "delta_L": 5.0,
+    }
+    return data, geo
+
+
+def test_csv_round_trip():
+    data, geo = section()
+    parsed = imports.parse_csv(imports.export_csv(data, geo))
+
+    anchors = parsed["anchors"]
+    assert [a["id"] for a in anchors] == ["T0", "T1", "T2"]
+    for a, d in zip(anchors, data):
+        # colunas em minúsculas: FS chega como "fs"
+        assert a["fs"] == d["FS"]
+        assert {k: a[k] for k in imports.COLS_ANCHOR if k != "fs"} == \
+            {k: float(d[k]) for k in imports.COLS_ANCHOR if k != "fs"}
+
+    g = parsed["geo"]
+    assert g["l_excav"] == 7.5 and g["a_inf"] == 1.8
+    assert g["a_strand"] == 150.0 and g["delta_l"] == 5.0
+    assert g["stratigraphy"] == geo["stratigraphy"]
+
+
+def test_old_geo_json_keys():
+    # exportações antigas: chaves do geo_json com maiúsculas
+    data, geo = section()
+    df = pd.DataFrame([{**data[0], "geo_json": json.dumps(geo)}])
+    g = imports.parse_csv(df.to_csv(index=False).encode("utf-8"))["geo"]
+    assert g["l_excav"] == 7.5 and g["a_inf"] == 1.8
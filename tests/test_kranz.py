@@ -0,0 +1,49 @@
+"""
+Estabilidade global (anchorage.kranz): plano profundo calculado à mão
+numa camada, com e sem nível freático.
+"""
+import numpy as np
+
+from anchorage import kranz
+from anchorage.anchors import compute_anchors
+
+GEOMETRY = {"x_ref": 0.0, "y_wall": 0.0, "y_excav": -6.0,
+            "stratigraphy": [{"name": "Areia", "y": 0.0, "gamma": 20.0, "phi": 30.0, "c": 0.0}]}
+
+
+def single_anchor(angle=-20.0, y1=-2.0):
+    return compute_anchors([{
+        "x1": 0.0, "y1": y1, "angle": angle, "free": 8.0, "bond": 6.0,
+        "prestress": 300.0, "strands": 4, "drill_mm": 150,
+        "alpha": 1.4, "shear_stress": 150, "FS": 1.8,
+    }], 140.0, 6.0)
+
+
+def test_horizontal_plane_by_hand():
+    # ancoragem horizontal ao nível do fundo: F = (0, -6), B = (11, -6), θ = 0
+    #   G  = 11 · 6 · 20 = 1320 kN/m;  Ea = E1 = ½ · ⅓ · 20 · 6² = 120 kN/m
+    #   x: -A + N tan φ = 0,  y: N - G = 0  ->  A_poss = G tan 30° = 762.10
+    df = single_anchor(angle=0.0, y1=-6.0)
+    res = kranz.evaluate(df, GEOMETRY, 2.0, toe_depths=[0.0])
+    g = res["governing"]
+    assert g["Plane angle (deg)"] == 0.0
+    assert np.isclose(g["G (kN/m)"], 1320.0)
+    assert np.isclose(g["Ea (kN/m)"], 120.0) and np.isclose(g["E1 (kN/m)"], 120.0)
+    assert np.isclose(g["A_poss (kN/m)"], round(1320.0 * np.tan(np.radians(30.0)), 2))
+    # A_exist = P_block / afast
+    P = df["P_block (kN)"].iloc[0]
+    assert np.isclose(g["A_exist (kN/m)"], round(P / 2.0, 2))
+    assert np.isclose(res["min_fs"], 1320.0 * np.tan(np.radians(30.0)) / (P / 2.0), rtol=1e-3)
+
+
+def test_water_table_lowers_fs():
+    df = single_anchor()
+    dry = kranz.evaluate(df, GEOMETRY, 2.0, toe_depths=[0.0])
+    wet = kranz.evaluate(df, GEOMETRY, 2.0, toe_depths=[0.0], y_water=-1.0)
+    assert dry["planes"]["U (kN/m)"].iloc[0] == 0.0
+    assert wet["planes"]["U (kN/m)"].iloc[0] > 0.0
+    assert wet["planes"]["Ea (kN/m)"].iloc[0] > dry["planes"]["Ea (kN/m)"].iloc[0]
+    assert wet["min_fs"] < dry["min_fs"]
+    # nível freático abaixo do bloco: sem efeito
+    deep = kranz.evaluate(df, GEOMETRY, 2.0, toe_depths=[0.0], y_water=-50.0)
+    assert np.isclose(deep["min_fs"], dry["min_fs"])
@@ -0,0 +1,37 @@
+"""
+Optimizador de disposição (anchorage.layout): as disposições propostas
+ancoram a força horizontal pedida e passam nas verificações de
+compute_anchors.
+"""
+import numpy as np
+
+from anchorage import layout
+from anchorage.anchors import compute_anchors
+
+TEMPLATE = {"x1": 0.0, "angle": -20.0, "free": 8.0, "drill_mm": 150,
+            "alpha": 1.4, "shear_stress": 150, "FS": 1.8}
+
+
+def test_layouts_meet_required_force():
+    T_req = 150.0
+    out = layout.optimize(TEMPLATE, 0.0, -8.0, 140.0, 6.0, T_req, top=5)
+    assert len(out["layouts"]) == 5
+    cos_a = np.cos(np.radians(20.0))
+    for chosen in out["layouts"]:
+        af = chosen[0]["afast"]
+        # força horizontal por metro de parede, somada nos níveis
+        assert sum(a["prestress"] for a in chosen) * cos_a / af >= T_req - 1e-6
+        df = compute_anchors([{k: v for k, v in a.items() if k != "afast"} for a in chosen],
+                             140.0, 6.0)
+        assert (df["Block Check"] == "OK").all() and (df["Bond Check"] == "OK").all()
+    cost = out["ranked"]["Cost per m"].tolist()
+    assert cost == sorted(cost)
+
+
+def test_tributary_heights():
+    # níveis a -6 e -2 numa parede de 0 a -8: faixas 4 m (até -4) e 4 m
+    h = layout.tributary_heights(np.array([[-6.0, -2.0]]), 0.0, -8.0)
+    assert np.allclose(h, [[4.0, 4.0]])
+    # as faixas cobrem a altura toda: a soma das cargas é T_req * afast / cos θ
+    P = 150.0 / 8.0 * h * 2.0 / np.cos(np.radians(20.0))
+    assert np.allclose(P.sum(), 150.0 * 2.0 / np.cos(np.radians(20.0)))
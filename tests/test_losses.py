@@ -0,0 +1,41 @@
+"""
+Perdas diferidas (anchorage.losses): relaxação EN 1992-1-1 a 1000 h,
+fluência e retracção, e a carga residual do simulate.
+"""
+import numpy as np
+
+from anchorage import losses
+
+
+def test_relaxation_at_1000_hours():
+    # μ = 0.7, t = 1000 h: Δσ = σ 0.66 ρ1000 e^(9.1·0.7) 1e-5
+    #                        = 1302 · 0.66 · 2.5 · 584.06 · 1e-5 = 12.55 MPa
+    d = losses.relaxation_loss(1302.0, 1860.0, 2.5, 1000 / 24)
+    assert np.isclose(d, 12.547, atol=1e-3)
+    # a perda cresce com o tempo e com μ
+    assert losses.relaxation_loss(1302.0, 1860.0, 2.5, 365.0) > d
+    assert losses.relaxation_loss(1116.0, 1860.0, 2.5, 1000 / 24) < d
+
+
+def test_creep_and_shrinkage():
+    assert losses.creep_displacement(0.5, 1.0, 10.0) == 0.5    # um ciclo logarítmico
+    assert losses.creep_displacement(0.5, 1.0, 0.5) == 0.0     # antes de t0
+    assert losses.shrinkage_strain(1e-4, 35.0, 35.0) == 0.5e-4  # meio-tempo
+
+
+def test_simulate_relaxation_only():
+    # 1 cordão de 140 mm², P0 = 0.7 · 1860 · 140 / 1000 = 182.28 kN, sem
+    # reentrada de cunhas: σ_pi = 1302 MPa
+    data = [{"x1": 0.0, "y1": 0.0, "angle": -20.0, "free": 10.0, "bond": 8.0,
+             "prestress": 182.28, "strands": 1, "drill_mm": 150, "alpha": 1.4,
+             "shear_stress": 150, "FS": 1.8}]
+    out = losses.simulate(data, 140.0, 0.0, years=1, params={
+        "creep_ks": 0.0, "shrinkage_inf": 0.0,
+    })
+    # último passo: 365 dias
+    loss = losses.relaxation_loss(1302.0, 1860.0, 2.5, 365.0) * 140.0 / 1000
+    s = out["summary"].iloc[0]
+    assert np.isclose(s["Residual end (kN)"], round(182.28 - loss, 2))
+    assert np.isclose(out["residual"][0, -1], 182.28 - loss)
+    assert out["residual"][0, 0] == 182.28
+    assert s["Residual Check (end)"] == "OK" and out["first_change_years"] is None
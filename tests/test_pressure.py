@@ -0,0 +1,44 @@
+"""
+Impulso activo (anchorage.soil / anchorage.pressure): valores de Rankine
+calculados à mão para uma camada.
+"""
+import numpy as np
+
+from anchorage import pressure, soil
+
+SAND = [{"name": "Areia", "y": 0.0, "gamma": 18.0, "phi": 30.0, "c": 0.0}]
+
+
+def test_rankine_thrust_single_layer():
+    # Ka = tan²(30°) = 1/3; Ea = ½ Ka γ H² = ½ · ⅓ · 18 · 6² = 108 kN/m
+    prof = soil.active_profile(SAND, 0.0, -6.0)
+    assert np.isclose(prof["Ka"][0], 1 / 3)
+    assert np.isclose(prof["E"][-1], 108.0)
+    # com sobrecarga q = 10 kPa: + Ka q H = 20 kN/m
+    prof = soil.active_profile(SAND, 0.0, -6.0, surcharge=10.0)
+    assert np.isclose(prof["E"][-1], 128.0)
+
+
+def test_rankine_thrust_with_water_and_cohesion():
+    # água a -2: σ'v(-6) = 36 + 8·4 = 68; impulso efectivo
+    # ½·⅓·36·2 + (⅓·36 + ⅓·68)/2·4 = 12 + 69.33; água ½·10·4² = 80
+    prof = soil.active_profile(SAND, 0.0, -6.0, y_water=-2.0)
+    assert np.isclose(prof["E"][-1], 12.0 + 208.0 / 3 + 80.0)
+    # argila c = 10, φ = 0: σa = 18 z - 20, nula até z0 = 10/9 m
+    clay = [{"name": "Argila", "y": 0.0, "gamma": 18.0, "phi": 0.0, "c": 10.0}]
+    prof = soil.active_profile(clay, 0.0, -6.0, step=0.001)
+    z0 = 20.0 / 18.0
+    assert np.isclose(prof["E"][-1], 0.5 * 18.0 * (6.0 - z0) ** 2, rtol=1e-5)
+
+
+def test_required_loads_split_by_band():
+    data = [{"y1": -1.5, "angle": -20.0, "prestress": 300.0},
+            {"y1": -4.5, "angle": -20.0, "prestress": 300.0}]
+    out = pressure.required_loads(data, SAND, 0.0, -6.0, 2.0)
+    assert np.isclose(out["total"], 108.0)
+    # faixas 0 a -3 (½·⅓·18·9 = 27) e -3 a -6 (108 - 27 = 81)
+    t = out["table"]
+    assert np.allclose(t["Thrust (kN/m)"], [27.0, 81.0])
+    assert np.allclose(t["Required (kN)"], np.round(np.array([27.0, 81.0]) * 2.0
+                                                    / np.cos(np.radians(20.0)), 1))
+    assert t["Proposed prestress (kN)"].tolist() == [60.0, 180.0]
@@ -0,0 +1,202 @@
+"""
+O PDF escrito por anchorage.report é válido: tabela xref coerente com os
+objectos do ficheiro e número de páginas lido por um leitor independente;
+texto fora do cp1252 e conteúdo de todas as páginas dentro da folha.
+"""
+import io
+import re
+import threading
+import zlib
+
+import matplotlib
+import pandas as pd
+import pytest
+
+from anchorage.anchors import bulb_load, compute_anchors
+from anchorage import report
+from anchorage.report import BULB_ROWS, BULB_ROWS_FIRST, SUMMARY_ROWS, render_report
+
+matplotlib.use("Agg")
+
+
+def make_section(n):
+    data = [{
+        "x1": 0.0, "y1": 8.0 - 1.5 * (i % 5), "angle": -25.0,
+        "free": 10.0, "bond": 8.0 + i % 3, "prestress": 150.0 + 10 * i,
+        "strands": 3, "drill_mm": 150, "alpha": 1.4, "shear_stress": 150, "FS": 1.8,
+    } for i in range(n)]
+    df = compute_anchors(data, 140.0, 6.0)
+    df_bh, carga_parede, V_total, V_metro, C_bolbo = bulb_load(
+        df["Prestress (kN)"], [d["angle"] for d in data], 5.0, 0.3, 3.0, 1.5
+    )
+    return {
+        "name": "Section 1",
+        "df": df,
+        "df_bh": df_bh,
+        "geometry": {
+            "x_ref": 0.0, "y_excav": 0.0, "y_wall": 8.0, "L_excav": 5.0,
+            "borehole_x": 1.0,
+            "stratigraphy": [{"name": "L1", "y": 4.0, "L": 20.0}],
+        },
+        "params": {"E": 210000, "A_strand": 140.0, "delta_L": 6.0},
+        "bulb": {"carga_parede": carga_parede, "V_total": V_total,
+                 "V_metro": V_metro, "C_bolbo": C_bolbo},
+    }
+
+
+def bulb_pages(n):
+    rest = max(n - BULB_ROWS_FIRST, 0)
+    return 1 + -(-rest // BULB_ROWS)
+
+
+def check_structure(raw):
+    """Cabeçalho, %%EOF, startxref e cada entrada da xref a apontar para 'i 0 obj'."""
+    assert raw.startswith(b"%PDF-1.4\n")
+    assert raw.rstrip().endswith(b"%%EOF")
+    start = int(re.search(rb"startxref\n(\d+)\n%%EOF\s*$", raw).group(1))
+    assert raw[start:start + 5] == b"xref\n"
+
+    lines = raw[start:].split(b"\n")
+    first, size = map(int, lines[1].split())
+    assert first == 0
+    entries = lines[2:2 + size]
+    assert entries[0].startswith(b"0000000000 65535 f")
+    for i, e in enumerate(entries[1:], start=1):
+        offset = int(e[:10])
+        assert raw[offset:].startswith(b"%d 0 obj" % i)
+    trailer = raw[start:].split(b"trailer", 1)[1]
+    assert b"/Size %d" % size in trailer
+
+
+def test_pages_mode_structure_and_page_count():
+    n = 30
+    raw = render_report([make_section(n)], mode="pages", figure="vector")
+    check_structure(raw)
+
+    # título + secção + uma por ancoragem + geometria + bolbo
+    expected = 2 + n + 1 + bulb_pages(n)
+    assert raw.count(b"/Type /Page ") == expected
+    assert b"/Count %d" % expected in raw
+
+    pypdf = pytest.importorskip("pypdf")
+    reader = pypdf.PdfReader(io.BytesIO(raw), strict=True)
+    assert len(reader.pages) == expected
+    assert "Anchor 1" in reader.pages[2].extract_text()
+
+
+def test_summary_mode_with_raster_figure():
+    import matplotlib.pyplot as plt
+
+    n = 95
+    section = make_section(n)
+    fig, ax = plt.subplots()
+    ax.plot([0, 1], [0, 1])
+    section["fig"] = fig
+    raw = render_report([section, dict(section, name="Section 2")],
+                        mode="summary", figure="raster", dpi=50)
+    plt.close(fig)
+    check_structure(raw)
+
+    per_section = 1 + -(-n // SUMMARY_ROWS) + 1 + bulb_pages(n)
+    expected = 1 + 2 * per_section
+    # a mesma imagem nas duas secções é incorporada uma única vez
+    assert raw.count(b"/Subtype /Image") == 1
+
+    pypdf = pytest.importorskip("pypdf")
+    reader = pypdf.PdfReader(io.BytesIO(raw), strict=True)
+    assert len(reader.pages) == expected
+
+
+# =============================================================
+# TEXTO E LIMITES DA PÁGINA
+# =============================================================
+def test_text_outside_cp1252():
+    assert report.pdf_text("Secção Ø 12 — 5 €") == "Secção Ø 12 — 5 €"  # cp1252
+    assert report.pdf_text("Łódź Győr") == "Lódz Gyor"  # ó existe em cp1252
+    assert report.pdf_text("η = 0.9 → Ω") == "? = 0.9 ? ?"
+    assert report.unsupported_chars("Łódź", {"zones": [{"name": "Túnel Ω"}]}, ["η?"]) == {"Ω", "η"}
+    assert report._pdf_str("a (b) \\ é") == b"a \\(b\\) \\\\ \xe9"
+    # larguras: letra acentuada = letra base; símbolos largos
+    assert report.text_width("é", 10) == report.text_width("e", 10)
+    assert report.text_width("—", 10) > report.text_width("-", 10)
+
+
+def _unescape(raw):
+    return re.sub(rb"\\(.)", rb"\1", raw).decode("cp1252")
+
+
+def page_extents(raw):
+    """(xmin, xmax, ymin, ymax) em pt de tudo o que é desenhado em cada página."""
+    pages = []
+    for m in re.finditer(rb"<< /Filter /FlateDecode\s+/Length (\d+) >>\nstream\n", raw):
+        ops = zlib.decompress(raw[m.end():m.end() + int(m.group(1))])
+        xs, ys = [], []
+        for f, size, x, y, txt in re.findall(
+                rb"BT /F(\d) ([\d.]+) Tf ([-\d.]+) ([-\d.]+) Td \(((?:\\.|[^\\)])*)\) Tj ET", ops):
+            w = report.text_width(_unescape(txt), float(size), bold=f == b"2") * report.K
+            xs += [float(x), float(x) + w]
+            ys += [float(y), float(y) + float(size)]
+        for a in re.findall(rb"([-\d.]+) ([-\d.]+) m ([-\d.]+) ([-\d.]+) l S", ops):
+            x1, y1, x2, y2 = map(float, a)
+            xs += [x1, x2]
+            ys += [y1, y2]
+        for a in re.findall(rb"([-\d.]+) ([-\d.]+) ([-\d.]+) ([-\d.]+) re S", ops):
+            x, y, w, h = map(float, a)
+            xs += [x, x + w]
+            ys += [y, y + h]
+        for a in re.findall(rb"q ([-\d.]+) 0 0 ([-\d.]+) ([-\d.]+) ([-\d.]+) cm", ops):
+            w, h, x, y = map(float, a)
+            xs += [x, x + w]
+            ys += [y, y + h]
+        pages.append((min(xs), max(xs), min(ys), max(ys)))
+    return pages
+
+
+@pytest.mark.parametrize("mode", ["pages", "summary"])
+def test_content_inside_page(mode):
+    long = "Argila siltosa muito compacta com seixos (camada de transição) " * 3
+    section = make_section(45)
+    section["name"] = "Secção Łódź η " + "X" * 80
+    geo = section["geometry"]
+    geo["stratigraphy"] = [{"name": long, "y": 4.0, "L": 20.0},
+                           {"name": "Ω" * 30, "y": 1.0, "L": 25.0}]
+    geo["borehole_id"] = "S1 — furo à direita " * 5
+    geo["zones"] = [{"name": "Túnel", "closed": True,
+                     "points": [[30.0, -6.0], [34.0, -6.0], [34.0, -2.0], [30.0, -2.0]]}]
+    section["params"]["borehole_id"] = geo["borehole_id"]
+    section["exclusion"] = pd.DataFrame({
+        "Anchor": [1, 2], "Part": ["Free", "Bond (selado)"], "Zone": [long, "Túnel Ω"],
+        "Distance (m)": [0.0, 0.2], "Clearance (m)": [0.5, 0.5],
+        "Status": ["INTERSECTS", "CLEARANCE"],
+    })
+    raw = render_report([section], mode=mode, figure="vector")
+    check_structure(raw)
+
+    extents = page_extents(raw)
+    assert len(extents) == raw.count(b"/Type /Page ")
+    W, H = report.PAGE_W * report.K, report.PAGE_H * report.K
+    for xmin, xmax, ymin, ymax in extents:
+        assert 0 <= xmin and xmax <= W + 0.01
+        assert 0 <= ymin and ymax <= H + 0.01
+
+
+def test_fragment_cache_threads():
+    cache = report.FragmentCache(max_items=8)
+    errors = []
+
+    def work(k):
+        try:
+            for i in range(2000):
+                key = (k * 7 + i) % 24
+                assert cache.get(key, lambda: ("frag", key)) == ("frag", key)
+        except Exception as e:  # pragma: no cover - só em caso de corrida
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(k,)) for k in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert len(cache) <= 8
+    assert cache.hits + cache.misses == 8 * 2000
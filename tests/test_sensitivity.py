@@ -0,0 +1,29 @@
+"""
+Sensibilidade (anchorage.sensitivity): derivadas analíticas contra
+diferenças finitas e utilizações contra compute_anchors.
+"""
+import numpy as np
+
+from anchorage import sensitivity
+from anchorage.anchors import compute_anchors
+
+from test_design import anchors
+
+
+def test_derivatives_match_finite_differences():
+    data = anchors(50, seed=4)
+    d_block, d_bond = sensitivity.derivatives(data, 140.0, 6.0, E=195000.0, f_steel=1600.0)
+    f_block, f_bond = sensitivity.finite_differences(data, 140.0, 6.0, E=195000.0,
+                                                     f_steel=1600.0)
+    assert list(d_block.columns) == [lab for _, lab in sensitivity.PARAMS]
+    np.testing.assert_allclose(d_block, f_block, rtol=1e-5, atol=1e-12)
+    np.testing.assert_allclose(d_bond, f_bond, rtol=1e-5, atol=1e-12)
+
+
+def test_utilizations_match_compute_anchors():
+    data = anchors(30, seed=5)
+    df = compute_anchors(data, 140.0, 6.0, f_steel=1600.0)
+    torn = sensitivity.tornado(data, 140.0, 6.0, f_steel=1600.0)
+    P = df["P_block (kN)"].to_numpy()
+    np.testing.assert_allclose(torn["U_block"]["base"], P / df["Pmax (kN)"], rtol=1e-4)
+    np.testing.assert_allclose(torn["U_bond"]["base"], P / df["Bond Resistance (kN)"], rtol=1e-4)
@@ -0,0 +1,199 @@
+"""
+Serviço HTTP (anchorage.service) num servidor local: ida e volta em JSON
+e em binário contra compute_anchors, Content-Length, valores não finitos
+e livros Excel (folhas lidas uma a uma, resposta em pedaços).
+"""
+import http.client
+import io
+import json
+import struct
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from anchorage import imports, service
+from anchorage.anchors import bulb_load, compute_anchors
+
+
+def anchors(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [{
+        "x1": 0.0, "y1": 8.0 - 1.5 * i, "angle": float(rng.uniform(-35, -10)),
+        "free": float(rng.uniform(6, 15)), "bond": float(rng.uniform(6, 12)),
+        "prestress": float(rng.uniform(100, 400)), "strands": int(rng.integers(2, 6)),
+        "drill_mm": 150, "alpha": 1.4, "shear_stress": 150, "FS": 1.8,
+    } for i in range(n)]
+
+
+@pytest.fixture(scope="module")
+def server():
+    srv = service.make_server(port=0)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv.server_address[1]
+    srv.shutdown()
+    srv.server_close()
+
+
+def post(port, body, ctype="application/json", headers=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    conn.request("POST", "/verify", body=body,
+                 headers={"Content-Type": ctype, **(headers or {})})
+    resp = conn.getresponse()
+    out = resp.status, resp.read()
+    conn.close()
+    return out
+
+
+def raw_post(port, head, body=b""):
+    """Pedido escrito à mão (cabeçalhos que http.client não deixa enviar)."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    conn.connect()
+    conn.sock.sendall(b"POST /verify HTTP/1.1\r\nHost: x\r\n" + head + b"\r\n" + body)
+    resp = http.client.HTTPResponse(conn.sock)
+    resp.begin()
+    out = resp.status, resp.read()
+    conn.close()
+    return out
+
+
+def expected(data, section):
+    return compute_anchors(data, section.get("A_strand", 140.0), section.get("delta_L", 6.0))
+
+
+def test_json_round_trip(server):
+    data = anchors(7)
+    sections = [{"anchors": data}, {"anchors": data[:3], "A_strand": 150.0, "name": "B"}]
+    status, body = post(server, json.dumps({"sections": sections}))
+    assert status == 200
+    res = json.loads(body)["results"]
+    assert [r["name"] for r in res] == ["Section 1", "B"]
+    for r, s in zip(res, sections):
+        df = pd.DataFrame(r["data"], columns=r["columns"])
+        ref = expected(s["anchors"], s)
+        pd.testing.assert_frame_equal(df[ref.columns], ref, check_dtype=False)
+
+    _, _, V_total, _, C_bolbo = bulb_load(
+        [d["prestress"] for d in data], [d["angle"] for d in data], 5.0, 0.3, 3.0, 1.5)
+    assert np.isclose(res[0]["bulb"]["C_bolbo"], C_bolbo)
+
+
+def test_binary_round_trip(server):
+    data = [anchors(5, 1), anchors(12, 2)]
+    sections = [{"name": "A"}, {"name": "B", "delta_L": 4.0}]
+    status, body = post(server, service.encode_request(sections, data),
+                        "application/octet-stream")
+    assert status == 200
+    out = service.decode_response(body)
+    assert len(out) == 2
+    for (df, bulb), s, d in zip(out, sections, data):
+        ref = expected(d, s)
+        pd.testing.assert_frame_equal(df[ref.columns], ref, check_dtype=False)
+        assert set(bulb) >= {"V_total", "C_bolbo"}
+
+
+@pytest.mark.parametrize("head,code", [
+    (b"Content-Type: application/json\r\n", 411),
+    (b"Content-Length: abc\r\n", 400),
+    (b"Content-Length: -1\r\n", 400),
+    (b"Content-Length: 1_0\r\n", 400),
+    (b"Content-Length: %d\r\n" % (service.MAX_BODY + 1), 413),
+])
+def test_bad_content_length(server, head, code):
+    status, body = raw_post(server, head)
+    assert status == code
+    assert "error" in json.loads(body)
+
+
+@pytest.mark.parametrize("body", [
+    b"[]", b"1", b'"x"', b"null",
+    b'{"sections": [1]}', b'{"sections": {"a": 1}}',
+    b'{"anchors": [1]}', b'{"anchors": "x"}',
+    b'{"sections": [{"anchors": [[0, 8, -25, 10, 8]]}]}',
+])
+def test_json_not_objects(server, body):
+    status, out = post(server, body)
+    assert status == 400
+    assert "error" in json.loads(out)
+
+
+@pytest.mark.parametrize("header", [b"[]", b'{"sections": [1]}', b'{"sections": 3}'])
+def test_binary_header_not_objects(server, header):
+    body = service.MAGIC + struct.pack("<I", len(header)) + header
+    status, out = post(server, body, "application/octet-stream")
+    assert status == 400
+    assert "error" in json.loads(out)
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")  # divisão por zero no servidor
+def test_non_finite_values(server):
+    # free = 0 -> perda por escorregamento infinita: sai como null, JSON válido
+    data = anchors(3)
+    data[1]["free"] = 0.0
+    status, body = post(server, json.dumps({"anchors": data}))
+    assert status == 200
+    text = body.decode()
+    assert "Infinity" not in text and "NaN" not in text
+    res = json.loads(text, parse_constant=lambda c: pytest.fail(c))
+    col = res["columns"].index("Slip Loss (kN)")
+    assert [r[col] is None for r in res["data"]] == [False, True, False]
+
+    # NaN / Infinity no pedido: 400
+    status, _ = post(server, '{"anchors": [{"x1": NaN, "y1": 0, "angle": -20, '
+                             '"free": 8, "bond": 6}]}')
+    assert status == 400
+    status, _ = post(server, '{"anchors": [], "afast": Infinity}')
+    assert status == 400
+
+
+# =============================================================
+# EXCEL
+# =============================================================
+def workbook(sizes):
+    openpyxl = pytest.importorskip("openpyxl")
+    wb = openpyxl.Workbook(write_only=True)
+    for k, n in enumerate(sizes):
+        ws = wb.create_sheet(f"S{k + 1}")
+        ws.append(list(imports.COLS_ANCHOR))
+        for a in anchors(n, seed=k):
+            ws.append([a[c.upper() if c == "fs" else c] for c in imports.COLS_ANCHOR])
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def test_read_single_sheet():
+    raw = workbook([4, 0, 9])
+    assert imports.workbook_sheets(raw) == ["S1", "S2", "S3"]
+    sheet = imports.read_sheet(raw, "S3")
+    assert sheet["name"] == "S3" and len(sheet["anchors"]) == 9
+    assert imports.read_sheet(raw, "S2")["anchors"] == []
+    assert imports.read_sheet(raw, "missing") == {"name": "missing", "anchors": [], "geo": {}}
+
+
+def test_workbook_response_is_chunked(server, monkeypatch):
+    raw = workbook([7, 0, 12, 5])
+    monkeypatch.setattr(service, "BATCH_ANCHORS", 10)  # vários lotes
+
+    conn = http.client.HTTPConnection("127.0.0.1", server, timeout=10)
+    conn.request("POST", "/verify", body=raw, headers={"Content-Type": service.XLSX})
+    resp = conn.getresponse()
+    assert resp.status == 200
+    assert resp.getheader("Transfer-Encoding") == "chunked"
+    assert resp.getheader("Content-Length") is None
+    res = json.loads(resp.read())["results"]
+
+    ref = []
+    for batch in service.verify_workbook(raw):
+        ref += json.loads(service.dumps_strict(service.json_results(*batch)))
+    assert res == ref
+    assert [len(r["data"]) for r in res] == [7, 0, 12, 5]
+
+    # a ligação continua utilizável depois da resposta em pedaços
+    conn.request("GET", "/health")
+    assert conn.getresponse().status == 200
+    conn.close()
+
+    status, body = post(server, b"not a workbook", service.XLSX)
+    assert status == 400 and "error" in json.loads(body)
@@ -0,0 +1,140 @@
+"""
+Índice em grelha (spatial.BoxGrid) e distâncias entre segmentos, contra
+força bruta; efeito de grupo (group.evaluate) contra o cálculo directo
+em todos os pares.
+"""
+import numpy as np
+import pytest
+
+from anchorage import design, group
+from anchorage.anchors import compute_anchors
+from anchorage.spatial import BoxGrid, segment_distance, segments_cross
+
+
+def brute_pairs(qlo, qhi, lo, hi):
+    hit = ((lo[None] <= qhi[:, None]) & (hi[None] >= qlo[:, None])).all(axis=2)
+    return [tuple(p) for p in np.argwhere(hit).tolist()]
+
+
+@pytest.mark.parametrize("dim,cell", [(2, 0.7), (2, [0.3, 2.0]), (3, 1.0), (3, [0.5, 0.5, 3.0])])
+def test_box_grid_matches_brute_force(dim, cell):
+    rng = np.random.default_rng(dim)
+    lo = rng.uniform(0, 10, (400, dim))
+    hi = lo + rng.uniform(0, 1.5, (400, dim))
+    qlo = rng.uniform(-1, 10, (300, dim))
+    qhi = qlo + rng.uniform(0, 2.0, (300, dim))
+
+    qi, it = BoxGrid(lo, hi, cell).query(qlo, qhi)
+    pairs = list(zip(qi.tolist(), it.tolist()))
+    assert pairs == brute_pairs(qlo, qhi, lo, hi)  # cada par uma vez, por ordem
+
+
+@pytest.mark.parametrize("cell", [0.2, 0.3, 0.6, [0.8, 2.0, 0.8]])
+def test_box_grid_on_cell_boundaries(cell):
+    # caixas numa malha regular: cantos exactamente nas fronteiras das células
+    z = np.arange(300) * 0.6
+    lo = np.column_stack([np.zeros(300), np.zeros(300), z - 0.3])
+    hi = np.column_stack([np.ones(300), np.ones(300), z + 0.3])
+    qi, it = BoxGrid(lo, hi, cell).query(lo, hi)
+    assert list(zip(qi.tolist(), it.tolist())) == brute_pairs(lo, hi, lo, hi)
+
+
+def test_box_grid_empty_query():
+    grid = BoxGrid([[0.0, 0.0]], [[1.0, 1.0]], 0.5)
+    qi, it = grid.query([[5.0, 5.0]], [[6.0, 6.0]])
+    assert len(qi) == len(it) == 0
+
+
+def brute_distance(p0, p1, q0, q1, k=801):
+    s = np.linspace(0, 1, k)
+    a = p0[:, None, :] + s[None, :, None] * (p1 - p0)[:, None, :]
+    b = q0[:, None, :] + s[None, :, None] * (q1 - q0)[:, None, :]
+    return np.sqrt(((a[:, :, None, :] - b[:, None, :, :]) ** 2).sum(axis=3)).min(axis=(1, 2))
+
+
+@pytest.mark.parametrize("dim", [2, 3])
+def test_segment_distance_matches_sampling(dim):
+    rng = np.random.default_rng(10 + dim)
+    p0, p1, q0, q1 = (rng.uniform(0, 5, (60, dim)) for _ in range(4))
+    p1[:5] = p0[:5]  # segmentos degenerados (pontos)
+    q1[5:8] = q0[5:8]
+    d = segment_distance(p0, p1, q0, q1)
+    ref = brute_distance(p0, p1, q0, q1)
+    assert (d <= ref + 1e-12).all()
+    assert np.allclose(d, ref, atol=0.02)
+
+
+def test_segment_distance_exact_cases():
+    P0 = np.array([[0.0, 0.0], [0.0, 0.0], [0.0, 0.0]])
+    P1 = np.array([[2.0, 0.0], [2.0, 0.0], [2.0, 0.0]])
+    Q0 = np.array([[1.0, -1.0], [0.0, 1.0], [3.0, 0.0]])
+    Q1 = np.array([[1.0, 1.0], [2.0, 1.0], [4.0, 1.0]])
+    assert np.allclose(segment_distance(P0, P1, Q0, Q1), [0.0, 1.0, 1.0])
+    assert segments_cross(P0, P1, Q0, Q1).tolist() == [True, False, False]
+    # tocar num extremo não é um cruzamento próprio
+    assert not segments_cross(P0[:1], P1[:1], np.array([[2.0, 0.0]]), np.array([[2.0, 1.0]]))[0]
+
+
+# =============================================================
+# EFEITO DE GRUPO
+# =============================================================
+def naive_eta(df_res, afast, length, stagger, influence=4.0, samples=11, cap=0.5):
+    inst = group.expand(df_res, afast, length, stagger)
+    m = len(inst["z"])
+    R = influence * inst["r"]
+    t = (np.arange(samples) + 0.5) / samples
+    loss = np.zeros((m, samples))
+    for i in range(m):
+        pts = inst["p0"][i] + t[:, None] * (inst["p1"][i] - inst["p0"][i])
+        for j in range(m):
+            if i == j:
+                continue
+            d = segment_distance(pts, pts, np.repeat(inst["p0"][j][None], samples, 0),
+                                 np.repeat(inst["p1"][j][None], samples, 0))
+            loss[i] += group.lens_fraction(d, np.full(samples, (R[i] + R[j]) / 2)) / 2
+    return 1 - np.minimum(loss, cap).mean(axis=1)
+
+
+def group_section():
+    rng = np.random.default_rng(3)
+    data = [{
+        "x1": 0.0, "y1": -1.2 * i, "angle": float(rng.uniform(-30, -15)),
+        "free": float(rng.uniform(6, 12)), "bond": float(rng.uniform(6, 10)),
+        "prestress": 300.0, "strands": 4, "drill_mm": float(rng.choice([150, 200])),
+        "alpha": 1.4, "shear_stress": 150, "FS": 1.8,
+    } for i in range(6)]
+    return data, compute_anchors(data, 140.0, 6.0)
+
+
+@pytest.mark.parametrize("stagger", [False, True])
+def test_group_eta_matches_all_pairs(stagger):
+    _, df_res = group_section()
+    res = group.evaluate(df_res, 0.7, 12.0, stagger=stagger)
+    eta = naive_eta(df_res, 0.7, 12.0, stagger)
+    assert np.allclose(res["eta"], eta, atol=1e-12)
+    assert res["eta"].min() < 1.0  # há interacção no caso de teste
+
+
+def test_group_factor_in_bond_checks():
+    data, df_res = group_section()
+    res = group.evaluate(df_res, 0.7, 12.0)
+    out = group.apply(df_res, res)
+    eta = res["per_anchor"]["eta min"].to_numpy()
+
+    assert "Group eta" not in df_res  # df_res não é alterado
+    assert np.allclose(out["Group eta"], eta)
+    # η arredondado a 3 casas na tabela
+    assert np.allclose(out["Bond Resistance (kN)"], df_res["Bond Resistance (kN)"] * eta, rtol=1e-3)
+    assert (out["Bond Check"] == res["per_anchor"]["Group Check"]).all()
+
+    plain = design.evaluate(data, 140.0, 6.0)
+    reduced = design.evaluate(data, 140.0, 6.0, eta=out["Group eta"])
+    assert np.allclose(reduced["R_d"], plain["R_d"] * eta[:, None])
+    assert np.allclose(reduced["U_block"], plain["U_block"])
+
+
+@pytest.mark.parametrize("afast", [0.0, -1.0, float("nan")])
+def test_group_rejects_bad_spacing(afast):
+    _, df_res = group_section()
+    with pytest.raises(ValueError, match="spacing"):
+        group.evaluate(df_res, afast, 12.0)